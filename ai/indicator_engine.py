@@ -0,0 +1,291 @@
+"""
+Streaming Indicator Engine
+
+Incremental version of ``HedgeFundStrategy.assess_market`` over a sliding
+window of the last ``window`` candles (the live loop fetches 100). Instead
+of recomputing EMAs, ATR, RSI, the volume average and the EMA-slope
+regression from the window on every call, the engine keeps them as running
+state and folds in one candle at a time — O(1) per bar.
+
+``update()`` returns the same ``MarketState`` that ``assess_market`` would
+return for the last ``window`` candles, including its conventions:
+
+* EMAs are seeded at the first close of the window and report the raw
+  close until ``period`` bars have been seen.
+* ATR pads the window's first true range and seeds Wilder smoothing with
+  the mean of its first ``period`` values.
+* RSI sums gains and losses over the window (divided by the period).
+
+The EMAs and Wilder's ATR are linear recurrences, so they are run over the
+whole stream and the decayed contribution of the bars before the window
+start is swapped for the window's own seed. RSI gain/loss sums drop the
+delta of each bar leaving the window.
+
+A candle whose timestamp equals the last one replaces it, so the forming
+candle can be pushed repeatedly as it updates.
+"""
+
+import logging
+from collections import deque
+from itertools import islice
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from ai.self_learning import HedgeFundStrategy, MarketState
+
+logger = logging.getLogger(__name__)
+
+# Running window sums are rebuilt from their window this often (in bars)
+# so floating-point drift stays bounded on long streams
+_REFRESH_EVERY = 1000
+
+_SCALARS = (
+    'n_bars', 'last_timestamp', 'close', 'volume', 'ema_s', 'ema_l', 'atr_f',
+    'gain_sum', 'loss_sum', 'slope_sum', 'slope_wsum', 'vol_sum', 'since_refresh',
+)
+
+
+class _Bar(NamedTuple):
+    """Per-bar values kept for the window."""
+    close: float
+    tr: float           # true range vs the previous bar (0 for the first bar of the stream)
+    gain: float
+    loss: float
+    ema_s: float        # stream EMAs and Wilder recurrence after this bar
+    ema_l: float
+    atr_f: float
+
+
+class IncrementalIndicators:
+    """
+    O(1)-per-bar indicator state for a HedgeFundStrategy over a sliding window.
+    """
+
+    def __init__(self, strategy: HedgeFundStrategy, window: int = 100):
+        """
+        Args:
+            strategy: Strategy whose periods and regime thresholds are used.
+            window: Candles the indicators are computed over (the length
+                of the history ``assess_market`` would be given).
+        """
+        self.strategy = strategy
+        self.window = window
+        self.alpha_s = 2.0 / (strategy.ema_short + 1)
+        self.alpha_l = 2.0 / (strategy.ema_long + 1)
+        self.alpha_atr = 1.0 / strategy.atr_period
+
+        # Slope regression over the last ema_long EMA values, x = 0..p-1
+        p = strategy.ema_long
+        self._x_mean = (p - 1) / 2.0
+        self._x_var = p * (p * p - 1) / 12.0
+        # Σ c^k and Σ k·c^k (k = 0..p-1) — the window-seed correction of those EMA values
+        decay = (1 - self.alpha_l) ** np.arange(p)
+        self._g0 = float(decay.sum())
+        self._g1 = float(np.arange(p) @ decay)
+
+        self.state: Optional[MarketState] = None
+        self._undo = None
+        self.reset()
+
+    def reset(self):
+        """Forget all history."""
+        self.n_bars = 0             # bars seen on the stream
+        self.last_timestamp: Optional[float] = None
+        self.close = 0.0
+        self.volume = 0.0
+        self.ema_s = 0.0            # EMAs / Wilder recurrence over the whole stream
+        self.ema_l = 0.0
+        self.atr_f = 0.0
+        self.gain_sum = 0.0         # over the deltas inside the window
+        self.loss_sum = 0.0
+        self.slope_sum = 0.0        # Σ y over the slope window (stream EMA)
+        self.slope_wsum = 0.0       # Σ i·y over the slope window
+        self.vol_sum = 0.0
+        self.since_refresh = 0
+        self._bars: deque = deque()
+        self._ema_window: deque = deque()
+        self._vol_window: deque = deque()
+        self.state = None
+        self._undo = None
+
+    @property
+    def window_bars(self) -> int:
+        """Bars currently in the window (the history length of ``state``)."""
+        return len(self._bars)
+
+    # ── Feeding ───────────────────────────────────────────────────────────
+
+    def seed(self, ohlcv: np.ndarray) -> Optional[MarketState]:
+        """Reset and feed a full ``[ts, o, h, l, c, v]`` history."""
+        self.reset()
+        for row in ohlcv:
+            self.update(row)
+        return self.state
+
+    def update(self, candle: Sequence[float]) -> MarketState:
+        """Fold in one ``[ts, o, h, l, c, v]`` candle.
+
+        A candle with the same timestamp as the previous one replaces it
+        (forming-candle update); an older timestamp is ignored.
+        """
+        ts = float(candle[0])
+        if self.last_timestamp is not None:
+            if ts == self.last_timestamp:
+                self._rollback()
+            elif ts < self.last_timestamp:
+                return self.state
+        self._apply(ts, float(candle[2]), float(candle[3]), float(candle[4]), float(candle[5]))
+        self.state = self._market_state()
+        return self.state
+
+    def _rollback(self):
+        scalars, bar_evicted, ema_evicted, vol_evicted, prev_state = self._undo
+        for name, value in zip(_SCALARS, scalars):
+            setattr(self, name, value)
+        self._bars.pop()
+        if bar_evicted is not None:
+            self._bars.appendleft(bar_evicted)
+        self._ema_window.pop()
+        if ema_evicted is not None:
+            self._ema_window.appendleft(ema_evicted)
+        self._vol_window.pop()
+        if vol_evicted is not None:
+            self._vol_window.appendleft(vol_evicted)
+        self.state = prev_state
+        self._undo = None
+
+    def _apply(self, ts: float, high: float, low: float, close: float, volume: float):
+        s = self.strategy
+        scalars = tuple(getattr(self, name) for name in _SCALARS)
+        prev_state = self.state
+
+        tr = gain = loss = 0.0
+        if self.n_bars == 0:
+            self.ema_s = close
+            self.ema_l = close
+        else:
+            self.ema_s = self.alpha_s * close + (1 - self.alpha_s) * self.ema_s
+            self.ema_l = self.alpha_l * close + (1 - self.alpha_l) * self.ema_l
+            prev = self.close
+            tr = max(high - low, max(abs(high - prev), abs(low - prev)))
+            self.atr_f = tr * self.alpha_atr + self.atr_f * (1 - self.alpha_atr)
+            delta = close - prev
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+
+        # Window bars; the first bar's delta points outside the window
+        bar_evicted = None
+        if self._bars:
+            self.gain_sum += gain
+            self.loss_sum += loss
+        self._bars.append(_Bar(close, tr, gain, loss, self.ema_s, self.ema_l, self.atr_f))
+        if len(self._bars) > self.window:
+            bar_evicted = self._bars.popleft()
+            first = self._bars[0]
+            self.gain_sum -= first.gain
+            self.loss_sum -= first.loss
+
+        # Slope window of the last ema_long stream EMA values
+        p = s.ema_long
+        ema_evicted = None
+        if len(self._ema_window) == p:
+            ema_evicted = self._ema_window.popleft()
+            self.slope_wsum -= self.slope_sum - ema_evicted
+            self.slope_sum -= ema_evicted
+        self.slope_wsum += len(self._ema_window) * self.ema_l
+        self.slope_sum += self.ema_l
+        self._ema_window.append(self.ema_l)
+
+        vol_evicted = None
+        self._vol_window.append(volume)
+        self.vol_sum += volume
+        if len(self._vol_window) > s.vol_period:
+            vol_evicted = self._vol_window.popleft()
+            self.vol_sum -= vol_evicted
+
+        self.since_refresh += 1
+        if self.since_refresh >= _REFRESH_EVERY:
+            self._refresh_sums()
+
+        self.n_bars += 1
+        self.last_timestamp = ts
+        self.close = close
+        self.volume = volume
+        self._undo = (scalars, bar_evicted, ema_evicted, vol_evicted, prev_state)
+
+    def _refresh_sums(self):
+        window = np.fromiter(self._ema_window, dtype=np.float64)
+        self.slope_sum = float(window.sum())
+        self.slope_wsum = float(np.arange(len(window)) @ window)
+        self.vol_sum = float(sum(self._vol_window))
+        inner = list(islice(self._bars, 1, None))
+        self.gain_sum = float(sum(b.gain for b in inner))
+        self.loss_sum = float(sum(b.loss for b in inner))
+        self.since_refresh = 0
+
+    # ── State ─────────────────────────────────────────────────────────────
+
+    def _market_state(self) -> MarketState:
+        s = self.strategy
+        m = len(self._bars)
+        price = self.close
+        first = self._bars[0]
+
+        # Window EMA = stream EMA + c^(m-1) · (window seed − stream EMA at the window start)
+        ema_s = price
+        if m >= s.ema_short:
+            ema_s = self.ema_s + (1 - self.alpha_s) ** (m - 1) * (first.close - first.ema_s)
+        ema_l = price
+        if m >= s.ema_long:
+            ema_l = self.ema_l + (1 - self.alpha_l) ** (m - 1) * (first.close - first.ema_l)
+
+        trend_slope = 0.0
+        if m >= s.ema_long + 5:
+            p = s.ema_long
+            corr = (1 - self.alpha_l) ** (m - p) * (first.close - first.ema_l)
+            y_sum = self.slope_sum + corr * self._g0
+            y_wsum = self.slope_wsum + corr * self._g1
+            slope = (y_wsum - self._x_mean * y_sum) / self._x_var
+            trend_slope = float(slope / (y_sum / p + 1e-10))
+
+        if m < 2:
+            atr = price * 0.01
+        else:
+            # The window's first TR is padded with its second
+            p = s.atr_period
+            head = self._bars[1].tr + sum(b.tr for b in islice(self._bars, 1, min(m, p)))
+            if m <= p:
+                atr = head / m
+            else:
+                seed_bar = self._bars[p - 1]
+                atr = self.atr_f + (1 - self.alpha_atr) ** (m - p) * (head / p - seed_bar.atr_f)
+        atr_pct = atr / price * 100
+
+        rsi = 50.0
+        if m >= s.rsi_period + 1:
+            avg_gain = max(self.gain_sum, 0.0) / s.rsi_period
+            avg_loss = max(self.loss_sum, 0.0) / s.rsi_period
+            if avg_loss == 0:
+                rsi = 100.0 if avg_gain > 0 else 50.0
+            else:
+                rsi = 100.0 - (100.0 / (1.0 + avg_gain / avg_loss))
+
+        vol_ratio = 1.0
+        if m > s.vol_period:
+            avg_vol = self.vol_sum / s.vol_period
+            if avg_vol > 0:
+                vol_ratio = float(self.volume / avg_vol)
+
+        regime, confidence = s._classify_regime(trend_slope, atr_pct, rsi, vol_ratio)
+        return MarketState(
+            regime=regime,
+            trend_slope=trend_slope,
+            atr=float(atr),
+            atr_pct=atr_pct,
+            ema_short=ema_s,
+            ema_long=ema_l,
+            price=price,
+            volume_ratio=vol_ratio,
+            rsi=rsi,
+            regime_confidence=confidence,
+        )
@@ -90,6 +90,116 @@ DEFAULT_TRAIL_ACTIVATE = 1.5        # activate trail at 1.5× ATR profit
 DEFAULT_TRAIL_DISTANCE = 1.0        # trail by 1.0× ATR
 
 
+# ── Vectorized Primitives ──────────────────────────────────────────────────
+
+_RECURRENCE_BLOCK = 256
+
+
+def _linear_recurrence(x: np.ndarray, gain: float, decay: float, y0: float) -> np.ndarray:
+    """
+    Solve ``y[i] = gain * x[i] + decay * y[i-1]`` (with ``y[-1] = y0``) in
+    NumPy blocks instead of a per-element Python loop.
+
+    Each block is one matrix-vector product with a lower-triangular matrix
+    of decay powers, plus the carried-in value from the previous block.
+    """
+    n = len(x)
+    out = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return out
+    b = min(_RECURRENCE_BLOCK, n)
+    k = np.arange(b)
+    lag = k[:, None] - k[None, :]
+    kernel = np.where(lag >= 0, gain * decay ** np.maximum(lag, 0), 0.0)
+    carry = decay ** (k + 1)
+    prev = y0
+    for start in range(0, n, b):
+        chunk = x[start:start + b]
+        m = len(chunk)
+        out[start:start + m] = kernel[:m, :m] @ chunk + carry[:m] * prev
+        prev = out[start + m - 1]
+    return out
+
+
+def _prefix_atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    """
+    ``HedgeFundStrategy._atr(high[:i+1], low[:i+1], close[:i+1], period)[-1]``
+    for every ``i`` at once.
+    """
+    n = len(close)
+    if n < 2:
+        return close * 0.01
+    tr = np.maximum(
+        high[1:] - low[1:],
+        np.maximum(np.abs(high[1:] - close[:-1]), np.abs(low[1:] - close[:-1]))
+    )
+    tr = np.concatenate([[tr[0]], tr])
+    # Until `period` bars exist the ATR is the mean of the padded TRs so far
+    atr = np.cumsum(tr) / np.arange(1, n + 1)
+    atr[0] = close[0] * 0.01
+    if n >= period:
+        atr[period - 1] = np.mean(tr[:period])
+    if n > period:
+        # Kept as an exact scalar recurrence rather than _linear_recurrence:
+        # with the default multipliers (stop 1.5×, target 3×ATR) the RRR
+        # check sits exactly on min_rrr, so entries depend on the last bits
+        # of the ATR and must see the same values as _atr
+        alpha = 1.0 / period
+        prev = float(atr[period - 1])
+        wilder = []
+        for value in tr[period:].tolist():
+            prev = value * alpha + prev * (1 - alpha)
+            wilder.append(prev)
+        atr[period:] = wilder
+    return atr
+
+
+@dataclass
+class SignalSeries:
+    """
+    Per-bar output of ``HedgeFundStrategy.generate_signals``.
+
+    Element ``i`` is what ``generate_signal`` returns for the history
+    ``[0, i]``. ``signal_at(i)`` rebuilds the full TradeSignal (with
+    rationale) for a single bar.
+    """
+    strategy: 'HedgeFundStrategy'
+    action: np.ndarray              # 'buy' / 'sell' / 'hold'
+    confidence: np.ndarray
+    stop_price: np.ndarray
+    target_price: np.ndarray
+    regime: np.ndarray              # Regime values as strings
+    regime_confidence: np.ndarray
+    trend_slope: np.ndarray
+    atr: np.ndarray
+    atr_pct: np.ndarray
+    ema_short: np.ndarray
+    ema_long: np.ndarray
+    price: np.ndarray
+    volume_ratio: np.ndarray
+    rsi: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.action)
+
+    def state_at(self, i: int) -> MarketState:
+        return MarketState(
+            regime=Regime(self.regime[i]),
+            trend_slope=float(self.trend_slope[i]),
+            atr=float(self.atr[i]),
+            atr_pct=float(self.atr_pct[i]),
+            ema_short=float(self.ema_short[i]),
+            ema_long=float(self.ema_long[i]),
+            price=float(self.price[i]),
+            volume_ratio=float(self.volume_ratio[i]),
+            rsi=float(self.rsi[i]),
+            regime_confidence=float(self.regime_confidence[i]),
+        )
+
+    def signal_at(self, i: int) -> TradeSignal:
+        return self.strategy.signal_from_state(self.state_at(i), i + 1)
+
+
 # ── Strategy Engine ────────────────────────────────────────────────────────
 
 
@@ -320,11 +430,21 @@ class HedgeFundStrategy:
         - Regime context
         """
         state = self.assess_market(closes, highs, lows, volumes)
+        return self.signal_from_state(state, len(closes))
+
+    def signal_from_state(self, state: MarketState, n_bars: int) -> TradeSignal:
+        """
+        Apply the entry rules to an already assessed market state.
 
+        Lets callers that maintain indicators incrementally (see
+        ``ai.indicator_engine.IncrementalIndicators``) skip
+        ``assess_market``. *n_bars* is the length of the history the
+        state was computed from, used for the warm-up check.
+        """
         # ── NO-TRADE ZONES ───────────────────────────────────────────────
 
         # Not enough data
-        if len(closes) < max(self.ema_long, self.atr_period) + 5:
+        if n_bars < max(self.ema_long, self.atr_period) + 5:
             return TradeSignal("hold", 0.0, 0.0, 0.0, state.regime.value, "Warm-up: insufficient data")
 
         # Flat in ranging markets — this is THE discipline most retail traders lack
@@ -444,6 +564,154 @@ class HedgeFundStrategy:
         # Fallback
         return TradeSignal("hold", 0.0, 0.0, 0.0, state.regime.value, "No signal.")
 
+    def generate_signals(self, ohlcv: np.ndarray, cache: Optional[Dict] = None) -> SignalSeries:
+        """
+        Vectorized ``generate_signal`` for every bar of a history.
+
+        Computes the market state and entry decision of each prefix
+        ``ohlcv[:i+1]`` in one NumPy pass (O(N) instead of O(N²)), for
+        backtests and research. The rules mirror ``assess_market`` and
+        ``signal_from_state``.
+
+        Args:
+            ohlcv: (N, 6) array [timestamp, open, high, low, close, volume].
+            cache: Optional dict reused across calls on the *same* ``ohlcv``
+                (e.g. a parameter sweep). Indicator arrays are stored under
+                their (name, period) key, so strategies sharing a period
+                compute it once.
+        """
+        closes = np.asarray(ohlcv[:, 4], dtype=np.float64)
+        highs = np.asarray(ohlcv[:, 2], dtype=np.float64)
+        lows = np.asarray(ohlcv[:, 3], dtype=np.float64)
+        volumes = np.asarray(ohlcv[:, 5], dtype=np.float64)
+        n = len(closes)
+        idx = np.arange(n)
+        price = closes
+        cache = {} if cache is None else cache
+
+        def cached(key, compute):
+            if key not in cache:
+                cache[key] = compute()
+            return cache[key]
+
+        # EMAs — the raw close until `period` bars exist
+        ema_s_full = cached(('ema', self.ema_short), lambda: self._ema_series(closes, self.ema_short))
+        ema_l_full = cached(('ema', self.ema_long), lambda: self._ema_series(closes, self.ema_long))
+        ema_s = np.where(idx + 1 >= self.ema_short, ema_s_full, closes)
+        ema_l = np.where(idx + 1 >= self.ema_long, ema_l_full, closes)
+
+        trend_slope = cached(('slope', self.ema_long), lambda: self._slope_series(ema_l_full, self.ema_long))
+        atr = cached(('atr', self.atr_period), lambda: _prefix_atr(highs, lows, closes, self.atr_period))
+        atr_pct = atr / price * 100
+        rsi = cached(('rsi', self.rsi_period), lambda: self._rsi_series(closes, self.rsi_period))
+        vol_ratio = cached(('volume', self.vol_period), lambda: self._volume_ratio_series(volumes, self.vol_period))
+
+        # Regime classification (same priority as _classify_regime)
+        th = self.trend_threshold
+        trend_conf = np.minimum(1.0, np.abs(trend_slope) / (th * 5))
+        conditions = [
+            atr_pct > 3.0,
+            (vol_ratio > 2.0) & (atr_pct > 2.0),
+            trend_slope > th,
+            trend_slope < -th,
+        ]
+        regime = np.select(conditions, [
+            Regime.VOLATILE.value, Regime.VOLATILE.value,
+            Regime.TREND_UP.value, Regime.TREND_DOWN.value,
+        ], default=Regime.RANGING.value)
+        regime_conf = np.select(conditions, [0.7, 0.6, trend_conf, trend_conf], default=0.3)
+
+        # Entry rules (same order as signal_from_state)
+        is_up = regime == Regime.TREND_UP.value
+        is_down = regime == Regime.TREND_DOWN.value
+        tradable = (
+            (idx + 1 >= max(self.ema_long, self.atr_period) + 5)
+            & (vol_ratio >= 0.7)
+            & (atr_pct <= 2.5)
+        )
+        stop_dist = atr * self.stop_atr
+        tp_dist = atr * self.tp_atr
+        stop = np.where(is_up, price - stop_dist, price + stop_dist)
+        target = np.where(is_up, price + tp_dist, price - tp_dist)
+        risk = np.where(is_up, price - stop, stop - price) / price * 100
+        reward = np.where(is_up, target - price, price - target) / price * 100
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rrr_ok = ~((reward / risk < self.min_rrr) & (risk > 0))
+
+        buy = tradable & is_up & ~(price < ema_s) & ~(rsi > 70) & rrr_ok
+        sell = tradable & is_down & ~(price > ema_s) & ~(rsi < 30) & rrr_ok
+        entry = buy | sell
+        action = np.select([buy, sell], ['buy', 'sell'], default='hold')
+        confidence = np.where(entry, np.minimum(1.0, regime_conf * (1.0 + vol_ratio * 0.2)), 0.0)
+
+        return SignalSeries(
+            strategy=self,
+            action=action,
+            confidence=confidence,
+            stop_price=np.where(entry, stop, 0.0),
+            target_price=np.where(entry, target, 0.0),
+            regime=regime,
+            regime_confidence=regime_conf,
+            trend_slope=trend_slope,
+            atr=atr,
+            atr_pct=atr_pct,
+            ema_short=ema_s,
+            ema_long=ema_l,
+            price=price,
+            volume_ratio=vol_ratio,
+            rsi=rsi,
+        )
+
+    @staticmethod
+    def _slope_series(ema_values: np.ndarray, period: int) -> np.ndarray:
+        """Per-bar ``_ema_slope``: regression over the last *period* EMA values."""
+        n = len(ema_values)
+        trend_slope = np.zeros(n)
+        if n >= period + 5:
+            windows = np.lib.stride_tricks.sliding_window_view(ema_values, period)
+            x = np.arange(period) - (period - 1) / 2.0
+            slope = windows @ x / (x @ x)
+            slope = slope / (windows.mean(axis=1) + 1e-10)
+            trend_slope[period + 4:] = slope[5:]
+        return trend_slope
+
+    @staticmethod
+    def _rsi_series(closes: np.ndarray, period: int) -> np.ndarray:
+        """Per-bar ``_rsi`` (gains/losses summed over the whole prefix)."""
+        n = len(closes)
+        rsi = np.full(n, 50.0)
+        if n > period:
+            deltas = np.diff(closes)
+            avg_gain = np.cumsum(np.where(deltas > 0, deltas, 0.0)) / period
+            avg_loss = np.cumsum(np.where(deltas < 0, -deltas, 0.0)) / period
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = 100.0 - (100.0 / (1.0 + avg_gain / avg_loss))
+            values = np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, 50.0), values)
+            rsi[period:] = values[period - 1:]
+        return rsi
+
+    @staticmethod
+    def _volume_ratio_series(volumes: np.ndarray, period: int) -> np.ndarray:
+        """Per-bar volume / trailing *period*-bar average volume."""
+        n = len(volumes)
+        vol_ratio = np.ones(n)
+        if n > period:
+            avg_vol = np.lib.stride_tricks.sliding_window_view(volumes, period).mean(axis=1)[1:]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                vol_ratio[period:] = np.where(avg_vol > 0, volumes[period:] / avg_vol, 1.0)
+        return vol_ratio
+
+    @staticmethod
+    def _ema_series(values: np.ndarray, period: int) -> np.ndarray:
+        """Vectorized EMA seeded at the first value (as in ``_ema``)."""
+        if len(values) == 0:
+            return values
+        alpha = 2.0 / (period + 1)
+        out = np.empty(len(values), dtype=np.float64)
+        out[0] = values[0]
+        out[1:] = _linear_recurrence(values[1:], alpha, 1 - alpha, values[0])
+        return out
+
     # ── Position Management ──────────────────────────────────────────────
 
     def compute_next_stop(
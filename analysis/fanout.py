@@ -0,0 +1,133 @@
+"""
+Concurrent Analysis Fan-Out with Deadlines
+
+Runs independent analysis components on a thread pool so one slow REST
+endpoint (``fetch_with_retry`` can back off for tens of seconds) no longer
+stalls the whole cycle.
+
+Each component gets its own deadline, measured from the start of the run.
+A component that misses it, raises, or is still busy from an earlier run
+is replaced by its last good value, and the result records how old that
+value is. A late result is still kept as the new last good value once it
+arrives. A component whose previous run is still in flight is not
+resubmitted, so a hung endpoint occupies at most one worker.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Component status values
+OK, TIMEOUT, ERROR, BUSY = 'ok', 'timeout', 'error', 'busy'
+
+
+@dataclass
+class FanoutResult:
+    """Values and freshness of one fan-out run."""
+    values: Dict[str, Any] = field(default_factory=dict)
+    status: Dict[str, str] = field(default_factory=dict)
+    # Seconds since each value was produced (0.0 for fresh values, None if
+    # the component has never succeeded and its default was used)
+    staleness: Dict[str, Optional[float]] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def degraded(self) -> Dict[str, str]:
+        """Components that did not deliver a fresh value."""
+        return {name: s for name, s in self.status.items() if s != OK}
+
+
+class AnalysisFanout:
+    """
+    Thread-pool runner for named analysis components.
+    """
+
+    def __init__(self, max_workers: int = 4, default_deadline: float = 2.0):
+        """
+        Args:
+            max_workers: Pool size (components running at the same time).
+            default_deadline: Seconds allowed for components without an
+                explicit deadline.
+        """
+        self.default_deadline = default_deadline
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis')
+        self._last_good: Dict[str, tuple] = {}          # name → (value, produced_at)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        tasks: Dict[str, Callable[[], Any]],
+        deadlines: Optional[Dict[str, float]] = None,
+        defaults: Optional[Dict[str, Any]] = None,
+    ) -> FanoutResult:
+        """
+        Run *tasks* concurrently and wait for each up to its deadline.
+
+        Args:
+            tasks: Component name → zero-argument callable.
+            deadlines: Component name → seconds (default: ``default_deadline``).
+            defaults: Values used when a component has no last good value.
+        """
+        deadlines = deadlines or {}
+        defaults = defaults or {}
+        start = time.monotonic()
+        result = FanoutResult()
+
+        futures: Dict[str, Future] = {}
+        for name, task in tasks.items():
+            with self._lock:
+                previous = self._inflight.get(name)
+                if previous is not None and not previous.done():
+                    result.status[name] = BUSY
+                    continue
+                future = self.executor.submit(task)
+                self._inflight[name] = future
+            future.add_done_callback(lambda f, name=name: self._store(name, f))
+            futures[name] = future
+
+        # Wait in deadline order so each wait is bounded by the remaining time
+        for name in sorted(futures, key=lambda n: deadlines.get(n, self.default_deadline)):
+            remaining = deadlines.get(name, self.default_deadline) - (time.monotonic() - start)
+            try:
+                result.values[name] = futures[name].result(timeout=max(remaining, 0.0))
+                result.status[name] = OK
+                result.staleness[name] = 0.0
+            except FutureTimeout:
+                result.status[name] = TIMEOUT
+            except Exception as e:
+                logger.error("Analysis component %s failed: %s", name, e)
+                result.status[name] = ERROR
+
+        now = time.time()
+        for name, status in result.status.items():
+            if status == OK:
+                continue
+            with self._lock:
+                last = self._last_good.get(name)
+            if last is not None:
+                result.values[name] = last[0]
+                result.staleness[name] = round(now - last[1], 3)
+            else:
+                result.values[name] = defaults.get(name)
+                result.staleness[name] = None
+            logger.warning("Analysis component %s %s — using %s value", name, status,
+                           "default" if last is None else f"{result.staleness[name]:.1f}s old")
+
+        result.elapsed = round(time.monotonic() - start, 4)
+        return result
+
+    def _store(self, name: str, future: Future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        with self._lock:
+            self._last_good[name] = (future.result(), time.time())
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,78 +1,198 @@
 """
 Iceberg Order Detector
 
-Detects potential iceberg (hidden) orders by monitoring order book
-for repetitive refresh patterns at the same price level.
+Detects iceberg (hidden) orders from the WebSocket book and trade streams:
+a price level that keeps trading more than it ever shows, and whose
+visible size is replenished after being hit, is likely fed from a larger
+hidden order.
+
+* Levels are keyed by ``(side, price in ticks)`` — integer ticks, so
+  prices from different messages compare exactly.
+* Each trade adds its size to the level it executed against (taker buys
+  hit the ask, taker sells the bid). Each book delta updates the level's
+  displayed size; an increase after the level was traded is a refill.
+* A level is flagged once its traded volume exceeds ``volume_ratio`` ×
+  the largest size it displayed and it was refilled at least
+  ``min_refills`` times.
+* Processing is per changed level (book deltas and trades only carry
+  those), so detection runs continuously on the WebSocket thread without
+  blocking anybody. Levels idle for ``level_ttl`` seconds are evicted and
+  at most ``max_levels`` are tracked (least recently updated go first).
 """
 
-import time
 import logging
-from collections import defaultdict
-from typing import List
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class LevelStats:
+    """Executed volume versus displayed size at one price level."""
+    side: str                       # 'bid' / 'ask'
+    price: float
+    displayed: float = 0.0          # current visible size
+    max_displayed: float = 0.0
+    traded: float = 0.0             # volume executed at this level
+    traded_since_refill: float = 0.0
+    refills: int = 0
+    first_seen: float = 0.0
+    last_update: float = 0.0
+
+    @property
+    def hidden_ratio(self) -> float:
+        """Traded volume per unit of the largest visible size."""
+        if self.max_displayed <= 0:
+            return float('inf') if self.traded > 0 else 0.0
+        return self.traded / self.max_displayed
+
+
 class IcebergDetector:
     """
-    Detects iceberg orders by monitoring order book snapshots over time.
-    An iceberg order is identified when the same price level shows
-    multiple distinct size values across consecutive polls, suggesting
-    a large hidden order being fed in small chunks.
+    Streaming per-level refill tracker over one symbol's book and trades.
     """
 
-    def __init__(self, client, symbol: str = "BTCUSDT"):
+    def __init__(
+        self,
+        symbol: str = "BTCUSDT",
+        tick_size: float = 0.1,
+        min_refills: int = 3,
+        volume_ratio: float = 1.0,
+        level_ttl: float = 300.0,
+        max_levels: int = 500,
+        clock: Callable[[], float] = time.time,
+    ):
         """
         Args:
-            client: BybitClient instance.
             symbol: Trading pair.
+            tick_size: Price increment used to key levels.
+            min_refills: Refills required before a level is flagged.
+            volume_ratio: Traded volume / largest displayed size required.
+            level_ttl: Seconds without activity before a level is evicted.
+            max_levels: Maximum levels tracked.
+            clock: Time source in seconds.
         """
-        self.client = client
         self.symbol = symbol
-
-    def detect_iceberg_orders(self, cycles: int = 10, refresh_threshold: int = 3) -> List[float]:
+        self.tick_size = tick_size
+        self.min_refills = min_refills
+        self.volume_ratio = volume_ratio
+        self.level_ttl = level_ttl
+        self.max_levels = max_levels
+        self.clock = clock
+        self.levels: 'OrderedDict[Tuple[str, int], LevelStats]' = OrderedDict()
+        self._flagged: Dict[Tuple[str, int], LevelStats] = {}
+        self._lock = threading.Lock()
+
+    # ── Input ──────────────────────────────────────────────────────────────
+
+    def attach(self, client):
+        """Update from *client*'s WebSocket book and trade events."""
+        client.add_listener(self._on_client_event)
+
+    def _on_client_event(self, event: str, symbol: str, payload):
+        if symbol != self.symbol:
+            return
+        if event == 'book':
+            data = payload.get('data') or {}
+            self.on_book(data.get('b') or [], data.get('a') or [], snapshot=payload.get('type') == 'snapshot')
+        elif event == 'trade':
+            self.on_trades(payload)
+
+    def on_trades(self, trades: List[Dict]):
+        """Apply public trades (``p``, ``v``, ``S`` keys of the trade stream)."""
+        now = self.clock()
+        with self._lock:
+            for trade in trades:
+                # The taker's side tells which resting side was executed against
+                side = 'ask' if trade.get('S') == 'Buy' else 'bid'
+                level = self._level(side, float(trade['p']), now)
+                size = float(trade['v'])
+                level.traded += size
+                level.traded_since_refill += size
+                self._check(level)
+            self._evict(now)
+
+    def on_book(self, bids: List[List], asks: List[List], snapshot: bool = False):
+        """Apply changed levels (``[price, size]`` rows; size 0 = removed).
+
+        A snapshot replaces every displayed size and counts no refills,
+        since what happened during the gap before it is unknown.
         """
-        Poll the order book and flag price levels with size variations.
-
-        Args:
-            cycles: Number of sequential order-book snapshots to compare.
-            refresh_threshold: Minimum distinct size observations to flag.
-
-        Returns:
-            List of price levels where iceberg activity is suspected.
-        """
-        iceberg_data = defaultdict(list)  # price → [sizes]
-
-        for i in range(cycles):
-            try:
-                data = self.client.get_order_book(self.symbol)
-                if not data or 'b' not in data or 'a' not in data:
-                    logger.warning("Order book unavailable on cycle %d", i)
-                    time.sleep(1)
-                    continue
-
-                for level in data['b'][:10] + data['a'][:10]:
-                    price = float(level[0])
-                    size = float(level[1])
-                    iceberg_data[price].append(size)
-
-            except Exception as e:
-                logger.error("Iceberg detection cycle %d failed: %s", i, e)
-
-            time.sleep(1)  # pause between polls
-
-        # Flag prices where size varied significantly across cycles
-        detected = [
-            price for price, sizes in iceberg_data.items()
-            if len(set(round(s, 6) for s in sizes)) >= refresh_threshold
-        ]
-
-        if detected:
-            logger.info("Potential iceberg orders at: %s", detected)
-        else:
-            logger.debug("No iceberg patterns detected")
-
-        return detected
+        now = self.clock()
+        with self._lock:
+            if snapshot:
+                for level in self.levels.values():
+                    level.displayed = 0.0
+                    level.traded_since_refill = 0.0
+            for side, rows in (('bid', bids), ('ask', asks)):
+                for price, size in rows:
+                    price, size = float(price), float(size)
+                    key = (side, self._tick(price))
+                    level = self.levels.get(key)
+                    if level is None:
+                        if size <= 0:
+                            continue
+                        level = self._level(side, price, now)
+                    else:
+                        level.last_update = now
+                        self.levels.move_to_end(key)
+                    if not snapshot and size > level.displayed and level.traded_since_refill > 0:
+                        level.refills += 1
+                        level.traded_since_refill = 0.0
+                    level.displayed = size
+                    level.max_displayed = max(level.max_displayed, size)
+                    self._check(level)
+            self._evict(now)
+
+    # ── Level index ────────────────────────────────────────────────────────
+
+    def _tick(self, price: float) -> int:
+        return int(round(price / self.tick_size))
+
+    def _level(self, side: str, price: float, now: float) -> LevelStats:
+        key = (side, self._tick(price))
+        level = self.levels.get(key)
+        if level is None:
+            level = LevelStats(side=side, price=round(self._tick(price) * self.tick_size, 10), first_seen=now)
+            self.levels[key] = level
+        level.last_update = now
+        self.levels.move_to_end(key)
+        return level
+
+    def _check(self, level: LevelStats):
+        key = (level.side, self._tick(level.price))
+        if key in self._flagged:
+            return
+        if level.refills >= self.min_refills and level.traded > self.volume_ratio * level.max_displayed:
+            self._flagged[key] = level
+            logger.info("Iceberg suspected on %s %s @ %.2f: traded %.4f vs max shown %.4f, %d refills",
+                        self.symbol, level.side, level.price, level.traded, level.max_displayed, level.refills)
+
+    def _evict(self, now: float):
+        # Least recently updated first — stop at the first level still live
+        while self.levels:
+            key, level = next(iter(self.levels.items()))
+            if len(self.levels) <= self.max_levels and now - level.last_update < self.level_ttl:
+                break
+            self.levels.popitem(last=False)
+            self._flagged.pop(key, None)
+
+    # ── Readers ────────────────────────────────────────────────────────────
+
+    def icebergs(self, side: Optional[str] = None) -> List[LevelStats]:
+        """Flagged levels (optionally one side), most hidden volume first."""
+        with self._lock:
+            self._evict(self.clock())
+            levels = [l for l in self._flagged.values() if side is None or l.side == side]
+        return sorted(levels, key=lambda l: l.traded, reverse=True)
+
+    def detect_iceberg_orders(self) -> List[float]:
+        """Prices of the levels currently flagged as icebergs (non-blocking)."""
+        return [level.price for level in self.icebergs()]
 
 
 if __name__ == "__main__":
@@ -86,6 +206,9 @@ if __name__ == "__main__":
         os.getenv("BYBIT_API_SECRET", ""),
         testnet=True
     )
-    detector = IcebergDetector(client, "BTCUSDT")
-    result = detector.detect_iceberg_orders(cycles=5)
-    print("Detected icebergs:", result)
\ No newline at end of file
+    detector = IcebergDetector("BTCUSDT")
+    detector.attach(client)
+    client.start_websocket()
+    time.sleep(60)
+    print("Detected icebergs:", detector.icebergs())
+    client.stop_websocket()
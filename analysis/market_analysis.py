@@ -28,17 +28,20 @@ class MarketInsights:
         self.symbols = symbols
         self.timeframe = timeframe
 
-    def get_latest_data(self) -> Dict[str, Optional[np.ndarray]]:
+    def get_latest_data(self, snapshot=None) -> Dict[str, Optional[np.ndarray]]:
         """
         Fetch OHLCV data as numpy arrays via BybitClient.
 
+        Args:
+            snapshot: Optional MarketSnapshot for the current cycle.
+
         Returns:
             dict: symbol → (N, 6) ndarray [timestamp, O, H, L, C, V] or None.
         """
         result = {}
         for symbol in self.symbols:
             try:
-                data = self.client.get_historical_data(
+                data = (snapshot or self.client).get_historical_data(
                     symbol,
                     interval=self.timeframe,
                     limit=60
@@ -55,15 +58,18 @@ class MarketInsights:
                 result[symbol] = None
         return result
 
-    def analyze_market(self) -> Dict[str, Dict[str, float]]:
+    def analyze_market(self, snapshot=None) -> Dict[str, Dict[str, float]]:
         """
         Analyze market conditions and return trade insights per symbol.
 
+        Args:
+            snapshot: Optional MarketSnapshot shared with other components.
+
         Returns dict with keys:
             entry_price, stop_loss_pct, take_profit_pct, avg_close,
             volatility, trend_strength, rsi_approximation
         """
-        data = self.get_latest_data()
+        data = self.get_latest_data(snapshot)
         insights = {}
 
         for symbol, candles in data.items():
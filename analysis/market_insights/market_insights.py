@@ -2,6 +2,9 @@
 import numpy as np
 import logging
 
+from analysis.ofi_analysis import StreamingOFI
+from data_pipeline.trade_flow import TradeFlow
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -10,62 +13,64 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class MarketInsights:
-    def __init__(self, client, symbols, timeframe='1m'):
+    def __init__(self, client, symbols, timeframe='1m', ofi=None, trade_flow=None):
         self.client = client
         self.symbols = symbols if isinstance(symbols, list) else [symbols]
         self.timeframe = timeframe
+        # Shared StreamingOFI (attached to the client's book stream) if given
+        self.ofi = ofi or StreamingOFI(self.symbols[0])
+        # Shared TradeFlow (fed by the trade stream) if given, else REST-polled
+        self.trade_flow = trade_flow or TradeFlow(self.symbols[0], windows=(300,))
         logger.info(f"MarketInsights initialized for symbols: {self.symbols} with timeframe: {self.timeframe}")
 
     def get_imbalance_ratio(self):
         try:
-            book = self.client.get_order_book(self.symbols[0])
-            if not book or 'bids' not in book or 'asks' not in book:
-                logger.warning("No valid order book data")
-                return 0.0
-            top_bids = sum(float(x[1]) for x in book["bids"][:5])
-            top_asks = sum(float(x[1]) for x in book["asks"][:5])
-            total = top_bids + top_asks
-            return (top_bids - top_asks) / total if total > 0 else 0.0
+            if not self.ofi.attached:
+                # Not stream-fed — diff consecutive REST books instead
+                self.ofi.update_from_book(self.client.get_order_book(self.symbols[0]))
+            value = self.ofi.value()
+            return value if value is not None else 0.0
         except Exception as e:
             logger.error(f"Imbalance ratio calculation failed: {str(e)}")
             return 0.0
 
-    def detect_iceberg_orders(self, trades=None):
+    def _flow(self):
+        if not self.trade_flow.streaming:
+            self.trade_flow.poll(self.client, limit=100)
+        return self.trade_flow
+
+    def detect_iceberg_orders(self):
         try:
-            if trades is None:
-                trades = self.client.get_recent_trades(self.symbols[0], limit=100)
-            if not trades:
+            flow = self._flow()
+            sizes = flow.sizes()
+            if not len(sizes):
                 logger.warning("No trades available for iceberg detection")
                 return []
-            large_trades = [trade for trade in trades if float(trade.get("size", 0)) > 10]
-            if len(large_trades) > 5:
+            large = np.flatnonzero(sizes > 10)
+            if len(large) > 5:
                 logger.info("Potential iceberg order detected!")
-                return [float(trade["price"]) for trade in large_trades[:5]]
+                return flow.prices()[large[:5]].tolist()
             return []
         except Exception as e:
             logger.error(f"Iceberg detection failed: {str(e)}")
             return []
 
-    def analyze_aggression(self, trades=None):
+    def analyze_aggression(self):
         try:
-            if trades is None:
-                trades = self.client.get_recent_trades(self.symbols[0], limit=100)
-            if not trades:
+            flow = self._flow().stats()
+            if flow['volume'] <= 0:
                 logger.warning("No trades available for aggression analysis")
                 return 0.0
-            buy_vol = sum(float(t.get("size", 0)) for t in trades if t.get("side") == "Buy")
-            sell_vol = sum(float(t.get("size", 0)) for t in trades if t.get("side") == "Sell")
-            total_vol = buy_vol + sell_vol
-            return buy_vol / total_vol if total_vol > 0 else 0.0
+            return flow['buy_volume'] / flow['volume']
         except Exception as e:
             logger.error(f"Aggression analysis failed: {str(e)}")
             return 0.0
 
-    def run(self, trades=None):
+    def run(self):
         try:
             imbalance = self.get_imbalance_ratio()
-            aggression = self.analyze_aggression(trades)
-            icebergs = self.detect_iceberg_orders(trades)
+            aggression = self.analyze_aggression()
+            icebergs = self.detect_iceberg_orders()
             logger.info(f"Market Insights ({self.timeframe}):")
             logger.info(f"Order Book Imbalance: {imbalance:.4f}")
             logger.info(f"Order Flow Aggression: {aggression:.4f}")
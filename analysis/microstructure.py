@@ -0,0 +1,177 @@
+"""
+Microstructure Feature Store
+
+Computes the order-book feature vector once per book version and serves
+the cached result to every strategy, so HFT, scalping, market making and
+the order-book analysis all read identical numbers without re-parsing
+price strings per decision.
+
+* ``compute_features()`` works on the array-backed book (``(n, 2)``
+  float arrays, best level first) with vectorized NumPy: best prices,
+  mid, spread, microprice, top-k imbalance and bid/ask ratio, a
+  distance-weighted imbalance, depth slopes and cumulative depth within
+  N bps of the mid.
+* ``MicrostructureFeatures.get(source)`` returns the features of the
+  source's current book. The version stamp is the local book's
+  ``(update_id, timestamp)`` (or the REST book's timestamp), so features
+  are recomputed only when the book actually changed.
+* ``attach(client)`` recomputes eagerly on each ``book`` event, keeping
+  the work off the strategies' decision path.
+"""
+
+import logging
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_EMPTY = np.empty((0, 2), dtype=np.float64)
+
+
+def book_arrays(book: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """``(bids, asks)`` float arrays from a ``b``/``a`` (or ``bids``/``asks``) book dict."""
+    bids = book.get('b', book.get('bids')) or []
+    asks = book.get('a', book.get('asks')) or []
+    return (np.asarray(bids, dtype=np.float64).reshape(-1, 2) if len(bids) else _EMPTY,
+            np.asarray(asks, dtype=np.float64).reshape(-1, 2) if len(asks) else _EMPTY)
+
+
+def compute_features(bids: np.ndarray, asks: np.ndarray, imbalance_levels: Sequence[int] = (1, 5, 10),
+                     depth_bps: Sequence[float] = (5, 10, 25), levels: int = 10) -> Optional[Dict[str, float]]:
+    """Microstructure features of one book state.
+
+    Args:
+        bids: ``(n, 2)`` price/size rows, best (highest) first.
+        asks: ``(n, 2)`` price/size rows, best (lowest) first.
+        imbalance_levels: Top-k depths for ``imbalance_k`` / ``bid_ask_ratio_k``.
+        depth_bps: Distances from the mid for ``bid_depth_Nbps`` / ``ask_depth_Nbps``.
+        levels: Levels used for the weighted imbalance and the depth slopes.
+
+    Returns:
+        Feature dict, or None if either side is empty.
+    """
+    if not len(bids) or not len(asks):
+        return None
+    best_bid, bid_qty = bids[0]
+    best_ask, ask_qty = asks[0]
+    mid = (best_bid + best_ask) / 2
+    top_qty = bid_qty + ask_qty
+    features = {
+        'best_bid': float(best_bid),
+        'best_ask': float(best_ask),
+        'mid': float(mid),
+        'spread': float(best_ask - best_bid),
+        'spread_pct': float((best_ask - best_bid) / best_bid * 100) if best_bid > 0 else 0.0,
+        'spread_bps': float((best_ask - best_bid) / mid * 1e4) if mid > 0 else 0.0,
+        'microprice': float((best_bid * ask_qty + best_ask * bid_qty) / top_qty) if top_qty > 0 else float(mid),
+    }
+
+    bid_cum = np.cumsum(bids[:, 1])
+    ask_cum = np.cumsum(asks[:, 1])
+    for k in imbalance_levels:
+        bv = bid_cum[min(k, len(bid_cum)) - 1]
+        av = ask_cum[min(k, len(ask_cum)) - 1]
+        features[f'imbalance_{k}'] = float((bv - av) / (bv + av)) if bv + av > 0 else 0.0
+        features[f'bid_ask_ratio_{k}'] = float(bv / av) if av > 0 else 2.0   # 2.0 = extreme buy pressure
+
+    # Distance from the mid in bps, per level
+    b, a = bids[:levels], asks[:levels]
+    bid_dist = (mid - b[:, 0]) / mid * 1e4
+    ask_dist = (a[:, 0] - mid) / mid * 1e4
+    bw = b[:, 1] / (1.0 + bid_dist)
+    aw = a[:, 1] / (1.0 + ask_dist)
+    total = bw.sum() + aw.sum()
+    features['weighted_imbalance'] = float((bw.sum() - aw.sum()) / total) if total > 0 else 0.0
+    features['bid_slope'] = _slope(bid_dist, np.cumsum(b[:, 1]))
+    features['ask_slope'] = _slope(ask_dist, np.cumsum(a[:, 1]))
+
+    all_bid_dist = (mid - bids[:, 0]) / mid * 1e4
+    all_ask_dist = (asks[:, 0] - mid) / mid * 1e4
+    for n in depth_bps:
+        features[f'bid_depth_{n:g}bps'] = float(bids[all_bid_dist <= n, 1].sum())
+        features[f'ask_depth_{n:g}bps'] = float(asks[all_ask_dist <= n, 1].sum())
+    return features
+
+
+def _slope(x: np.ndarray, y: np.ndarray) -> float:
+    """Least-squares slope of cumulative size per bps of distance (0 if undefined)."""
+    if len(x) < 2:
+        return 0.0
+    dx = x - x.mean()
+    var = float(dx @ dx)
+    return float(dx @ (y - y.mean()) / var) if var > 0 else 0.0
+
+
+class MicrostructureFeatures:
+    """
+    Per-symbol cache of the feature vector, keyed by book version.
+    """
+
+    def __init__(self, symbol: str = "BTCUSDT", imbalance_levels: Sequence[int] = (1, 5, 10),
+                 depth_bps: Sequence[float] = (5, 10, 25), levels: int = 10):
+        """
+        Args:
+            symbol: Trading pair.
+            imbalance_levels: Top-k depths for the imbalance / ratio features.
+            depth_bps: Distances from the mid for the cumulative depth features.
+            levels: Levels used for the weighted imbalance and depth slopes.
+        """
+        self.symbol = symbol
+        self.imbalance_levels = tuple(imbalance_levels)
+        self.depth_bps = tuple(depth_bps)
+        self.levels = levels
+        self.version = None
+        self.features: Optional[Dict[str, float]] = None
+        self.computed = 0
+        self._client = None
+        self._lock = threading.Lock()
+
+    def attach(self, client):
+        """Recompute on each of *client*'s book events."""
+        self._client = client
+        client.add_listener(self._on_client_event)
+
+    def _on_client_event(self, event: str, symbol: str, payload):
+        if event == 'book' and symbol == self.symbol:
+            self.get(self._client)
+
+    def get(self, source=None) -> Optional[Dict[str, float]]:
+        """Features of *source*'s current book (cached per book version).
+
+        Args:
+            source: Client, replay client or MarketSnapshot (default: the
+                attached client).
+
+        Returns:
+            The shared feature dict (treat as read-only), or None without a book.
+        """
+        source = source if source is not None else self._client
+        # A MarketSnapshot has no local book of its own — use its client's
+        local = getattr(source, 'get_local_order_book', None) \
+            or getattr(getattr(source, 'client', None), 'get_local_order_book', None)
+        book = local(self.symbol) if local is not None else None
+        if book is not None:
+            with book.lock:
+                version = ('ws', id(book), book.update_id, book.timestamp)
+                bids, asks = book.bids, book.asks
+            return self._cached(version, lambda: (bids, asks))
+        raw = source.get_order_book(self.symbol)
+        if not raw:
+            return None
+        stamp = raw.get('timestamp')
+        version = ('rest', stamp) if stamp is not None else None
+        return self._cached(version, lambda: book_arrays(raw))
+
+    def _cached(self, version, arrays) -> Optional[Dict[str, float]]:
+        with self._lock:
+            if version is not None and version == self.version:
+                return self.features
+            bids, asks = arrays()
+            features = compute_features(bids, asks, self.imbalance_levels, self.depth_bps, self.levels)
+            if features is not None:
+                features['version'] = self.computed
+                self.computed += 1
+            self.version, self.features = version, features
+            return features
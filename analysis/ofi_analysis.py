@@ -1,121 +1,211 @@
-# analysis/ofi_analysis.py
 """
-Order Flow Imbalance (OFI) Analysis Module
-
-Calculates buying/selling pressure using order book data or trade data if provided.
+Streaming Multi-Level Order Flow Imbalance (OFI)
+
+Event-based OFI (Cont, Kukanov & Stoikov; multi-level variant) computed
+from consecutive states of the local L2 book, instead of a static
+bid/ask depth ratio of one REST snapshot.
+
+For each of the best ``levels`` price levels, an update contributes
+
+    e_i =  q_b(t)·[P_b(t) ≥ P_b(t-1)] − q_b(t-1)·[P_b(t) ≤ P_b(t-1)]
+         − q_a(t)·[P_a(t) ≤ P_a(t-1)] + q_a(t-1)·[P_a(t) ≥ P_a(t-1)]
+
+i.e. size added to (or price improvement on) the bid counts as buy
+pressure, size added to the ask as sell pressure, and removals the other
+way round.
+
+* ``update()`` computes the per-level contributions as one vectorized
+  NumPy expression over the top ``levels`` rows — constant time per book
+  update, independent of the history length.
+* Contributions go into a ring buffer; every window in ``windows``
+  (seconds) keeps a running sum that is advanced/evicted incrementally.
+* ``value(window)`` is the weighted net flow divided by the weighted
+  gross flow over the window, in [-1, 1] (positive = buy pressure);
+  ``ofi(window)`` returns the raw per-level sums.
+* ``attach(client)`` feeds it from the client's ``book`` events (the
+  WebSocket-maintained ``LocalOrderBook``). Without the stream,
+  ``update_from_book()`` accepts the ``{'b', 'a'}`` dicts of
+  ``get_order_book`` — coarser, since changes between polls are lost.
 """
 
 import logging
-from typing import Optional, List, Dict
-from bybit_client import BybitClient
-
-# Set up logging consistent with other modules
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('trading_bot.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
-class OFIAnalysis:
-    def __init__(self, client: BybitClient, symbol: str = "BTCUSDT"):
-        """
-        Initialize OFI analyzer.
 
+class StreamingOFI:
+    """
+    Rolling multi-level OFI over one symbol's book updates.
+    """
+
+    def __init__(
+        self,
+        symbol: str = "BTCUSDT",
+        levels: int = 5,
+        windows: Sequence[float] = (1.0, 10.0, 60.0),
+        weights: Optional[Sequence[float]] = None,
+        capacity: int = 1 << 16,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
         Args:
-            client (BybitClient): Authenticated BybitClient instance.
-            symbol (str): Trading pair (default: "BTCUSDT").
+            symbol: Trading pair.
+            levels: Book levels per side included in the OFI.
+            windows: Rolling window lengths in seconds.
+            weights: Per-level weights for ``value()`` (default: equal).
+            capacity: Updates kept in the ring buffer; should cover the
+                longest window at peak update rate.
+            clock: Time source in seconds (injectable for replay).
         """
-        self.client = client
         self.symbol = symbol
-        logger.info(f"OFIAnalysis initialized for {symbol}")
-
-    def compute_order_flow_imbalance(self, levels: int = 5, trades: Optional[List[Dict]] = None) -> Optional[float]:
-        """
-        Calculate normalized OFI (-1 to 1 range) using trades if provided, otherwise order book data.
-
-        Args:
-            levels (int): Number of order book levels to consider (used if trades is None).
-            trades (List[Dict], optional): List of recent trades. If provided, computes OFI from trades.
+        self.levels = levels
+        self.windows = tuple(float(w) for w in windows)
+        self.weights = np.ones(levels) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.capacity = capacity
+        self.clock = clock
+        self.updates = 0
+        self._client = None
+
+        self._ts = np.zeros(capacity)
+        self._flow = np.zeros((capacity, levels))
+        self._gross = np.zeros((capacity, levels))
+        self._head = 0                                  # total updates pushed
+        self._tail = {w: 0 for w in self.windows}       # first update inside each window
+        self._sum = {w: np.zeros(levels) for w in self.windows}
+        self._gross_sum = {w: np.zeros(levels) for w in self.windows}
+        self._prev: Optional[np.ndarray] = None         # (4, levels): bid px, bid qty, ask px, ask qty
+        self._lock = threading.Lock()
+
+    # ── Input ──────────────────────────────────────────────────────────────
+
+    def attach(self, client):
+        """Update from *client*'s WebSocket book events."""
+        self._client = client
+        client.add_listener(self._on_client_event)
+
+    @property
+    def attached(self) -> bool:
+        """True if fed by a client's book stream."""
+        return self._client is not None
+
+    def _on_client_event(self, event: str, symbol: str, payload):
+        if event != 'book' or symbol != self.symbol:
+            return
+        book = self._client.get_local_order_book(symbol)
+        if book is None:
+            return
+        if isinstance(payload, dict) and payload.get('type') == 'snapshot':
+            # A snapshot follows a (re)subscribe — never diff across the gap
+            self.reset()
+        bids, asks = book.top(self.levels)
+        self.update(bids, asks)
+
+    def update_from_book(self, book: Dict, ts: Optional[float] = None) -> Optional[np.ndarray]:
+        """Update from a ``{'b': [[price, size], ...], 'a': [...]}`` book dict."""
+        if not book or not book.get('b') or not book.get('a'):
+            return None
+        bids = np.asarray(book['b'], dtype=np.float64).reshape(-1, 2)[:self.levels]
+        asks = np.asarray(book['a'], dtype=np.float64).reshape(-1, 2)[:self.levels]
+        return self.update(bids, asks, ts)
+
+    def update(self, bids: np.ndarray, asks: np.ndarray, ts: Optional[float] = None) -> Optional[np.ndarray]:
+        """Add one book state (top levels as ``(n, 2)`` arrays, best first).
 
         Returns:
-            float: OFI ratio (positive = buy pressure, negative = sell pressure) or 0.0 if failed.
+            The per-level OFI contribution of this update, or None for the
+            first state after a reset.
         """
-        try:
-            if trades is not None:
-                # Calculate OFI based on trade data
-                if not trades or len(trades) < 1:
-                    logger.warning(f"No trades provided for OFI computation for {self.symbol}")
-                    return 0.0
-
-                buy_volume = sum(float(trade.get('size', 0)) for trade in trades if trade.get('side', '').lower() == 'buy')
-                sell_volume = sum(float(trade.get('size', 0)) for trade in trades if trade.get('side', '').lower() == 'sell')
-                total_volume = buy_volume + sell_volume
-
-                if total_volume == 0:
-                    logger.debug("Total trade volume is zero, returning OFI of 0.0")
-                    return 0.0
-
-                ofi = (buy_volume - sell_volume) / total_volume
-                logger.debug(f"Computed OFI from trades: {ofi:.4f} (Buy Vol: {buy_volume:.2f}, Sell Vol: {sell_volume:.2f})")
-                return ofi
-
-            # Fallback to order book data if no trades provided
-            order_book = self.client.get_order_book(self.symbol)
-            if not order_book or 'bids' not in order_book or 'asks' not in order_book:
-                logger.error("Invalid order book response")
-                return 0.0
-
-            bids = order_book['bids']
-            asks = order_book['asks']
-
-            if not bids or not asks:
-                logger.warning("Empty order book data")
-                return 0.0
-
-            # Process top levels
-            bid_vol = sum(float(b[1]) for b in sorted(
-                bids,
-                key=lambda x: float(x[0]),
-                reverse=True
-            )[:levels])
-
-            ask_vol = sum(float(a[1]) for a in sorted(
-                asks,
-                key=lambda x: float(x[0])
-            )[:levels])
-
-            # Calculate normalized OFI
-            total_vol = bid_vol + ask_vol
-            if total_vol == 0:
-                logger.debug("Total order book volume is zero, returning OFI of 0.0")
-                return 0.0
-
-            ofi = (bid_vol - ask_vol) / total_vol
-            logger.debug(f"Computed OFI from order book: {ofi:.4f} (Bid Vol: {bid_vol:.2f}, Ask Vol: {ask_vol:.2f})")
-            return ofi
-
-        except Exception as e:
-            logger.error(f"OFI calculation failed: {str(e)}", exc_info=True)
-            return 0.0
-
-if __name__ == "__main__":
-    from dotenv import load_dotenv
-    import os
-    load_dotenv()
-    api_key = os.getenv('BYBIT_API_KEY')
-    api_secret = os.getenv('BYBIT_API_SECRET')
-    client = BybitClient(api_key, api_secret, testnet=True)
-    ofi_analyzer = OFIAnalysis(client, "BTCUSDT")
-    
-    # Test with order book
-    ofi_ob = ofi_analyzer.compute_order_flow_imbalance(levels=5)
-    print(f"Order Flow Imbalance (Order Book): {ofi_ob}")
-    
-    # Test with trades
-    trades = client.get_recent_trades("BTCUSDT", limit=100)
-    ofi_trades = ofi_analyzer.compute_order_flow_imbalance(trades=trades)
-    print(f"Order Flow Imbalance (Trades): {ofi_trades}")
+        state = self._state(bids, asks)
+        ts = self.clock() if ts is None else ts
+        with self._lock:
+            prev, self._prev = self._prev, state
+            if prev is None:
+                return None
+            bp, bq, ap, aq = state
+            pbp, pbq, pap, paq = prev
+            flow = (np.where(bp >= pbp, bq, 0.0) - np.where(bp <= pbp, pbq, 0.0)
+                    - np.where(ap <= pap, aq, 0.0) + np.where(ap >= pap, paq, 0.0))
+            self._push(ts, flow)
+            self.updates += 1
+            return flow
+
+    def reset(self):
+        """Forget the previous book state (after a gap or reconnect); windows are kept."""
+        with self._lock:
+            self._prev = None
+
+    def _state(self, bids: np.ndarray, asks: np.ndarray) -> np.ndarray:
+        """Top levels as a fixed (4, levels) array; missing levels have zero size."""
+        state = np.zeros((4, self.levels))
+        state[2, :] = np.inf
+        n, m = min(len(bids), self.levels), min(len(asks), self.levels)
+        state[0, :n], state[1, :n] = bids[:n, 0], bids[:n, 1]
+        state[2, :m], state[3, :m] = asks[:m, 0], asks[:m, 1]
+        return state
+
+    # ── Rolling windows ────────────────────────────────────────────────────
+
+    def _push(self, ts: float, flow: np.ndarray):
+        i = self._head % self.capacity
+        if self._head - min(self._tail.values()) >= self.capacity:
+            # Buffer full — the oldest update leaves every window still holding it
+            for w in self.windows:
+                if self._tail[w] == self._head - self.capacity:
+                    self._drop(w)
+        self._ts[i] = ts
+        self._flow[i] = flow
+        self._gross[i] = np.abs(flow)
+        self._head += 1
+        for w in self.windows:
+            self._sum[w] += flow
+            self._gross_sum[w] += self._gross[i]
+            self._evict(w, ts)
+
+    def _drop(self, w: float):
+        j = self._tail[w] % self.capacity
+        self._sum[w] -= self._flow[j]
+        self._gross_sum[w] -= self._gross[j]
+        self._tail[w] += 1
+
+    def _evict(self, w: float, now: float):
+        while self._tail[w] < self._head and self._ts[self._tail[w] % self.capacity] <= now - w:
+            self._drop(w)
+        if self._tail[w] == self._head:
+            # Empty window — clear accumulated floating-point residue
+            self._sum[w][:] = 0.0
+            self._gross_sum[w][:] = 0.0
+
+    # ── Readers ────────────────────────────────────────────────────────────
+
+    def _window(self, window: Optional[float]) -> float:
+        if window is None:
+            return self.windows[0]
+        if window not in self._sum:
+            raise ValueError(f"OFI window {window}s not configured (have {self.windows})")
+        return window
+
+    def ofi(self, window: Optional[float] = None) -> np.ndarray:
+        """Per-level OFI summed over the last *window* seconds (default: the first window)."""
+        w = self._window(window)
+        with self._lock:
+            self._evict(w, self.clock())
+            return self._sum[w].copy()
+
+    def value(self, window: Optional[float] = None) -> Optional[float]:
+        """Normalized OFI in [-1, 1] over the last *window* seconds, or None without updates."""
+        w = self._window(window)
+        with self._lock:
+            self._evict(w, self.clock())
+            gross = float(self._gross_sum[w] @ self.weights)
+            if gross <= 0:
+                return None
+            return float(np.clip(self._sum[w] @ self.weights / gross, -1.0, 1.0))
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """Normalized OFI for every configured window (for logging / analysis dicts)."""
+        return {f"ofi_{w:g}s": self.value(w) for w in self.windows}
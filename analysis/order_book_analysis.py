@@ -1,13 +1,17 @@
 """
 Order Book Analysis Module
 
-Analyzes order book data from BybitClient to compute trading signals.
+Analyzes order book data from BybitClient to compute trading signals,
+read from the shared ``MicrostructureFeatures`` store. Order flow
+imbalance is computed from book updates by
+``analysis.ofi_analysis.StreamingOFI``.
 """
 
-import numpy as np
 import logging
 from typing import Optional
 
+from analysis.microstructure import MicrostructureFeatures
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,81 +20,31 @@ class OrderBookAnalysis:
     Analyzes order book data to calculate market pressure indicators.
     """
 
-    def __init__(self, client, symbol: str = "BTCUSDT"):
+    def __init__(self, client, symbol: str = "BTCUSDT", features: Optional[MicrostructureFeatures] = None):
         """
         Args:
             client: BybitClient instance (not BybitAPI).
             symbol: Trading pair.
+            features: Shared microstructure feature store (optional).
         """
         self.client = client
         self.symbol = symbol
+        self.features = features or MicrostructureFeatures(symbol)
 
-    def calculate_order_flow_imbalance(self, levels: int = 5) -> Optional[float]:
-        """
-        Calculate normalized Order Flow Imbalance from order book.
-
-        Positive = buy pressure, negative = sell pressure.
-        Range: [-1.0, 1.0]
-
-        Args:
-            levels: Number of top bid/ask levels to consider.
-
-        Returns:
-            Normalized OFI or None if data unavailable.
-        """
-        try:
-            data = self.client.get_order_book(self.symbol)
-            if not data or 'b' not in data or 'a' not in data:
-                logger.warning("Invalid order book data for %s", self.symbol)
-                return None
-
-            bids = data['b'][:levels]
-            asks = data['a'][:levels]
-
-            if not bids or not asks:
-                return None
-
-            bid_vol = sum(float(b[1]) for b in bids)
-            ask_vol = sum(float(a[1]) for a in asks)
-            total = bid_vol + ask_vol
-
-            if total == 0:
-                return 0.0
-
-            ofi = (bid_vol - ask_vol) / total
-            logger.debug("OFI=%+.4f (bid_vol=%.2f ask_vol=%.2f)", ofi, bid_vol, ask_vol)
-            return ofi
-
-        except Exception as e:
-            logger.error("OFI calculation error: %s", e, exc_info=True)
-            return None
-
-    def calculate_spread_pct(self) -> Optional[float]:
-        """Calculate current bid-ask spread as percentage of mid-price."""
+    def calculate_spread_pct(self, snapshot=None) -> Optional[float]:
+        """Calculate current bid-ask spread as percentage of the best bid."""
         try:
-            data = self.client.get_order_book(self.symbol)
-            if not data or 'b' not in data or 'a' not in data:
-                return None
-            best_bid = float(data['b'][0][0])
-            best_ask = float(data['a'][0][0])
-            if best_bid <= 0:
-                return None
-            return (best_ask - best_bid) / best_bid * 100
+            features = self.features.get(snapshot or self.client)
+            return features['spread_pct'] if features else None
         except Exception as e:
             logger.error("Spread calc error: %s", e)
             return None
 
-    def calculate_bid_ask_ratio(self, levels: int = 5) -> Optional[float]:
+    def calculate_bid_ask_ratio(self, levels: int = 5, snapshot=None) -> Optional[float]:
         """Ratio of total bid volume to total ask volume (>1 = buy pressure)."""
         try:
-            data = self.client.get_order_book(self.symbol)
-            if not data or 'b' not in data or 'a' not in data:
-                return None
-            bid_vol = sum(float(b[1]) for b in data['b'][:levels])
-            ask_vol = sum(float(a[1]) for a in data['a'][:levels])
-            if ask_vol == 0:
-                return 2.0  # extreme buy pressure
-            return bid_vol / ask_vol
+            features = self.features.get(snapshot or self.client)
+            return features.get(f'bid_ask_ratio_{levels}') if features else None
         except Exception as e:
             logger.error("Bid/ask ratio error: %s", e)
             return None
@@ -108,6 +62,5 @@ if __name__ == "__main__":
         testnet=True
     )
     oba = OrderBookAnalysis(client, "BTCUSDT")
-    print("OFI:", oba.calculate_order_flow_imbalance())
     print("Spread %:", oba.calculate_spread_pct())
     print("Bid/Ask Ratio:", oba.calculate_bid_ask_ratio())
\ No newline at end of file
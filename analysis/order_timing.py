@@ -3,6 +3,7 @@ import numpy as np
 import logging
 from typing import Optional
 from bybit_client import BybitClient
+from data_pipeline.trade_flow import TradeFlow
 
 # Set up logging consistent with other modules
 logging.basicConfig(
@@ -16,7 +17,8 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class OrderTimingOptimizer:
-    def __init__(self, client: BybitClient, symbol: str = "BTCUSDT", threshold: float = 5.0):
+    def __init__(self, client: BybitClient, symbol: str = "BTCUSDT", threshold: float = 5.0,
+                 trade_flow: Optional[TradeFlow] = None, window: float = 60.0):
         """
         Detects large institutional orders by monitoring order flow imbalance (OFI).
 
@@ -24,31 +26,36 @@ class OrderTimingOptimizer:
             client (BybitClient): Instance of BybitClient for API access.
             symbol (str): Trading pair (default: "BTCUSDT").
             threshold (float): Minimum imbalance to trigger action (default: 5.0).
+            trade_flow (TradeFlow, optional): Shared trade-flow aggregates (default: a REST-polled one).
+            window (float): Trade-flow window in seconds (must be one of its windows).
         """
         self.client = client
         self.symbol = symbol
         self.threshold = threshold
+        self.trade_flow = trade_flow or TradeFlow(symbol, windows=(window,))
+        self.window = window
         logger.info(f"OrderTimingOptimizer initialized for {symbol} with threshold: {threshold}")
 
-    def detect_large_orders(self) -> Optional[str]:
+    def detect_large_orders(self, snapshot=None) -> Optional[str]:
         """
         Identifies large trades and order flow imbalances to anticipate big moves.
 
+        Args:
+            snapshot (MarketSnapshot, optional): Shared per-cycle market data.
+
         Returns:
             str or None: "BUY" or "SELL" if large order detected, None otherwise.
         """
         try:
-            trades = self.client.get_recent_trades(self.symbol, limit=50)
-            if not trades:
-                logger.warning(f"No recent trades fetched for {self.symbol}")
+            if not self.trade_flow.streaming:
+                self.trade_flow.poll(snapshot or self.client, limit=50)
+            flow = self.trade_flow.stats(self.window)
+            if flow['count'] == 0:
+                logger.warning(f"No recent trades for {self.symbol}")
                 return None
 
-            # Use 'qty' instead of 'size' based on Bybit API response
-            volumes = [float(trade.get('qty', 0)) for trade in trades]  # Safely get 'qty', default to 0 if missing
-            buy_vol = sum(v for v, t in zip(volumes, trades) if t.get('side', '').capitalize() == "Buy")
-            sell_vol = sum(v for v, t in zip(volumes, trades) if t.get('side', '').capitalize() == "Sell")
-
-            ofi = buy_vol - sell_vol  # Order flow imbalance
+            buy_vol, sell_vol = flow['buy_volume'], flow['sell_volume']
+            ofi = flow['net_volume']  # Order flow imbalance
             if abs(ofi) > self.threshold:
                 direction = "BUY" if ofi > 0 else "SELL"
                 logger.info(f"Large {direction} order detected! OFI: {ofi:.2f} (Buy Vol: {buy_vol:.2f}, Sell Vol: {sell_vol:.2f})")
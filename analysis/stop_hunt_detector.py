@@ -1,18 +1,195 @@
 """
 Stop Hunt Detector
 
-Detects potential stop-hunting activity by identifying rapid,
-unusual price movements beyond normal volatility thresholds.
+Detects potential stop-hunting activity: a sharp move beyond normal
+volatility that is quickly reversed, as when clustered stop-loss orders
+are triggered and price snaps back.
+
+* ``find_stop_hunts()`` finds every move-and-reversal in a close series
+  in one vectorized NumPy pass (rolling reversal means via a cumulative
+  sum) and returns indices, move sizes and reversal ratios — usable on
+  months of 1-minute history for research.
+* ``StreamingStopHuntDetector`` applies the same rule incrementally to
+  1-minute bars, either closed candles (``on_bar``) or bars it builds
+  from the public trade stream (``on_trade`` / ``attach``). It keeps only
+  the last ``reversal_window + 2`` closes, so each bar costs O(1).
+* ``StopHuntDetector.detect_stop_hunts()`` keeps the original
+  DataFrame-in, bool-out interface on top of ``find_stop_hunts()``.
 """
 
 import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
 import numpy as np
 import pandas as pd
-from typing import Optional
 
 logger = logging.getLogger(__name__)
 
 
+def find_stop_hunts(closes: np.ndarray, threshold: float = 0.005, reversal_window: int = 3,
+                    reversal_frac: float = 0.5) -> Dict[str, np.ndarray]:
+    """Find every sharp move that is reversed within *reversal_window* bars.
+
+    A move is the return of one bar with ``|return| > threshold``; it is a
+    stop hunt if the mean return of the next *reversal_window* bars goes
+    the other way by more than ``reversal_frac`` × the move.
+
+    Args:
+        closes: Close prices, oldest first.
+        threshold: Minimum one-bar return (fraction) of the move.
+        reversal_window: Bars after the move that must reverse it.
+        reversal_frac: Required mean reversal per bar, relative to the move.
+
+    Returns:
+        ``index`` (bar whose close completed the move), ``move`` (its
+        return), ``reversal`` (mean counter-return of the following bars)
+        and ``ratio`` (``reversal / |move|``), one entry per stop hunt.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    k = reversal_window
+    empty = np.array([], dtype=np.float64)
+    if len(closes) < k + 2:
+        return {'index': np.array([], dtype=np.int64), 'move': empty, 'reversal': empty, 'ratio': empty}
+
+    returns = np.diff(closes) / closes[:-1]
+    csum = np.concatenate(([0.0], np.cumsum(returns)))
+    moves = returns[:len(returns) - k]
+    # Mean of returns[i + 1 : i + 1 + k] for every candidate move i
+    following = (csum[k + 1:] - csum[1:len(csum) - k]) / k
+    reversal = -np.sign(moves) * following
+    size = np.abs(moves)
+    hit = (size > threshold) & (reversal > reversal_frac * size)
+    idx = np.flatnonzero(hit)
+    return {
+        'index': idx + 1,
+        'move': moves[idx],
+        'reversal': reversal[idx],
+        'ratio': reversal[idx] / size[idx],
+    }
+
+
+class StreamingStopHuntDetector:
+    """
+    Incremental stop-hunt detection on 1-minute bars.
+    """
+
+    def __init__(self, symbol: str = "BTCUSDT", threshold: float = 0.005, reversal_window: int = 3,
+                 reversal_frac: float = 0.5, bar_seconds: int = 60, max_events: int = 100):
+        """
+        Args:
+            symbol: Trading pair.
+            threshold: Minimum one-bar return (fraction) of the move.
+            reversal_window: Bars after the move that must reverse it.
+            reversal_frac: Required mean reversal per bar, relative to the move.
+            bar_seconds: Bar length when building bars from trades.
+            max_events: Detected stop hunts kept for ``recent()``.
+        """
+        self.symbol = symbol
+        self.threshold = threshold
+        self.reversal_window = reversal_window
+        self.reversal_frac = reversal_frac
+        self.bar_ms = bar_seconds * 1000
+        self.bars = 0                       # closed bars seen
+        self.events: deque = deque(maxlen=max_events)
+        self._closes: deque = deque(maxlen=reversal_window + 2)
+        self._bar_id: Optional[int] = None  # bar being built from trades
+        self._bar_close = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def seeded(self) -> bool:
+        return self.bars >= self.reversal_window + 2
+
+    # ── Input ──────────────────────────────────────────────────────────────
+
+    def attach(self, client):
+        """Build bars from *client*'s public trade events."""
+        client.add_listener(self._on_client_event)
+
+    def _on_client_event(self, event: str, symbol: str, payload):
+        if event != 'trade' or symbol != self.symbol:
+            return
+        for trade in payload:
+            self.on_trade(int(trade['T']), float(trade['p']))
+
+    def on_trade(self, ts_ms: int, price: float) -> Optional[Dict]:
+        """Add one trade; closes the current bar when *ts_ms* is in a later one."""
+        bar_id = ts_ms // self.bar_ms
+        event = None
+        with self._lock:
+            if self._bar_id is not None and bar_id > self._bar_id:
+                event = self._close_bar(self._bar_id * self.bar_ms, self._bar_close)
+            if self._bar_id is None or bar_id >= self._bar_id:
+                self._bar_id = bar_id
+                self._bar_close = price
+        return event
+
+    def on_bar(self, ts_ms: int, close: float) -> Optional[Dict]:
+        """Add one closed bar. Returns the stop hunt it completed, if any."""
+        with self._lock:
+            return self._close_bar(ts_ms, close)
+
+    def seed(self, timestamps: np.ndarray, closes: np.ndarray, last_open: bool = True):
+        """Replace the state with history (e.g. after start-up or a stream outage).
+
+        Args:
+            timestamps: Bar open times in ms, oldest first.
+            closes: Bar closes.
+            last_open: The last bar is still forming and continues from trades.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        closes = np.asarray(closes, dtype=np.float64)
+        with self._lock:
+            if last_open and len(closes):
+                self._bar_id, self._bar_close = int(timestamps[-1]) // self.bar_ms, float(closes[-1])
+                timestamps, closes = timestamps[:-1], closes[:-1]
+            else:
+                self._bar_id = None
+            found = find_stop_hunts(closes, self.threshold, self.reversal_window, self.reversal_frac)
+            self.events.clear()
+            for i, move, reversal, ratio in zip(found['index'], found['move'], found['reversal'], found['ratio']):
+                self.events.append(self._event(int(i), int(timestamps[i]), move, reversal, ratio))
+            self._closes.clear()
+            self._closes.extend(closes[-self._closes.maxlen:])
+            self.bars = len(closes)
+
+    def _close_bar(self, ts_ms: int, close: float) -> Optional[Dict]:
+        self._closes.append(close)
+        self.bars += 1
+        if len(self._closes) < self._closes.maxlen:
+            return None
+        c = self._closes
+        move = c[1] / c[0] - 1
+        following = sum(c[j + 1] / c[j] - 1 for j in range(1, len(c) - 1)) / self.reversal_window
+        reversal = -np.sign(move) * following
+        if abs(move) <= self.threshold or reversal <= self.reversal_frac * abs(move):
+            return None
+        index = self.bars - self.reversal_window - 1
+        event = self._event(index, ts_ms - self.reversal_window * self.bar_ms, move, reversal, reversal / abs(move))
+        self.events.append(event)
+        logger.info("Stop hunt detected on %s: %+.4f move, %.0f%% reversed per bar",
+                    self.symbol, move, event['ratio'] * 100)
+        return event
+
+    @staticmethod
+    def _event(index: int, ts_ms: int, move: float, reversal: float, ratio: float) -> Dict:
+        return {'index': index, 'timestamp': ts_ms, 'move': float(move),
+                'reversal': float(reversal), 'ratio': float(ratio)}
+
+    # ── Readers ────────────────────────────────────────────────────────────
+
+    def recent(self, bars: int = 30) -> bool:
+        """True if a stop hunt completed within the last *bars* closed bars."""
+        with self._lock:
+            return any(e['index'] >= self.bars - bars for e in self.events)
+
+    def recent_events(self, bars: int = 30) -> List[Dict]:
+        with self._lock:
+            return [e for e in self.events if e['index'] >= self.bars - bars]
+
+
 class StopHuntDetector:
     """
     Monitors price action for signs of stop hunts — sharp moves
@@ -54,26 +231,11 @@ class StopHuntDetector:
                 return False
 
             prices = pd.to_numeric(recent_data['close'], errors='coerce').dropna().values
-            if len(prices) < 6:
-                return False
-
-            returns = np.diff(prices) / prices[:-1]
-
-            for i in range(2, len(returns) - 3):
-                # Sharp move
-                if abs(returns[i]) > threshold:
-                    move_dir = np.sign(returns[i])
-                    # Check for reversal in next 3 candles
-                    reversal = returns[i + 1:i + 4]
-                    if len(reversal) > 0:
-                        avg_reversal = np.mean(reversal)
-                        # Reversed >50% of initial move
-                        if move_dir * avg_reversal < -0.5 * abs(returns[i]):
-                            logger.info(
-                                "Stop hunt detected: %.4f move reversed at index %d",
-                                returns[i], i
-                            )
-                            return True
+            found = find_stop_hunts(prices, threshold)
+            if len(found['index']):
+                logger.info("Stop hunt detected: %.4f move reversed at index %d",
+                            found['move'][0], found['index'][0])
+                return True
 
             logger.debug("No stop hunt pattern found")
             return False
@@ -103,4 +265,4 @@ if __name__ == "__main__":
         result = detector.detect_stop_hunts(df)
         print("Stop hunt detected:", result)
     else:
-        print("Failed to fetch sample data")
\ No newline at end of file
+        print("Failed to fetch sample data")
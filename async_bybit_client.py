@@ -0,0 +1,666 @@
+"""
+asyncio-native Bybit Client
+
+``AsyncBybitClient`` has the same surface as ``BybitClient``
+(``get_order_book``, ``get_historical_data``, ``place_order``,
+``get_positions``, ...) as coroutines, all running on one event loop:
+
+* REST goes through ``ccxt.async_support`` on a shared, pooled keep-alive
+  ``aiohttp`` session, so concurrent requests are multiplexed over a few
+  reused connections instead of one blocking thread each.
+* The public stream is an ``aiohttp`` WebSocket task. One connection
+  carries the order book and trade topics of every symbol, maintains the
+  same ``LocalOrderBook`` and ``CandleStore`` state as BybitClient and
+  emits the same listener events.
+* The private stream is a second task feeding the same ``AccountState``
+  cache (orders, fills, positions, wallet) as BybitClient.
+
+``SyncBybitClient`` is a thin blocking facade: it runs an AsyncBybitClient
+on a private event-loop thread and exposes BybitClient's synchronous
+methods, so ``TradingSystem`` and the analysis/execution components work
+with it unchanged (``USE_ASYNC_CLIENT`` in config). Reads of WebSocket
+state (local book, trade buffer, account cache) are served directly
+without a loop hop.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+import ccxt.async_support as ccxt_async
+import numpy as np
+
+from bybit_client import AdvancedConnectionManager, is_rate_limit_error
+from data_pipeline.batch_orders import BATCH_ORDER_LIMIT, batch_results, v5_order_fields
+from data_pipeline.candle_store import CandleStore, interval_to_ms, normalize_interval
+from data_pipeline.local_order_book import LocalOrderBook
+from data_pipeline.rate_limiter import RateLimiter
+from data_pipeline.account_state import AccountState, PRIVATE_TOPICS, PRIVATE_WS_URL, auth_message
+
+logger = logging.getLogger(__name__)
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class AsyncBybitClient:
+    """
+    Coroutine-based Bybit client sharing one event loop and HTTP pool.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        testnet: bool = True,
+        symbols: Sequence[str] = ("BTCUSDT",),
+        pool_size: int = 50,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        """
+        Args:
+            api_key: Bybit API key.
+            api_secret: Bybit API secret.
+            testnet: Use testnet endpoints.
+            symbols: Symbols whose book and trade streams are subscribed.
+            pool_size: Maximum simultaneous HTTP connections.
+            rate_limiter: Shared limiter (one is created if omitted).
+        """
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.testnet = testnet
+        self.conn_manager = AdvancedConnectionManager(testnet)
+        self.pool_size = pool_size
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.rate_limit_max_wait = 10.0
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.client = None
+        self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self.ws_task: Optional[asyncio.Task] = None
+        self.ws_connected = False
+        self.account = AccountState()
+        self.private_ws_task: Optional[asyncio.Task] = None
+        self.ws_symbols = list(symbols)
+        self.order_book_depth = 50
+        self.trade_buffer = deque(maxlen=200)
+        self.local_books: Dict[str, LocalOrderBook] = {}
+        self.candle_stores: Dict[Tuple[str, str], CandleStore] = {}
+        self.candle_store_capacity = 1000
+        self.listeners: List[Callable[[str, str, object], None]] = []
+        self.ws_retry_delay = 5
+        self.max_ws_retry_delay = 60
+
+    # ── Lifecycle ──────────────────────────────────────────────────────────
+
+    async def open(self):
+        """Create the pooled HTTP session and the ccxt exchange (inside the loop)."""
+        if self.session is not None:
+            return
+        connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=15))
+        self.client = ccxt_async.bybit({
+            'apiKey': self.api_key,
+            'secret': self.api_secret,
+            'enableRateLimit': False,
+            'session': self.session,
+            'options': {'defaultType': 'linear', 'adjustForTimeDifference': True},
+        })
+        base_url = self.conn_manager.get_rest_endpoint()
+        self.client.urls['api'] = {'public': base_url, 'private': base_url}
+        logger.info("AsyncBybitClient opened (pool=%d, testnet=%s)", self.pool_size, self.testnet)
+
+    async def close(self):
+        await self.stop_private_stream()
+        await self.stop_websocket()
+        if self.client is not None:
+            await self.client.close()
+        if self.session is not None:
+            await self.session.close()
+        self.session = None
+        self.client = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    # ── REST ───────────────────────────────────────────────────────────────
+
+    async def fetch_with_retry(self, method: str, *args, max_retries: int = 5, delay: int = 3, **kwargs):
+        for attempt in range(1, max_retries + 1):
+            if not await self._acquire(method):
+                logger.warning("Rate limiter would delay %s beyond %.0fs. Skipping.", method, self.rate_limit_max_wait)
+                return None
+            try:
+                base_url = self.conn_manager.get_rest_endpoint()
+                self.client.urls['api']['public'] = base_url
+                self.client.urls['api']['private'] = base_url
+                response = await getattr(self.client, method)(*args, **kwargs)
+                self.rate_limiter.update_from_headers(method, getattr(self.client, 'last_response_headers', None))
+                if isinstance(response, dict) and 'retCode' in response and response['retCode'] != 0:
+                    raise Exception(f"API error {response['retCode']}: {response['retMsg']}")
+                return response
+            except Exception as e:
+                logger.error("Attempt %d/%d of %s failed: %s", attempt, max_retries, method, e)
+                if attempt == max_retries:
+                    return None
+                if is_rate_limit_error(e):
+                    wait_ms = self.rate_limiter.penalize(method, getattr(self.client, 'last_response_headers', None))
+                    await asyncio.sleep(wait_ms / 1000)
+                    continue
+                self.conn_manager.switch_rest_endpoint()
+                await asyncio.sleep(delay * (2 ** (attempt - 1)))
+        return None
+
+    async def _acquire(self, method: str) -> bool:
+        """Wait on the loop (not a thread) until the limiter admits *method*."""
+        waited = 0.0
+        while True:
+            wait_ms = self.rate_limiter.check(method)
+            if wait_ms == 0:
+                return True
+            if waited + wait_ms / 1000 > self.rate_limit_max_wait:
+                return False
+            await asyncio.sleep(wait_ms / 1000)
+            waited += wait_ms / 1000
+
+    async def get_balance(self) -> float:
+        cached = self.account.balance('USDT')
+        if cached is not None:
+            return cached
+        balance = await self._fetch_balance()
+        return balance if balance is not None else 0.0
+
+    async def _fetch_balance(self) -> Optional[float]:
+        balance = await self.fetch_with_retry('fetch_balance', {'type': 'future'})
+        return float(balance['total'].get('USDT', 0.0)) if balance else None
+
+    async def place_order(self, symbol: str, qty: float, side: str, order_type: str = "Market",
+                          price: Optional[float] = None, reduce_only: bool = False,
+                          order_link_id: Optional[str] = None) -> Dict:
+        params = {'reduceOnly': reduce_only, 'category': 'linear'}
+        if order_type.lower() == "limit" and price is not None:
+            params['price'] = price
+        if order_link_id:
+            params['orderLinkId'] = order_link_id
+        order = await self.fetch_with_retry('create_order', symbol, order_type.lower(), side.lower(), qty, params=params)
+        if order and 'id' in order:
+            logger.info("Order placed: %s %s %s @ %s (reduce_only=%s)", side, qty, symbol, price or 'Market', reduce_only)
+        else:
+            logger.error("Order placement failed: %s", order)
+        return order or {}
+
+    async def cancel_order(self, symbol: str, order_id: str) -> Optional[Dict]:
+        return await self.fetch_with_retry('cancel_order', symbol, order_id, params={'category': 'linear'})
+
+    async def get_order_rows(self, symbol: str, order_link_id: Optional[str] = None) -> Optional[List[Dict]]:
+        params = {'category': 'linear', 'symbol': symbol}
+        if order_link_id:
+            params['orderLinkId'] = order_link_id
+        response = await self.fetch_with_retry('private_get_v5_order_realtime', params)
+        if response is None:
+            return None
+        return (response.get('result') or {}).get('list') or []
+
+    async def amend_order(self, symbol: str, order_id: str, qty: Optional[float] = None,
+                          price: Optional[float] = None) -> Optional[Dict]:
+        fields = v5_order_fields(symbol, {'order_id': order_id, 'qty': qty, 'price': price})
+        response = await self.fetch_with_retry('private_post_v5_order_amend', {'category': 'linear', **fields},
+                                               max_retries=1)
+        return {'id': order_id} if response else None
+
+    async def place_batch_orders(self, symbol: str, orders: List[Dict]) -> List[Dict]:
+        return await self._batch('private_post_v5_order_create_batch', symbol, orders)
+
+    async def amend_batch_orders(self, symbol: str, amends: List[Dict]) -> List[Dict]:
+        return await self._batch('private_post_v5_order_amend_batch', symbol, amends)
+
+    async def cancel_batch_orders(self, symbol: str, order_ids: List[str]) -> List[Dict]:
+        return await self._batch('private_post_v5_order_cancel_batch', symbol, [{'order_id': i} for i in order_ids])
+
+    async def _batch(self, method: str, symbol: str, orders: List[Dict]) -> List[Dict]:
+        """Same contract as ``BybitClient._batch``; the chunks are sent concurrently."""
+        chunks = [orders[i:i + BATCH_ORDER_LIMIT] for i in range(0, len(orders), BATCH_ORDER_LIMIT)]
+        responses = await asyncio.gather(*(
+            self.fetch_with_retry(method, {'category': 'linear', 'request': [v5_order_fields(symbol, o) for o in chunk]},
+                                  max_retries=1)
+            for chunk in chunks))
+        results = []
+        for chunk, response in zip(chunks, responses):
+            results += batch_results(response, len(chunk))
+        return results
+
+    async def get_current_price(self, symbol: str) -> float:
+        ticker = await self.fetch_with_retry('fetch_ticker', symbol)
+        return float(ticker['last']) if ticker else 0.0
+
+    async def get_positions(self, symbol: str) -> List[Dict]:
+        cached = self.account.get_positions(symbol)
+        if cached is not None:
+            return cached
+        return await self._fetch_positions(symbol) or []
+
+    async def _fetch_positions(self, symbol: str) -> Optional[List[Dict]]:
+        """REST position rows, or None if the request failed."""
+        positions = await self.fetch_with_retry('fetch_positions', [symbol], params={'category': 'linear'})
+        if positions is None:
+            return None
+        return [{
+            'symbol': pos.get('symbol', symbol),
+            'contracts': str(pos.get('contracts', '0')),
+            'side': pos.get('side', 'None'),
+            'entryPrice': str(pos.get('entryPrice', '0')),
+            'leverage': str(pos.get('leverage', '0')),
+            'timestamp': pos.get('timestamp', _now_ms()),
+            'unrealisedPnl': str(pos.get('unrealisedPnl', '0')),
+        } for pos in positions if pos.get('contracts') is not None]
+
+    async def close_position(self, symbol: str) -> Optional[Dict]:
+        positions = await self.get_positions(symbol)
+        position = next((p for p in positions if float(p.get('contracts', 0)) > 0), None)
+        if not position:
+            logger.info("No active position to close for %s", symbol)
+            return None
+        reduce_side = 'sell' if position['side'].lower() == 'buy' else 'buy'
+        order = await self.place_order(symbol, float(position['contracts']), reduce_side, order_type="Market", reduce_only=True)
+        return order if order and 'id' in order else None
+
+    async def get_order_book(self, symbol: str) -> Dict[str, List[List[float]]]:
+        book = self.get_local_order_book(symbol)
+        if book is not None:
+            return book.to_dict(25)
+        order_book = await self.fetch_with_retry('fetch_order_book', symbol, limit=25, params={'category': 'linear'})
+        if order_book and 'bids' in order_book and 'asks' in order_book:
+            return {'b': order_book['bids'][:25], 'a': order_book['asks'][:25], 'timestamp': _now_ms()}
+        logger.warning("Failed to fetch order book for %s", symbol)
+        return {'b': [], 'a': [], 'timestamp': _now_ms()}
+
+    async def get_recent_trades(self, symbol: str, limit: int = 100) -> List[Dict]:
+        trades = await self.fetch_with_retry('fetch_trades', symbol, limit=limit, params={'category': 'linear'})
+        if trades:
+            self.trade_buffer.extend(trades)
+            return trades
+        return []
+
+    async def get_historical_data(self, symbol: str, interval: str = "1", limit: int = 50) -> np.ndarray:
+        """Newest *limit* candles, served from the candle store like BybitClient."""
+        if limit > self.candle_store_capacity or interval_to_ms(interval) is None:
+            ohlcv = await self._fetch_ohlcv_array(symbol, interval, limit=limit + 5)
+            if ohlcv is not None and len(ohlcv) >= limit:
+                return ohlcv[-limit:]
+            return np.zeros((limit, 6))
+
+        store = self._get_candle_store(symbol, interval)
+        now = _now_ms()
+        if len(store) < limit:
+            await self._backfill_candles(store, now)
+        elif store.needs_sync(now, live=self.ws_connected):
+            await self._sync_candles(store, now)
+        if len(store) >= limit:
+            return store.snapshot(limit)
+        logger.warning("Insufficient OHLCV data for %s. Returning zeros.", symbol)
+        return np.zeros((limit, 6))
+
+    async def _fetch_ohlcv_array(self, symbol: str, interval: str, limit: int,
+                                 since: Optional[int] = None) -> Optional[np.ndarray]:
+        kwargs = {'timeframe': interval, 'limit': limit, 'params': {'category': 'linear'}}
+        if since is not None:
+            kwargs['since'] = since
+        ohlcv = await self.fetch_with_retry('fetch_ohlcv', symbol, **kwargs)
+        if not ohlcv:
+            return None
+        return np.asarray(ohlcv, dtype=np.float64)[:, :6]
+
+    def _get_candle_store(self, symbol: str, interval: str) -> CandleStore:
+        key = (symbol, normalize_interval(interval))
+        store = self.candle_stores.get(key)
+        if store is None:
+            store = CandleStore(symbol, interval, capacity=self.candle_store_capacity)
+            self.candle_stores[key] = store
+        return store
+
+    async def _backfill_candles(self, store: CandleStore, now: int):
+        ohlcv = await self._fetch_ohlcv_array(store.symbol, store.interval, limit=store.capacity)
+        if ohlcv is not None:
+            store.replace(ohlcv, now)
+
+    async def _sync_candles(self, store: CandleStore, now: int):
+        missing = store.candles_since_sync(now)
+        if missing >= store.capacity:
+            await self._backfill_candles(store, now)
+            return
+        ohlcv = await self._fetch_ohlcv_array(store.symbol, store.interval, limit=missing + 1, since=store.synced_open)
+        if ohlcv is not None and not store.merge(ohlcv, now):
+            await self._backfill_candles(store, now)
+
+    # ── WebSocket state (plain methods, safe from any thread) ─────────────
+
+    def add_listener(self, listener: Callable[[str, str, object], None]):
+        """Register a market-event callback. It runs on the event loop and must not block."""
+        self.listeners.append(listener)
+
+    def get_local_order_book(self, symbol: str) -> Optional[LocalOrderBook]:
+        book = self.local_books.get(symbol)
+        if book is not None and book.synced and self.ws_connected:
+            return book
+        return None
+
+    def get_latest_trades(self) -> List[Dict]:
+        return list(self.trade_buffer)
+
+    # ── WebSocket ──────────────────────────────────────────────────────────
+
+    async def start_websocket(self):
+        if self.ws_task is None or self.ws_task.done():
+            self.ws_task = asyncio.get_running_loop().create_task(self._ws_loop())
+
+    async def stop_websocket(self):
+        task, self.ws_task = self.ws_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.ws_connected = False
+
+    def _topics(self) -> List[str]:
+        topics = []
+        for symbol in self.ws_symbols:
+            topics += [f"orderbook.{self.order_book_depth}.{symbol}", f"publicTrade.{symbol}"]
+        return topics
+
+    async def _ws_loop(self):
+        delay = self.ws_retry_delay
+        while True:
+            url = self.conn_manager.get_ws_endpoint()
+            try:
+                async with self.session.ws_connect(url, heartbeat=20, ssl=False) as ws:
+                    self.ws = ws
+                    topics = self._topics()
+                    for i in range(0, len(topics), 10):
+                        await ws.send_str(json.dumps({"op": "subscribe", "args": topics[i:i + 10]}))
+                    self.ws_connected = True
+                    delay = self.ws_retry_delay
+                    logger.info("Async WebSocket connected: %s", url)
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            self._on_message(msg.data)
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Async WebSocket error: %s", e)
+            finally:
+                self.ws = None
+                self.ws_connected = False
+                # Deltas missed while disconnected make every local book unusable
+                for book in self.local_books.values():
+                    book.reset()
+            logger.info("Async WebSocket reconnecting in %ds", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_ws_retry_delay)
+            self.conn_manager.switch_ws_endpoint()
+
+    def _on_message(self, message: str):
+        try:
+            data = json.loads(message)
+            if "success" in data:
+                return
+            topic = data.get("topic", "")
+            symbol = topic.rsplit(".", 1)[-1]
+            if topic.startswith("orderbook"):
+                book = self.local_books.get(symbol)
+                if book is None:
+                    book = LocalOrderBook(symbol, depth=self.order_book_depth, on_resync=self._resubscribe_order_book)
+                    self.local_books[symbol] = book
+                if book.apply_message(data):
+                    self._emit('book', symbol, data)
+            elif topic.startswith("publicTrade"):
+                trades = data.get("data", [])
+                if trades:
+                    self.trade_buffer.extend(trades)
+                    self._apply_trades_to_candles(symbol, trades)
+                    self._emit('trade', symbol, trades)
+        except Exception as e:
+            logger.error("Message processing failed: %s", e, exc_info=True)
+
+    def _apply_trades_to_candles(self, symbol: str, trades: List[Dict]):
+        stores = [s for (sym, _), s in self.candle_stores.items() if sym == symbol]
+        for trade in trades:
+            ts, price, size = int(trade['T']), float(trade['p']), float(trade['v'])
+            for store in stores:
+                if store.apply_trade(ts, price, size):
+                    self._emit('candle_close', symbol, store.interval)
+
+    def _emit(self, event: str, symbol: str, payload):
+        for listener in self.listeners:
+            try:
+                listener(event, symbol, payload)
+            except Exception as e:
+                logger.error("Market event listener failed for %s: %s", event, e)
+
+    def _resubscribe_order_book(self, symbol: str):
+        """LocalOrderBook resync callback — runs on the loop, so schedule the sends."""
+        if self.ws is None:
+            return
+        topic = f"orderbook.{self.order_book_depth}.{symbol}"
+
+        async def resubscribe(ws):
+            await ws.send_str(json.dumps({"op": "unsubscribe", "args": [topic]}))
+            await ws.send_str(json.dumps({"op": "subscribe", "args": [topic]}))
+        asyncio.get_running_loop().create_task(resubscribe(self.ws))
+
+    # ── Private stream ─────────────────────────────────────────────────────
+
+    async def start_private_stream(self):
+        if self.private_ws_task is None or self.private_ws_task.done():
+            self.private_ws_task = asyncio.get_running_loop().create_task(self._private_ws_loop())
+
+    async def stop_private_stream(self):
+        task, self.private_ws_task = self.private_ws_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.account.set_live(False)
+
+    async def _private_ws_loop(self):
+        delay = self.ws_retry_delay
+        url = PRIVATE_WS_URL[self.testnet]
+        while True:
+            try:
+                async with self.session.ws_connect(url, heartbeat=20) as ws:
+                    await ws.send_str(auth_message(self.api_key, self.api_secret))
+                    reply = json.loads((await ws.receive(timeout=10)).data)
+                    if not reply.get("success"):
+                        # Bad keys won't get better by retrying
+                        logger.error("Private WebSocket authentication failed: %s", reply.get("ret_msg"))
+                        return
+                    await ws.send_str(json.dumps({"op": "subscribe", "args": PRIVATE_TOPICS}))
+                    delay = self.ws_retry_delay
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            self._on_private_message(msg.data)
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Private WebSocket error: %s", e)
+            finally:
+                self.account.set_live(False)
+            logger.info("Private WebSocket reconnecting in %ds", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_ws_retry_delay)
+
+    def _on_private_message(self, message: str):
+        try:
+            data = json.loads(message)
+            if data.get("op") == "subscribe":
+                if data.get("success"):
+                    self.account.set_live(True)
+                    logger.info("Private WebSocket subscribed: %s", ", ".join(PRIVATE_TOPICS))
+                    # Streams only push changes — seed the current state once
+                    asyncio.get_running_loop().create_task(self._seed_account())
+                else:
+                    logger.error("Private subscription failed: %s", data.get("ret_msg"))
+                return
+            for event, symbol, payload in self.account.apply_message(data):
+                self._emit(event, symbol, payload)
+        except Exception as e:
+            logger.error("Private message processing failed: %s", e, exc_info=True)
+
+    async def _seed_account(self):
+        # Positions are not seeded — the cache serves them only once the stream pushed one
+        balance = await self._fetch_balance()
+        if balance is not None:
+            self.account.seed_balance('USDT', balance)
+
+    async def wait_for_fill(self, order_id: str, qty: Optional[float] = None,
+                            timeout: float = 2.0) -> Optional[Tuple[float, float]]:
+        """``AccountState.wait_for_fill`` without blocking the loop."""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.account.wait_for_fill, order_id, qty, timeout)
+
+
+class SyncBybitClient:
+    """
+    Blocking BybitClient-compatible facade over an AsyncBybitClient.
+
+    Calls from any number of threads are submitted to one private event
+    loop, where they run concurrently over the pooled session.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, testnet: bool = True,
+                 symbols: Sequence[str] = ("BTCUSDT",), timeout: Optional[float] = None):
+        """
+        Args:
+            api_key: Bybit API key.
+            api_secret: Bybit API secret.
+            testnet: Use testnet endpoints.
+            symbols: Symbols streamed over the WebSocket.
+            timeout: Seconds a blocking call waits (None = until the
+                coroutine's own retries finish).
+        """
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='bybit-async-loop', daemon=True)
+        self._thread.start()
+        self.async_client = AsyncBybitClient(api_key, api_secret, testnet=testnet, symbols=symbols)
+        self._call(self.async_client.open())
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(self.timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._loop.is_running():
+            self._call(self.async_client.close())
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    @property
+    def ws_connected(self) -> bool:
+        return self.async_client.ws_connected
+
+    @property
+    def account(self) -> AccountState:
+        return self.async_client.account
+
+    # ── BybitClient surface ────────────────────────────────────────────────
+
+    def start_websocket(self):
+        self._call(self.async_client.start_websocket())
+
+    def stop_websocket(self):
+        self._call(self.async_client.stop_websocket())
+
+    def start_private_stream(self):
+        self._call(self.async_client.start_private_stream())
+
+    def stop_private_stream(self):
+        self._call(self.async_client.stop_private_stream())
+
+    def add_listener(self, listener: Callable[[str, str, object], None]):
+        self.async_client.add_listener(listener)
+
+    def get_balance(self) -> float:
+        cached = self.async_client.account.balance('USDT')
+        if cached is not None:
+            return cached
+        return self._call(self.async_client.get_balance())
+
+    def place_order(self, symbol: str, qty: float, side: str, order_type: str = "Market",
+                    price: Optional[float] = None, reduce_only: bool = False,
+                    order_link_id: Optional[str] = None) -> Dict:
+        return self._call(self.async_client.place_order(symbol, qty, side, order_type, price, reduce_only,
+                                                        order_link_id))
+
+    def get_order_rows(self, symbol: str, order_link_id: Optional[str] = None) -> Optional[List[Dict]]:
+        return self._call(self.async_client.get_order_rows(symbol, order_link_id))
+
+    def cancel_order(self, symbol: str, order_id: str) -> Optional[Dict]:
+        return self._call(self.async_client.cancel_order(symbol, order_id))
+
+    def amend_order(self, symbol: str, order_id: str, qty: Optional[float] = None,
+                    price: Optional[float] = None) -> Optional[Dict]:
+        return self._call(self.async_client.amend_order(symbol, order_id, qty, price))
+
+    def place_batch_orders(self, symbol: str, orders: List[Dict]) -> List[Dict]:
+        return self._call(self.async_client.place_batch_orders(symbol, orders))
+
+    def amend_batch_orders(self, symbol: str, amends: List[Dict]) -> List[Dict]:
+        return self._call(self.async_client.amend_batch_orders(symbol, amends))
+
+    def cancel_batch_orders(self, symbol: str, order_ids: List[str]) -> List[Dict]:
+        return self._call(self.async_client.cancel_batch_orders(symbol, order_ids))
+
+    def get_current_price(self, symbol: str) -> float:
+        return self._call(self.async_client.get_current_price(symbol))
+
+    def get_historical_data(self, symbol: str, interval: str = "1", limit: int = 50) -> np.ndarray:
+        return self._call(self.async_client.get_historical_data(symbol, interval, limit))
+
+    def get_positions(self, symbol: str) -> List[Dict]:
+        cached = self.async_client.account.get_positions(symbol)
+        if cached is not None:
+            return cached
+        return self._call(self.async_client.get_positions(symbol))
+
+    def close_position(self, symbol: str) -> Optional[Dict]:
+        return self._call(self.async_client.close_position(symbol))
+
+    def get_order_book(self, symbol: str) -> Dict[str, List[List[float]]]:
+        book = self.async_client.get_local_order_book(symbol)
+        if book is not None:
+            return book.to_dict(25)
+        return self._call(self.async_client.get_order_book(symbol))
+
+    def get_recent_trades(self, symbol: str, limit: int = 100) -> List[Dict]:
+        return self._call(self.async_client.get_recent_trades(symbol, limit))
+
+    def get_local_order_book(self, symbol: str) -> Optional[LocalOrderBook]:
+        return self.async_client.get_local_order_book(symbol)
+
+    def get_latest_order_book(self, symbol: str = "BTCUSDT") -> Dict[str, List[List[float]]]:
+        return self.get_order_book(symbol)
+
+    def get_latest_trades(self) -> List[Dict]:
+        return self.async_client.get_latest_trades()
@@ -6,12 +6,22 @@ performance metrics: total return, Sharpe ratio, max drawdown, win rate.
 
 Usage:
     python backtest.py --symbol BTCUSDT --days 30
+    python backtest.py --file data/btc_1m.csv --fast
+    python backtest.py --file data/btc_1m.csv sweep --param ema_short=10:30:5 --param stop_atr=1.0,1.5,2.0
+    python backtest.py --file data/btc_1m.csv walkforward --train 20000 --test 5000 --param stop_atr=1.0:2.0:0.5
 """
 
 import argparse
+import csv
+import hashlib
+import itertools
+import json
 import logging
+import os
 import sys
+import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
@@ -27,7 +37,7 @@ logging.basicConfig(
 logger = logging.getLogger('backtest')
 
 # We import the hedge fund strategy — same engine as live trading
-from ai.self_learning import HedgeFundStrategy, TradeRecord, TradeSignal
+from ai.self_learning import HedgeFundStrategy, TradeRecord, TradeSignal, _prefix_atr
 
 # ── Metrics ────────────────────────────────────────────────────────────────
 
@@ -113,14 +123,29 @@ class BacktestEngine:
         risk_per_trade: float = 0.01,
         trade_size_btc: float = 0.001,
         max_position_btc: float = 0.1,
+        trail_activate_pct: float = 0.02,
+        trail_offset_pct: float = 0.005,
+        strategy_params: Optional[Dict] = None,
     ):
+        """
+        Args:
+            initial_balance: Starting balance in USDT.
+            risk_per_trade: Fraction of balance risked per trade.
+            trade_size_btc: Minimum position size.
+            max_position_btc: Maximum position size.
+            trail_activate_pct: Run-up from entry that activates the trailing stop.
+            trail_offset_pct: Trailing stop distance from the extreme, as a fraction of entry.
+            strategy_params: Keyword arguments for HedgeFundStrategy.
+        """
         self.initial_balance = initial_balance
         self.balance = initial_balance
         self.risk_per_trade = risk_per_trade
         self.trade_size = trade_size_btc
         self.max_position = max_position_btc
+        self.trail_activate_pct = trail_activate_pct
+        self.trail_offset_pct = trail_offset_pct
 
-        self.strategy = HedgeFundStrategy()
+        self.strategy = HedgeFundStrategy(**(strategy_params or {}))
         self.trades: List[Dict] = []
         self.equity_curve: List[float] = [initial_balance]
         self.returns: List[float] = []
@@ -155,13 +180,25 @@ class BacktestEngine:
         slippage = price * slippage_bps / 10000
         return price + slippage if is_buy else price - slippage
 
-    def run(self, ohlcv: np.ndarray, verbose: bool = True) -> Dict:
+    def run(self, ohlcv: np.ndarray, verbose: bool = True, fast: bool = False,
+            indicator_cache: Optional[Dict] = None, start: int = 0, end: Optional[int] = None) -> Dict:
         """
         Run backtest on historical data using the hedge fund strategy.
 
         Args:
             ohlcv: (N, 6) array [timestamp, open, high, low, close, volume].
             verbose: Print progress.
+            fast: Precompute every bar's signal with
+                ``HedgeFundStrategy.generate_signals`` (one vectorized pass)
+                instead of calling ``generate_signal`` on each prefix.
+                Position and stop handling still run bar by bar, so the
+                results are the same.
+            indicator_cache: Shared indicator cache for ``fast`` runs on the
+                same data (see ``HedgeFundStrategy.generate_signals``).
+            start: First bar to trade.
+            end: Bar after the last one to trade (default: all). Signals
+                still see the full history before each bar, so a window
+                of a longer series trades exactly as it would live.
 
         Returns:
             Dict of performance metrics.
@@ -175,21 +212,33 @@ class BacktestEngine:
         lows = ohlcv[:, 3]
         volumes = ohlcv[:, 5]
         self._closes = closes
-
-        logger.info("Running backtest on %d candles (%.1f hours)", len(closes), len(closes))
+        end = len(closes) if end is None else min(end, len(closes))
+
+        logger.info("Running backtest on %d candles (%.1f hours)", end - start, end - start)
+
+        signals = None
+        atr14 = None
+        if fast:
+            signals = self.strategy.generate_signals(ohlcv, cache=indicator_cache)
+            if self.strategy.atr_period == 14:
+                atr14 = signals.atr
+            else:
+                cache = indicator_cache if indicator_cache is not None else {}
+                if ('atr', 14) not in cache:
+                    cache[('atr', 14)] = _prefix_atr(highs, lows, closes, 14)
+                atr14 = cache[('atr', 14)]
+
+        def signal_at(i: int) -> TradeSignal:
+            if signals is not None:
+                return signals.signal_at(i)
+            return self.strategy.generate_signal(closes[:i + 1], highs[:i + 1], lows[:i + 1], volumes[:i + 1])
 
         warmup = 60  # need enough data for EMAs and ATR
 
-        for i in range(warmup, len(closes)):
+        for i in range(max(warmup, start), end):
             self._current_idx = i
             current_price = closes[i]
 
-            # Build lookback arrays
-            lookback_closes = closes[:i + 1]
-            lookback_highs = highs[:i + 1]
-            lookback_lows = lows[:i + 1]
-            lookback_vols = volumes[:i + 1] if len(volumes) > i else np.ones(i + 1)
-
             # Track highest/lowest since entry for trailing stop
             if self.position['size'] > 0:
                 if self.position['side'] == 'long':
@@ -212,11 +261,9 @@ class BacktestEngine:
             # ── Manage open position ──────────────────────────────────────
             if self.position['size'] > 0:
                 self._manage_position(current_price, lows[i], highs[i])
-                if self.position['size'] > 0:
+                if self.position['size'] > 0 and (signals is None or signals.action[i] != 'hold'):
                     # Check signal reversal (strong opposite signal)
-                    rev_signal = self.strategy.generate_signal(
-                        lookback_closes, lookback_highs, lookback_lows, lookback_vols
-                    )
+                    rev_signal = signal_at(i)
                     if self.position['side'] == 'long' and rev_signal.action == 'sell':
                         self._close_position(current_price, 'signal_reversal', rev_signal)
                     elif self.position['side'] == 'short' and rev_signal.action == 'buy':
@@ -224,15 +271,17 @@ class BacktestEngine:
                 continue
 
             # ── No position — check for entry ─────────────────────────────
-            signal = self.strategy.generate_signal(
-                lookback_closes, lookback_highs, lookback_lows, lookback_vols
-            )
+            if signals is not None and (signals.action[i] == 'hold' or signals.confidence[i] < 0.4):
+                continue
+            signal = signal_at(i)
 
             if signal.action in ('buy', 'sell') and signal.confidence >= 0.4:
                 action = signal.action.upper()
-                size = self._calculate_position_size(current_price, self.strategy._atr(
-                    lookback_highs, lookback_lows, lookback_closes, 14
-                )[-1])
+                if atr14 is not None:
+                    atr = atr14[i]
+                else:
+                    atr = self.strategy._atr(highs[:i + 1], lows[:i + 1], closes[:i + 1], 14)[-1]
+                size = self._calculate_position_size(current_price, atr)
 
                 if size <= 0:
                     continue
@@ -255,7 +304,7 @@ class BacktestEngine:
 
         # Close any remaining position
         if self.position['size'] > 0:
-            self._close_position(self._closes[-1], 'end_of_test')
+            self._close_position(self._closes[end - 1], 'end_of_test')
 
         # Compute and return metrics
         equity_arr = np.array(self.equity_curve)
@@ -298,8 +347,8 @@ class BacktestEngine:
             # Trailing stop: update stop if trailing activation threshold met
             elif self.position['highest_price'] > entry:
                 run_pct = (self.position['highest_price'] - entry) / entry
-                if run_pct > 0.02:  # 2% profit → activate trailing
-                    trail = self.position['highest_price'] - (entry * 0.005)
+                if run_pct > self.trail_activate_pct:  # e.g. 2% profit → activate trailing
+                    trail = self.position['highest_price'] - (entry * self.trail_offset_pct)
                     self.position['stop_price'] = max(self.position['stop_price'], trail)
                     if close_price <= self.position['stop_price']:
                         self._close_position(close_price, 'trailing_stop')
@@ -312,8 +361,8 @@ class BacktestEngine:
                 self._close_position(close_price, 'take_profit')
             elif self.position['lowest_price'] < entry:
                 run_pct = (entry - self.position['lowest_price']) / entry
-                if run_pct > 0.02:
-                    trail = self.position['lowest_price'] + (entry * 0.005)
+                if run_pct > self.trail_activate_pct:
+                    trail = self.position['lowest_price'] + (entry * self.trail_offset_pct)
                     self.position['stop_price'] = min(self.position['stop_price'], trail)
                     if close_price >= self.position['stop_price']:
                         self._close_position(close_price, 'trailing_stop')
@@ -382,6 +431,332 @@ class BacktestEngine:
         print("=" * 55)
 
 
+# ── Parameter Sweep ────────────────────────────────────────────────────────
+
+# Sweepable parameters, split by whether HedgeFundStrategy or BacktestEngine takes them
+STRATEGY_SWEEP_PARAMS = (
+    'ema_short', 'ema_long', 'atr_period', 'stop_atr', 'tp_atr', 'trend_threshold', 'min_rrr',
+)
+ENGINE_SWEEP_PARAMS = ('trail_activate_pct', 'trail_offset_pct', 'risk_per_trade')
+_INT_PARAMS = {'ema_short', 'ema_long', 'atr_period'}
+
+SWEEP_METRICS = (
+    'sharpe_ratio', 'total_return_pct', 'max_drawdown_pct', 'total_trades',
+    'win_rate', 'profit_factor', 'final_balance',
+)
+
+# Per-worker state, set up once by _sweep_init
+_sweep_data: Optional[np.ndarray] = None
+_sweep_cache: Dict = {}
+
+
+def parse_grid_values(name: str, spec: str) -> List:
+    """Parse ``'10,20,30'`` or an inclusive range ``'start:stop:step'``."""
+    cast = int if name in _INT_PARAMS else float
+    if ':' in spec:
+        start, stop, step = (float(x) for x in spec.split(':'))
+        return [cast(round(v, 10)) for v in np.arange(start, stop + step / 2, step)]
+    return [cast(v) for v in spec.split(',') if v.strip()]
+
+
+def build_grid(specs: List[str]) -> List[Dict]:
+    """
+    Expand ``NAME=VALUES`` specs into the list of parameter combinations.
+
+    Combinations with ``ema_short >= ema_long`` are dropped.
+    """
+    from ai.self_learning import DEFAULT_EMA_LONG, DEFAULT_EMA_SHORT
+
+    axes = {}
+    for spec in specs:
+        name, _, values = spec.partition('=')
+        name = name.strip()
+        if name not in STRATEGY_SWEEP_PARAMS + ENGINE_SWEEP_PARAMS:
+            raise ValueError(f"Unknown sweep parameter: {name}")
+        axes[name] = parse_grid_values(name, values)
+
+    grid = []
+    for combo in itertools.product(*axes.values()):
+        params = dict(zip(axes, combo))
+        if params.get('ema_short', DEFAULT_EMA_SHORT) >= params.get('ema_long', DEFAULT_EMA_LONG):
+            continue
+        grid.append(params)
+    return grid
+
+
+def _param_key(params: Dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+# Columns identifying the run a sweep row belongs to, besides its params
+_RUN_COLUMNS = ('data', 'balance', 'risk')
+
+
+def _data_digest(ohlcv: np.ndarray) -> str:
+    """Short content hash of the OHLCV array (identifies the data a sweep ran on)."""
+    return hashlib.sha1(np.ascontiguousarray(ohlcv, dtype=np.float64).tobytes()).hexdigest()[:16]
+
+
+def _resume_key(data: str, balance: float, risk: float, params_key: str) -> Tuple:
+    return str(data), float(balance), float(risk), params_key
+
+
+def _sweep_init(data_path: str):
+    """Worker initializer: map the shared OHLCV file instead of receiving a pickled copy."""
+    global _sweep_data, _sweep_cache
+    logging.getLogger().setLevel(logging.ERROR)  # per-trade logs from thousands of runs
+    _sweep_data = np.load(data_path, mmap_mode='r')
+    _sweep_cache = {}
+
+
+def _make_engine(params: Dict, balance: float, risk: float) -> BacktestEngine:
+    engine_kwargs = {'initial_balance': balance, 'risk_per_trade': risk}
+    engine_kwargs.update({k: v for k, v in params.items() if k in ENGINE_SWEEP_PARAMS})
+    strategy_params = {k: v for k, v in params.items() if k in STRATEGY_SWEEP_PARAMS}
+    return BacktestEngine(strategy_params=strategy_params, **engine_kwargs)
+
+
+def _sweep_task(params: Dict, balance: float, risk: float) -> Tuple[Dict, Dict]:
+    engine = _make_engine(params, balance, risk)
+    # The cache persists across tasks in this worker, so runs that share an
+    # EMA/ATR period reuse its indicator arrays
+    metrics = engine.run(_sweep_data, verbose=False, fast=True, indicator_cache=_sweep_cache)
+    return params, metrics
+
+
+def _load_sweep_results(path: Path) -> set:
+    """Resume keys (data, balance, risk, params) already in a results file."""
+    if not path.exists() or path.stat().st_size == 0:
+        return set()
+    try:
+        done = pd.read_csv(path, usecols=list(_RUN_COLUMNS) + ['params'], dtype={'data': str})
+    except (ValueError, pd.errors.EmptyDataError) as e:
+        logger.warning("Could not read existing sweep results %s: %s", path, e)
+        return set()
+    return {_resume_key(*row) for row in done[list(_RUN_COLUMNS) + ['params']].itertuples(index=False)}
+
+
+def _check_sweep_header(path: Path, columns: List[str]):
+    """Refuse to append to a results file written with different columns."""
+    if not path.exists() or path.stat().st_size == 0:
+        return
+    with open(path, newline='') as fh:
+        header = next(csv.reader(fh), [])
+    if header != columns:
+        raise ValueError(
+            f"{path} has columns {header}, this sweep writes {columns}. "
+            "Use a different --out (or delete the file) instead of mixing the two."
+        )
+
+
+def run_sweep(
+    ohlcv: np.ndarray,
+    grid: List[Dict],
+    out_path: Path,
+    workers: Optional[int] = None,
+    balance: float = 1000.0,
+    risk: float = 0.01,
+    rank_by: str = 'sharpe_ratio',
+) -> pd.DataFrame:
+    """
+    Backtest every parameter combination in *grid* on a process pool.
+
+    The OHLCV array is saved once to a ``.npy`` file that every worker
+    memory-maps, so it is not pickled per task. Each result is appended to
+    *out_path* as soon as it completes; rerunning with the same file skips
+    combinations already in it for the same data (content hash), balance
+    and risk. When all runs finish, the file is rewritten sorted by
+    *rank_by* (best first).
+
+    Returns:
+        The ranked results of this data/balance/risk run.
+
+    Raises:
+        ValueError: If *out_path* exists with a different header (other
+            parameter axes, or an older format), so rows cannot be appended.
+    """
+    data = _data_digest(ohlcv)
+    done = _load_sweep_results(out_path)
+    pending = [p for p in grid if _resume_key(data, balance, risk, _param_key(p)) not in done]
+    logger.info("Sweep: %d combinations, %d already done, %d to run",
+                len(grid), len(grid) - len(pending), len(pending))
+
+    param_names = sorted({name for params in grid for name in params})
+    columns = param_names + list(SWEEP_METRICS) + list(_RUN_COLUMNS) + ['params']
+
+    if pending:
+        _check_sweep_header(out_path, columns)
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, 'ohlcv.npy')
+            np.save(data_path, np.ascontiguousarray(ohlcv, dtype=np.float64))
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=_sweep_init, initargs=(data_path,)) as pool, \
+                    open(out_path, 'a', newline='') as fh:
+                writer = csv.DictWriter(fh, fieldnames=columns, extrasaction='ignore')
+                if fh.tell() == 0:
+                    writer.writeheader()
+
+                futures = [pool.submit(_sweep_task, params, balance, risk) for params in pending]
+                started = time.time()
+                last_report = started
+                failed = 0
+                for completed, future in enumerate(as_completed(futures), 1):
+                    try:
+                        params, metrics = future.result()
+                    except Exception as e:
+                        failed += 1
+                        logger.error("Sweep run failed: %s", e)
+                        continue
+                    row = dict(params)
+                    row.update({m: metrics.get(m, '') for m in SWEEP_METRICS})
+                    row.update(data=data, balance=balance, risk=risk, params=_param_key(params))
+                    writer.writerow(row)
+                    fh.flush()
+
+                    now = time.time()
+                    if now - last_report >= 5.0 or completed == len(futures):
+                        rate = completed / max(now - started, 1e-9)
+                        eta = (len(futures) - completed) / rate if rate > 0 else 0.0
+                        logger.info("Sweep progress: %d/%d (%.1f runs/s, ETA %.0fs)",
+                                    completed, len(futures), rate, eta)
+                        last_report = now
+                if failed:
+                    logger.warning("%d sweep runs failed", failed)
+
+    results = pd.read_csv(out_path, dtype={'data': str})
+    results = results.sort_values(rank_by, ascending=False, na_position='last').reset_index(drop=True)
+    results.to_csv(out_path, index=False)
+    logger.info("Ranked sweep results saved to %s", out_path)
+    this_run = (results['data'] == data) & (results['balance'] == balance) & (results['risk'] == risk)
+    return results[this_run].reset_index(drop=True)
+
+
+# ── Walk-Forward Optimization ──────────────────────────────────────────────
+
+
+def walk_forward_windows(n: int, train: int, test: int, step: Optional[int] = None) -> List[Tuple[int, int, int]]:
+    """
+    Rolling ``(is_start, is_end, oos_end)`` windows over *n* candles.
+
+    Each in-sample window of *train* candles is followed by an
+    out-of-sample window of up to *test* candles; windows advance by
+    *step* (default *test*, so the out-of-sample windows tile the history).
+
+    Raises:
+        ValueError: If *step* < *test* — overlapping out-of-sample windows
+            would count their shared bars twice in the stitched curve.
+    """
+    step = step or test
+    if step < test:
+        raise ValueError(f"step ({step}) must be >= test ({test}) so out-of-sample windows do not overlap")
+    windows = []
+    is_start = 0
+    while is_start + train < n:
+        is_end = is_start + train
+        windows.append((is_start, is_end, min(is_end + test, n)))
+        is_start += step
+    return windows
+
+
+def _walkforward_task(window: Tuple[int, int, int], grid: List[Dict], balance: float,
+                      risk: float, rank_by: str) -> Dict:
+    """Optimize on one in-sample window, then trade its out-of-sample window."""
+    is_start, is_end, oos_end = window
+    best_params, best_score = None, -np.inf
+    for params in grid:
+        engine = _make_engine(params, balance, risk)
+        metrics = engine.run(_sweep_data, verbose=False, fast=True, indicator_cache=_sweep_cache,
+                             start=is_start, end=is_end)
+        score = metrics.get(rank_by)
+        if score is not None and np.isfinite(score) and score > best_score:
+            best_params, best_score = params, score
+    if best_params is None:
+        best_params = grid[0]
+
+    engine = _make_engine(best_params, balance, risk)
+    oos_metrics = engine.run(_sweep_data, verbose=False, fast=True, indicator_cache=_sweep_cache,
+                             start=is_end, end=oos_end)
+    return {
+        'window': window,
+        'params': best_params,
+        'is_score': float(best_score),
+        'oos_metrics': oos_metrics,
+        'oos_equity': engine.equity_curve,
+        'oos_trades': engine.trades,
+    }
+
+
+def run_walk_forward(
+    ohlcv: np.ndarray,
+    grid: List[Dict],
+    train: int,
+    test: int,
+    step: Optional[int] = None,
+    workers: Optional[int] = None,
+    balance: float = 1000.0,
+    risk: float = 0.01,
+    rank_by: str = 'sharpe_ratio',
+) -> Tuple[pd.DataFrame, np.ndarray, Dict]:
+    """
+    Walk-forward optimization of HedgeFundStrategy parameters.
+
+    Every window picks the *grid* combination with the best in-sample
+    *rank_by* score and trades it on the following out-of-sample window.
+    Windows run in parallel on a process pool sharing one memory-mapped
+    copy of the data. Indicators are computed once per worker over the
+    full series and each window only trades its slice of bars.
+
+    Returns:
+        ``(windows, equity, metrics)`` — one row per window with the chosen
+        parameters and its out-of-sample results, the stitched
+        out-of-sample equity curve (each window compounds on the previous
+        one's final equity) and the metrics of that curve.
+    """
+    windows = walk_forward_windows(len(ohlcv), train, test, step)
+    if not windows:
+        logger.error("History of %d candles is too short for train=%d", len(ohlcv), train)
+        return pd.DataFrame(), np.array([balance]), {}
+    logger.info("Walk-forward: %d windows (train=%d, test=%d) x %d combinations",
+                len(windows), train, test, len(grid))
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'ohlcv.npy')
+        np.save(data_path, np.ascontiguousarray(ohlcv, dtype=np.float64))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_sweep_init, initargs=(data_path,)) as pool:
+            futures = [pool.submit(_walkforward_task, w, grid, balance, risk, rank_by) for w in windows]
+            started = time.time()
+            for completed, future in enumerate(as_completed(futures), 1):
+                results.append(future.result())
+                elapsed = time.time() - started
+                eta = elapsed / completed * (len(futures) - completed)
+                logger.info("Walk-forward progress: %d/%d windows (ETA %.0fs)", completed, len(futures), eta)
+    results.sort(key=lambda r: r['window'])
+
+    # Stitch the out-of-sample curves, compounding each on the last
+    equity = [balance]
+    trades = []
+    rows = []
+    for r in results:
+        segment = np.asarray(r['oos_equity'], dtype=np.float64)
+        equity.extend((segment[1:] / segment[0] * equity[-1]).tolist())
+        trades.extend(r['oos_trades'])
+        is_start, is_end, oos_end = r['window']
+        row = {'is_start': is_start, 'is_end': is_end, 'oos_end': oos_end}
+        row.update(r['params'])
+        row['is_' + rank_by] = r['is_score']
+        row.update({'oos_' + m: r['oos_metrics'].get(m, '') for m in SWEEP_METRICS})
+        rows.append(row)
+
+    equity_arr = np.asarray(equity)
+    returns = np.diff(equity_arr) / equity_arr[:-1]
+    metrics = compute_metrics(equity_arr, returns)
+    metrics.update(compute_trade_metrics(trades))
+    metrics['total_return_pct'] = round(metrics.get('total_return', 0) * 100, 2)
+    metrics['max_drawdown_pct'] = round(metrics.get('max_drawdown', 0) * 100, 2)
+    return pd.DataFrame(rows), equity_arr, metrics
+
+
 # ── Data Fetcher ───────────────────────────────────────────────────────────
 
 
@@ -429,17 +804,8 @@ def fetch_historical_data(symbol: str, days: int = 30) -> Optional[np.ndarray]:
 # ── Main ───────────────────────────────────────────────────────────────────
 
 
-def main():
-    parser = argparse.ArgumentParser(description='Backtest the AI Trading Agent')
-    parser.add_argument('--symbol', default='BTCUSDT', help='Trading pair')
-    parser.add_argument('--days', type=int, default=14, help='Days of data')
-    parser.add_argument('--balance', type=float, default=1000.0, help='Initial balance')
-    parser.add_argument('--risk', type=float, default=0.01, help='Risk per trade')
-    parser.add_argument('--file', type=str, help='Path to CSV data file (optional)')
-
-    args = parser.parse_args()
-
-    # Load data
+def load_ohlcv(args) -> np.ndarray:
+    """Load OHLCV from ``--file`` or fetch ``--days`` of data from Bybit."""
     if args.file:
         df = pd.read_csv(args.file)
         if 'close' in df.columns:
@@ -460,13 +826,99 @@ def main():
             logger.error("Insufficient historical data")
             sys.exit(1)
         logger.info("Fetched %d candles", len(ohlcv))
+    return ohlcv
+
+
+def main():
+    # Data and account options belong to the top-level parser only (given
+    # before the subcommand) — a subparser copy would reset them to defaults
+    parser = argparse.ArgumentParser(description='Backtest the AI Trading Agent')
+    parser.add_argument('--symbol', default='BTCUSDT', help='Trading pair')
+    parser.add_argument('--days', type=int, default=14, help='Days of data')
+    parser.add_argument('--balance', type=float, default=1000.0, help='Initial balance')
+    parser.add_argument('--risk', type=float, default=0.01, help='Risk per trade')
+    parser.add_argument('--file', type=str, help='Path to CSV data file (optional)')
+    parser.add_argument('--fast', action='store_true',
+                        help='Vectorized signal precomputation (same results, much faster)')
+    commands = parser.add_subparsers(dest='command')
+
+    sweep = commands.add_parser('sweep', help='Parallel parameter grid search')
+    sweep.add_argument('--param', action='append', required=True, metavar='NAME=VALUES',
+                       help="Grid axis, e.g. ema_short=10,20,30 or stop_atr=1.0:2.0:0.25 (repeatable). "
+                            f"Names: {', '.join(STRATEGY_SWEEP_PARAMS + ENGINE_SWEEP_PARAMS)}")
+    sweep.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    sweep.add_argument('--out', type=str,
+                       help='Results CSV (default: backtest_results/sweep_<symbol>.csv). '
+                            'An existing file is resumed.')
+    sweep.add_argument('--rank-by', default='sharpe_ratio', choices=SWEEP_METRICS, help='Ranking metric')
+
+    walk = commands.add_parser('walkforward', help='Walk-forward optimization')
+    walk.add_argument('--param', action='append', required=True, metavar='NAME=VALUES',
+                      help='Grid axis optimized on each in-sample window (same syntax as sweep)')
+    walk.add_argument('--train', type=int, required=True, help='In-sample window length (candles)')
+    walk.add_argument('--test', type=int, required=True, help='Out-of-sample window length (candles)')
+    walk.add_argument('--step', type=int, default=None, help='Window step, >= --test (default: --test)')
+    walk.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    walk.add_argument('--rank-by', default='sharpe_ratio', choices=SWEEP_METRICS,
+                      help='In-sample selection metric')
+
+    args = parser.parse_args()
+
+    if args.command == 'sweep':
+        try:
+            grid = build_grid(args.param)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.out:
+            out_path = Path(args.out)
+        else:
+            from config import BACKTEST_RESULTS_DIR
+            out_path = BACKTEST_RESULTS_DIR / f"sweep_{args.symbol}.csv"
+        ohlcv = load_ohlcv(args)
+        try:
+            results = run_sweep(ohlcv, grid, out_path, workers=args.workers,
+                                balance=args.balance, risk=args.risk, rank_by=args.rank_by)
+        except ValueError as e:
+            parser.error(str(e))
+        print(results.drop(columns=['params', *_RUN_COLUMNS]).head(10).to_string(index=False))
+        return results
+
+    if args.command == 'walkforward':
+        try:
+            grid = build_grid(args.param)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.step is not None and args.step < args.test:
+            parser.error(f"--step ({args.step}) must be >= --test ({args.test}); "
+                         "overlapping out-of-sample windows would double-count bars")
+        ohlcv = load_ohlcv(args)
+        windows, equity, metrics = run_walk_forward(
+            ohlcv, grid, args.train, args.test, step=args.step, workers=args.workers,
+            balance=args.balance, risk=args.risk, rank_by=args.rank_by,
+        )
+        print(windows.to_string(index=False))
+        print(f"\nOut-of-sample: return {metrics.get('total_return_pct', 0):+.2f}% | "
+              f"Sharpe {metrics.get('sharpe_ratio', 0):.3f} | "
+              f"max DD {metrics.get('max_drawdown_pct', 0):.2f}% | "
+              f"{metrics.get('total_trades', 0)} trades")
+
+        from config import BACKTEST_RESULTS_DIR
+        stamp = datetime.now().strftime('%Y%m%d_%H%M')
+        windows_file = BACKTEST_RESULTS_DIR / f"walkforward_{args.symbol}_{stamp}.csv"
+        windows.to_csv(windows_file, index=False)
+        equity_file = BACKTEST_RESULTS_DIR / f"walkforward_equity_{args.symbol}_{stamp}.csv"
+        pd.DataFrame({'equity': equity}).to_csv(equity_file, index=False)
+        logger.info("Walk-forward results saved to %s and %s", windows_file, equity_file)
+        return metrics
+
+    ohlcv = load_ohlcv(args)
 
     # Run backtest
     engine = BacktestEngine(
         initial_balance=args.balance,
         risk_per_trade=args.risk,
     )
-    metrics = engine.run(ohlcv, verbose=True)
+    metrics = engine.run(ohlcv, verbose=True, fast=args.fast)
 
     # Save results
     from config import BACKTEST_RESULTS_DIR
@@ -11,13 +11,17 @@ import json
 import websocket
 import threading
 import ssl
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from collections import deque
 import numpy as np
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 from requests.sessions import Session
-from concurrent.futures import ThreadPoolExecutor
+from data_pipeline.candle_store import CandleStore, interval_to_ms, normalize_interval
+from data_pipeline.local_order_book import LocalOrderBook
+from data_pipeline.rate_limiter import RateLimiter
+from data_pipeline.account_state import AccountState, PRIVATE_TOPICS, PRIVATE_WS_URL, auth_message
+from data_pipeline.batch_orders import BATCH_ORDER_LIMIT, batch_results, v5_order_fields
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -62,12 +66,26 @@ class AdvancedConnectionManager:
             self.active_ws = (self.active_ws + 1) % len(self.endpoints['ws'])
             logger.info(f"Switched WS endpoint to {self.endpoints['ws'][self.active_ws]}")
 
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for Bybit retCode 10006 / ccxt RateLimitExceeded."""
+    return isinstance(error, ccxt.RateLimitExceeded) or '10006' in str(error)
+
 class BybitClient:
-    def __init__(self, api_key: str, api_secret: str, testnet: bool = True):
+    def __init__(self, api_key: str, api_secret: str, testnet: bool = True, rate_limiter: Optional[RateLimiter] = None):
         logger.debug(f"Initializing BybitClient with api_key={api_key[:4]}..., testnet={testnet}")
         self.conn_manager = AdvancedConnectionManager(testnet)
         self.testnet = testnet
+        # Per-endpoint-group token buckets replace ccxt's single global delay
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.rate_limit_max_wait = 10.0  # seconds a call may queue before it is dropped
         self.client = self._init_ccxt_client(api_key, api_secret)
+        self._api_key = api_key
+        self._api_secret = api_secret
+        # Authenticated order/execution/position/wallet streams
+        self.account = AccountState()
+        self.private_ws = None
+        self.private_ws_thread = None
+        self._private_stop = threading.Event()
         self.ws = None
         self.ws_connected = False
         self.ws_thread = None
@@ -75,18 +93,29 @@ class BybitClient:
         self.trade_buffer = deque(maxlen=200)
         self.order_book = {'b': [], 'a': [], 'timestamp': 0}  # Adjusted keys to match self_learning.py
         self.last_update_time = 0
+        # Linear v5 streams publish depth 1/50/200/500 — 50 covers every 25-level consumer
+        self.order_book_depth = 50
+        self.ws_symbols = ["BTCUSDT"]
+        self.local_books: Dict[str, LocalOrderBook] = {}
+        self.candle_stores: Dict[Tuple[str, str], CandleStore] = {}
+        self.candle_store_capacity = 1000  # Bybit returns at most 1000 klines per request
+        self.candle_stores_lock = threading.Lock()  # analysis fan-out threads create stores concurrently
         self.lock = threading.Lock()
         self.ws_retries = 0
         self.max_ws_retries = 10
         self.ws_retry_delay = 5
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        # Called as listener(event, symbol, payload) from the WebSocket thread:
+        # ('book', sym, message), ('trade', sym, trades), ('candle_close', sym, interval)
+        # and, from the private stream, ('order', sym, order), ('execution', sym, fills),
+        # ('position', sym, position), ('wallet', '', balances)
+        self.listeners: List[Callable[[str, str, object], None]] = []
         logger.info("BybitClient initialized with domain-based resilience")
 
     def _init_ccxt_client(self, api_key: str, api_secret: str) -> ccxt.bybit:
         config = {
             'apiKey': api_key,
             'secret': api_secret,
-            'enableRateLimit': True,
+            'enableRateLimit': False,
             'test': self.testnet,
             'options': {'defaultType': 'linear', 'adjustForTimeDifference': True},
             'verbose': True
@@ -109,38 +138,57 @@ class BybitClient:
     def __exit__(self, exc_type, exc_value, traceback):
         self.stop_websocket()
         self.client.session.close()
-        self.executor.shutdown(wait=True)
         if exc_type:
             logger.error(f"Context exit with error: {exc_type}: {exc_value}", exc_info=True)
 
     def fetch_with_retry(self, method: str, *args, max_retries: int = 5, delay: int = 3, **kwargs) -> Optional[dict]:
         logger.debug(f"Fetching with retry: method={method}, args={args}, kwargs={kwargs}")
         for attempt in range(1, max_retries + 1):
+            if not self.rate_limiter.acquire(method, max_wait=self.rate_limit_max_wait):
+                logger.warning(f"Rate limiter would delay {method} beyond {self.rate_limit_max_wait}s. Skipping.")
+                return None
             try:
                 base_url = self.conn_manager.get_rest_endpoint()
                 self.client.urls['api']['public'] = base_url
                 self.client.urls['api']['private'] = base_url
                 response = getattr(self.client, method)(*args, **kwargs)
+                self.rate_limiter.update_from_headers(method, getattr(self.client, 'last_response_headers', None))
                 if isinstance(response, dict) and 'retCode' in response and response['retCode'] != 0:
-                    raise Exception(f"API error: {response['retMsg']}")
+                    raise Exception(f"API error {response['retCode']}: {response['retMsg']}")
                 logger.info(f"Fetch {method} succeeded")
                 return response
             except Exception as e:
-                logger.error(f"Attempt {attempt}/{max_retries} failed: {str(e)}", exc_info=True)
                 if attempt == max_retries:
+                    logger.error(f"Attempt {attempt}/{max_retries} failed: {str(e)}", exc_info=True)
                     return None
+                if is_rate_limit_error(e):
+                    # Another endpoint doesn't help — wait for the quota to reset
+                    wait_ms = self.rate_limiter.penalize(method, getattr(self.client, 'last_response_headers', None))
+                    time.sleep(wait_ms / 1000)
+                    continue
+                logger.error(f"Attempt {attempt}/{max_retries} failed: {str(e)}", exc_info=True)
                 self.conn_manager.switch_rest_endpoint()
                 time.sleep(delay * (2 ** (attempt - 1)))
         return None
 
     def get_balance(self) -> float:
+        cached = self.account.balance('USDT')
+        if cached is not None:
+            return cached
+        balance = self._fetch_balance()
+        return balance if balance is not None else 0.0
+
+    def _fetch_balance(self) -> Optional[float]:
         balance = self.fetch_with_retry('fetch_balance', {'type': 'future'})
-        return float(balance['total'].get('USDT', 0.0)) if balance else 0.0
+        return float(balance['total'].get('USDT', 0.0)) if balance else None
 
-    def place_order(self, symbol: str, qty: float, side: str, order_type: str = "Market", price: Optional[float] = None, reduce_only: bool = False) -> Dict:
+    def place_order(self, symbol: str, qty: float, side: str, order_type: str = "Market", price: Optional[float] = None, reduce_only: bool = False, order_link_id: Optional[str] = None) -> Dict:
         params = {'reduceOnly': reduce_only, 'category': 'linear'}
         if order_type.lower() == "limit" and price is not None:
             params['price'] = price
+        if order_link_id:
+            # Retries resend the same id, so Bybit rejects a duplicate instead of filling twice
+            params['orderLinkId'] = order_link_id
         logger.debug(f"Placing order: symbol={symbol}, qty={qty}, side={side}, order_type={order_type}, reduce_only={reduce_only}")
         order = self.fetch_with_retry('create_order', symbol, order_type.lower(), side.lower(), qty, params=params)
         if order and 'id' in order:
@@ -164,17 +212,130 @@ class BybitClient:
             'cancel_order', symbol, order_id, params={'category': 'linear'}
         )
 
+    def get_order_rows(self, symbol: str, order_link_id: Optional[str] = None) -> Optional[List[Dict]]:
+        """Open orders (or the order with *order_link_id*) as v5 rows, or None on failure."""
+        params = {'category': 'linear', 'symbol': symbol}
+        if order_link_id:
+            params['orderLinkId'] = order_link_id
+        response = self.fetch_with_retry('private_get_v5_order_realtime', params)
+        if response is None:
+            return None
+        return (response.get('result') or {}).get('list') or []
+
+    def amend_order(self, symbol: str, order_id: str, qty: Optional[float] = None,
+                    price: Optional[float] = None) -> Optional[Dict]:
+        """Change a resting order's quantity and/or price in place (/v5/order/amend).
+
+        Returns:
+            ``{'id': order_id}``, or None if the exchange rejected the amend
+            (e.g. the order already filled).
+        """
+        fields = v5_order_fields(symbol, {'order_id': order_id, 'qty': qty, 'price': price})
+        # Not retried: the caller re-derives its quotes on the next cycle anyway
+        response = self.fetch_with_retry('private_post_v5_order_amend', {'category': 'linear', **fields}, max_retries=1)
+        return {'id': order_id} if response else None
+
+    def place_batch_orders(self, symbol: str, orders: List[Dict]) -> List[Dict]:
+        """Create several orders with one request per ``BATCH_ORDER_LIMIT`` orders.
+
+        Args:
+            symbol: Trading pair.
+            orders: Dicts with ``side``, ``qty``, ``order_type`` and optionally
+                ``price``, ``reduce_only``, ``post_only``.
+
+        Returns:
+            One ``{'id', 'success', 'msg'}`` per order, in request order.
+        """
+        return self._batch('private_post_v5_order_create_batch', symbol, orders)
+
+    def amend_batch_orders(self, symbol: str, amends: List[Dict]) -> List[Dict]:
+        """Amend several orders (dicts with ``order_id`` and new ``qty`` and/or ``price``)."""
+        return self._batch('private_post_v5_order_amend_batch', symbol, amends)
+
+    def cancel_batch_orders(self, symbol: str, order_ids: List[str]) -> List[Dict]:
+        """Cancel several orders by ID."""
+        return self._batch('private_post_v5_order_cancel_batch', symbol, [{'order_id': i} for i in order_ids])
+
+    def _batch(self, method: str, symbol: str, orders: List[Dict]) -> List[Dict]:
+        results = []
+        for i in range(0, len(orders), BATCH_ORDER_LIMIT):
+            chunk = orders[i:i + BATCH_ORDER_LIMIT]
+            request = {'category': 'linear', 'request': [v5_order_fields(symbol, o) for o in chunk]}
+            # Not retried: a resent create-batch could duplicate the orders that did go through
+            response = self.fetch_with_retry(method, request, max_retries=1)
+            results += batch_results(response, len(chunk))
+        failed = [r['msg'] for r in results if not r['success']]
+        if failed:
+            logger.warning(f"{method}: {len(failed)}/{len(results)} failed ({failed[0]})")
+        return results
+
     def get_current_price(self, symbol: str) -> float:
         ticker = self.fetch_with_retry('fetch_ticker', symbol)
         return float(ticker['last']) if ticker else 0.0
 
     def get_historical_data(self, symbol: str, interval: str = "1", limit: int = 50) -> np.ndarray:
-        ohlcv = self.fetch_with_retry('fetch_ohlcv', symbol, timeframe=interval, limit=limit + 5, params={'category': 'linear'})
-        if ohlcv and len(ohlcv) >= limit:
-            return np.array([[float(item[0]), float(item[1]), float(item[2]), float(item[3]), float(item[4]), float(item[5])] for item in ohlcv[-limit:]])
+        """Return the newest *limit* candles as an (N, 6) array.
+
+        Served from the per-(symbol, interval) CandleStore: REST is only
+        queried for candles after the last synced one. The array is a copy,
+        so it does not change as the trade stream updates the store.
+        """
+        if limit > self.candle_store_capacity or interval_to_ms(interval) is None:
+            ohlcv = self._fetch_ohlcv_array(symbol, interval, limit=limit + 5)
+            if ohlcv is not None and len(ohlcv) >= limit:
+                return ohlcv[-limit:]
+            logger.warning(f"Insufficient OHLCV data for {symbol}. Returning zeros.")
+            return np.zeros((limit, 6))
+
+        store = self._get_candle_store(symbol, interval)
+        now = self.client.milliseconds()
+        if len(store) < limit:
+            self._backfill_candles(store, now)
+        elif store.needs_sync(now, live=self.ws_connected):
+            self._sync_candles(store, now)
+        if len(store) >= limit:
+            return store.snapshot(limit)
         logger.warning(f"Insufficient OHLCV data for {symbol}. Returning zeros.")
         return np.zeros((limit, 6))
 
+    def _fetch_ohlcv_array(self, symbol: str, interval: str, limit: int, since: Optional[int] = None) -> Optional[np.ndarray]:
+        kwargs = {'timeframe': interval, 'limit': limit, 'params': {'category': 'linear'}}
+        if since is not None:
+            kwargs['since'] = since
+        ohlcv = self.fetch_with_retry('fetch_ohlcv', symbol, **kwargs)
+        if not ohlcv:
+            return None
+        return np.asarray(ohlcv, dtype=np.float64)[:, :6]
+
+    def _get_candle_store(self, symbol: str, interval: str) -> CandleStore:
+        key = (symbol, normalize_interval(interval))
+        store = self.candle_stores.get(key)
+        if store is None:
+            with self.candle_stores_lock:
+                store = self.candle_stores.get(key)
+                if store is None:
+                    store = CandleStore(symbol, interval, capacity=self.candle_store_capacity)
+                    self.candle_stores[key] = store
+        return store
+
+    def _backfill_candles(self, store: CandleStore, now: int):
+        ohlcv = self._fetch_ohlcv_array(store.symbol, store.interval, limit=store.capacity)
+        if ohlcv is not None:
+            store.replace(ohlcv, now)
+
+    def _sync_candles(self, store: CandleStore, now: int):
+        """Fetch only the candles since the last synced open time."""
+        missing = store.candles_since_sync(now)
+        if missing >= store.capacity:
+            self._backfill_candles(store, now)
+            return
+        ohlcv = self._fetch_ohlcv_array(store.symbol, store.interval, limit=missing + 1, since=store.synced_open)
+        if ohlcv is None:
+            return
+        if not store.merge(ohlcv, now):
+            logger.info(f"Gap in {store.symbol} {store.interval} candles. Refetching history.")
+            self._backfill_candles(store, now)
+
     def close_position(self, symbol: str) -> Optional[Dict]:
         positions = self.get_positions(symbol)
         if not positions:
@@ -200,7 +361,16 @@ class BybitClient:
             return None
 
     def get_positions(self, symbol: str) -> List[Dict]:
+        cached = self.account.get_positions(symbol)
+        if cached is not None:
+            return cached
+        return self._fetch_positions(symbol) or []
+
+    def _fetch_positions(self, symbol: str) -> Optional[List[Dict]]:
+        """REST position rows, or None if the request failed."""
         positions = self.fetch_with_retry('fetch_positions', [symbol], params={'category': 'linear'})
+        if positions is None:
+            return None
         if positions:
             return [{
                 'symbol': pos.get('symbol', symbol),
@@ -214,7 +384,35 @@ class BybitClient:
         logger.debug(f"No positions found for {symbol}")
         return []
 
+    def get_local_order_book(self, symbol: str) -> Optional[LocalOrderBook]:
+        """Return the WebSocket-maintained book for *symbol* if it is in sync."""
+        book = self.local_books.get(symbol)
+        if book is not None and book.synced and self.ws_connected:
+            return book
+        return None
+
+    def _get_or_create_local_book(self, symbol: str) -> LocalOrderBook:
+        book = self.local_books.get(symbol)
+        if book is None:
+            book = LocalOrderBook(symbol, depth=self.order_book_depth, on_resync=self._resubscribe_order_book)
+            self.local_books[symbol] = book
+        return book
+
+    def _resubscribe_order_book(self, symbol: str):
+        """Resubscribe to a book topic so Bybit replays a fresh snapshot."""
+        topic = f"orderbook.{self.order_book_depth}.{symbol}"
+        try:
+            if self.ws and self.ws_connected:
+                self.ws.send(json.dumps({"op": "unsubscribe", "args": [topic]}))
+                self.ws.send(json.dumps({"op": "subscribe", "args": [topic]}))
+                logger.info(f"Resubscribed to {topic} for a fresh snapshot")
+        except Exception as e:
+            logger.error(f"Order book resubscribe failed for {symbol}: {str(e)}")
+
     def get_order_book(self, symbol: str) -> Dict[str, List[List[float]]]:
+        book = self.get_local_order_book(symbol)
+        if book is not None:
+            return book.to_dict(25)
         order_book = self.fetch_with_retry('fetch_order_book', symbol, limit=25, params={'category': 'linear'})
         if order_book and 'bids' in order_book and 'asks' in order_book:
             processed = {
@@ -239,6 +437,17 @@ class BybitClient:
         logger.warning(f"Failed to fetch trades for {symbol}")
         return []
 
+    def add_listener(self, listener: Callable[[str, str, object], None]):
+        """Register a market-event callback. It runs on the WebSocket thread and must not block."""
+        self.listeners.append(listener)
+
+    def _emit(self, event: str, symbol: str, payload):
+        for listener in self.listeners:
+            try:
+                listener(event, symbol, payload)
+            except Exception as e:
+                logger.error(f"Market event listener failed for {event}: {str(e)}")
+
     def on_message(self, ws, message):
         try:
             data = json.loads(message)
@@ -248,36 +457,52 @@ class BybitClient:
             topic = data.get("topic", "")
             timestamp = data.get("ts", self.client.milliseconds())
             if "orderbook" in topic:
-                order_data = data.get("data", {})
-                bids = order_data.get("b", [])[:25] or []
-                asks = order_data.get("a", [])[:25] or []
-                processed = {
-                    'b': bids + [[0, 0]] * (25 - len(bids)) if len(bids) < 25 else bids,  # Adjusted keys
-                    'a': asks + [[0, 0]] * (25 - len(asks)) if len(asks) < 25 else asks,
-                    'timestamp': timestamp
-                }
-                with self.lock:
-                    self.order_book_buffer.append(processed)
-                    self.order_book = processed
-                    self.last_update_time = timestamp
-            elif "trade" in topic:
+                symbol = topic.rsplit(".", 1)[-1]
+                book = self._get_or_create_local_book(symbol)
+                if book.apply_message(data):
+                    with self.lock:
+                        self.last_update_time = timestamp
+                    self._emit('book', symbol, data)
+            elif topic.startswith("publicTrade"):
+                symbol = topic.rsplit(".", 1)[-1]
                 trade_data = data.get("data", [])
                 if trade_data:
                     with self.lock:
                         self.trade_buffer.extend(trade_data)
+                    self._apply_trades_to_candles(symbol, trade_data)
+                    self._emit('trade', symbol, trade_data)
         except Exception as e:
             logger.error(f"Message processing failed: {str(e)}", exc_info=True)
 
+    def _apply_trades_to_candles(self, symbol: str, trades: List[Dict]):
+        with self.candle_stores_lock:
+            stores = [s for (sym, _), s in self.candle_stores.items() if sym == symbol]
+        if not stores:
+            return
+        for trade in trades:
+            ts, price, size = int(trade['T']), float(trade['p']), float(trade['v'])
+            for store in stores:
+                if store.apply_trade(ts, price, size):
+                    # The trade opened a new candle, so the previous one closed
+                    self._emit('candle_close', symbol, store.interval)
+
+    def _reset_local_books(self):
+        # Deltas missed while disconnected make every local book unusable
+        for book in self.local_books.values():
+            book.reset()
+
     def on_error(self, ws, error):
         logger.error(f"WebSocket error: {error}", exc_info=True)
         with self.lock:
             self.ws_connected = False
+        self._reset_local_books()
         self._retry_websocket()
 
     def on_close(self, ws, close_status_code, close_msg):
         logger.info(f"WebSocket closed: {close_status_code}, {close_msg}")
         with self.lock:
             self.ws_connected = False
+        self._reset_local_books()
         self._retry_websocket()
 
     def on_open(self, ws):
@@ -285,7 +510,10 @@ class BybitClient:
             self.ws_connected = True
             self.ws_retries = 0
         logger.info("WebSocket connection opened")
-        ws.send(json.dumps({"op": "subscribe", "args": ["orderbook.25.BTCUSDT", "trade.BTCUSDT"]}))
+        args = []
+        for symbol in self.ws_symbols:
+            args += [f"orderbook.{self.order_book_depth}.{symbol}", f"publicTrade.{symbol}"]
+        ws.send(json.dumps({"op": "subscribe", "args": args}))
 
     def _retry_websocket(self):
         with self.lock:
@@ -343,11 +571,81 @@ class BybitClient:
             self.ws_thread = None
             self.ws_retries = 0
 
-    def get_latest_order_book(self) -> Dict[str, List[List[float]]]:
-        with self.lock:
-            if self.last_update_time > self.client.milliseconds() - 1000 and self.order_book['b']:
-                return self.order_book
-        return self.get_order_book("BTCUSDT")
+    # ── Private stream ─────────────────────────────────────────────────────
+
+    def start_private_stream(self):
+        """Connect the authenticated stream that keeps ``self.account`` current."""
+        if self.private_ws_thread is not None and self.private_ws_thread.is_alive():
+            return
+        self._private_stop.clear()
+        self.private_ws_thread = threading.Thread(target=self._private_loop, name="bybit-private", daemon=True)
+        self.private_ws_thread.start()
+
+    def stop_private_stream(self):
+        self._private_stop.set()
+        if self.private_ws is not None:
+            self.private_ws.close()
+        if self.private_ws_thread is not None:
+            self.private_ws_thread.join(timeout=5)
+        self.private_ws_thread = None
+        self.account.set_live(False)
+
+    def _private_loop(self):
+        delay = self.ws_retry_delay
+        while not self._private_stop.is_set():
+            self.private_ws = websocket.WebSocketApp(
+                PRIVATE_WS_URL[self.testnet],
+                on_open=lambda ws: ws.send(auth_message(self._api_key, self._api_secret)),
+                on_message=self._on_private_message,
+                on_error=lambda ws, error: logger.error(f"Private WebSocket error: {error}"),
+                on_close=lambda ws, code, msg: self.account.set_live(False),
+            )
+            started = time.time()
+            self.private_ws.run_forever(ping_interval=20, ping_timeout=10)
+            self.account.set_live(False)
+            if self._private_stop.is_set():
+                break
+            delay = self.ws_retry_delay if time.time() - started > 60 else min(delay * 2, 60)
+            logger.warning(f"Private WebSocket disconnected, reconnecting in {delay}s")
+            self._private_stop.wait(delay)
+
+    def _on_private_message(self, ws, message):
+        try:
+            data = json.loads(message)
+            op = data.get("op")
+            if op == "auth":
+                if data.get("success"):
+                    ws.send(json.dumps({"op": "subscribe", "args": PRIVATE_TOPICS}))
+                else:
+                    # Bad keys won't get better by retrying
+                    logger.error(f"Private WebSocket authentication failed: {data.get('ret_msg')}")
+                    self._private_stop.set()
+                    ws.close()
+                return
+            if op == "subscribe":
+                if data.get("success"):
+                    self.account.set_live(True)
+                    logger.info("Private WebSocket subscribed: " + ", ".join(PRIVATE_TOPICS))
+                    # Streams only push changes — seed the current state once
+                    threading.Thread(target=self._seed_account, name="bybit-account-seed", daemon=True).start()
+                else:
+                    logger.error(f"Private subscription failed: {data.get('ret_msg')}")
+                return
+            for event, symbol, payload in self.account.apply_message(data):
+                self._emit(event, symbol, payload)
+        except Exception as e:
+            logger.error(f"Private message processing failed: {str(e)}", exc_info=True)
+
+    def _seed_account(self):
+        # Positions are not seeded — the cache serves them only once the stream pushed one
+        balance = self._fetch_balance()
+        if balance is not None:
+            self.account.seed_balance('USDT', balance)
+
+    def get_latest_order_book(self, symbol: str = "BTCUSDT") -> Dict[str, List[List[float]]]:
+        # get_order_book serves the local book while it is in sync and only
+        # hits REST when the stream is down or resyncing
+        return self.get_order_book(symbol)
 
     def get_latest_trades(self) -> List[Dict]:
         with self.lock:
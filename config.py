@@ -16,6 +16,7 @@ DATA_DIR = PROJECT_ROOT / "data"
 REPORTS_DIR = PROJECT_ROOT / "reports"
 SAVED_MODELS_DIR = PROJECT_ROOT / "saved_models"
 BACKTEST_RESULTS_DIR = PROJECT_ROOT / "backtest_results"
+MARKET_STORE_DIR = DATA_DIR / "store"     # chunked .npy market data store
 
 for d in [DATA_DIR, REPORTS_DIR, SAVED_MODELS_DIR, BACKTEST_RESULTS_DIR]:
     d.mkdir(parents=True, exist_ok=True)
@@ -24,6 +25,10 @@ for d in [DATA_DIR, REPORTS_DIR, SAVED_MODELS_DIR, BACKTEST_RESULTS_DIR]:
 BYBIT_API_KEY = os.getenv("BYBIT_API_KEY", "")
 BYBIT_API_SECRET = os.getenv("BYBIT_API_SECRET", "")
 USE_TESTNET = os.getenv("USE_TESTNET", "True").lower() == "true"
+# asyncio client (pooled aiohttp session) behind a blocking facade instead of BybitClient
+USE_ASYNC_CLIENT = os.getenv("USE_ASYNC_CLIENT", "False").lower() == "true"
+# Authenticated order/execution/position/wallet streams (falls back to REST polling when off or down)
+USE_PRIVATE_STREAM = os.getenv("USE_PRIVATE_STREAM", "True").lower() == "true"
 
 # ── Trading Parameters ─────────────────────────────────────────────────────
 SYMBOL = os.getenv("SYMBOL_BTC", "BTCUSDT")
@@ -53,21 +58,48 @@ SIGNAL_THRESHOLD = 0.3             # minimum combined signal to trade
 
 # ── Analysis Parameters ────────────────────────────────────────────────────
 OFI_LEVELS = 5                     # order-book levels for OFI calculation
-ICEBERG_CYCLES = 10                # poll cycles for iceberg detection
-ICEBERG_REFRESH_THRESHOLD = 3      # size changes to flag as iceberg
+OFI_WINDOWS = (1, 10, 60)          # seconds; rolling OFI windows kept from book updates
+OFI_WINDOW = 10                    # window used for the 'ofi' signal and strategy selection
+ICEBERG_REFRESH_THRESHOLD = 3      # refills of a traded level to flag it as iceberg
+ICEBERG_VOLUME_RATIO = 1.0         # traded volume / largest displayed size to flag a level
+ICEBERG_LEVEL_TTL = 300            # seconds an idle price level stays tracked
+ICEBERG_MAX_LEVELS = 500           # price levels tracked at most
 STOP_HUNT_THRESHOLD = 0.005        # 0.5% price move → possible stop hunt
-STOP_HUNT_LOOKBACK = 60            # seconds for stop-hunt window
+TRADE_FLOW_WINDOWS = (10, 60, 300)  # seconds; rolling trade-flow windows
+TRADE_FLOW_WINDOW = 60             # window for large-order and trade-volatility checks
+STOP_HUNT_BARS = 30                # 1m bars in which a stop hunt counts as recent
+ANALYSIS_WORKERS = 4               # threads running analysis components concurrently
+ANALYSIS_DEADLINES = {             # seconds per component before its last good value is used
+    'market': 3.0,
+    'order_book': 1.0,
+    'stop_hunt': 2.0,
+    'large_order': 1.0,
+}
 
 # ── Execution Parameters ───────────────────────────────────────────────────
-TRADE_LOOP_INTERVAL = 2            # seconds between trade cycles
+TRADE_LOOP_INTERVAL = 2            # seconds between REST fallback cycles (WebSocket down) and min gap between trades
+SIGNAL_INTERVAL = "60"             # candle interval whose close triggers the signal cycle
+SIGNAL_BARS = 100                  # candles the signal indicators are computed over
 REPORT_INTERVAL = 3600             # seconds between strategy reports
-POSITION_SYNC_INTERVAL = 60        # seconds between position re-syncs
+POSITION_SYNC_INTERVAL = 60        # seconds between position re-syncs (served from the private stream cache while it is up)
+FILL_WAIT_TIMEOUT = 2.0            # seconds to wait for an order's fills on the private stream
+MARKET_SNAPSHOT_TTL = 1.5          # seconds a per-cycle market snapshot entry stays valid
 HFT_SPREAD_THRESHOLD = 0.0002      # 0.02% minimum spread for HFT
 HFT_ORDER_SIZE = 0.001             # BTC per HFT leg
 MARKET_MAKER_SPREAD = 0.0005       # 0.05% spread for market making
 MARKET_MAKER_SIZE = 0.01           # BTC per market-making leg
+MARKET_MAKER_TICK_SIZE = 0.1       # BTCUSDT price increment
+MARKET_MAKER_REQUOTE_TICKS = 1     # quote moves smaller than this many ticks are not amended
 SCALPING_SPREAD = 0.0002           # 0.02% scalping target
 SCALPING_SIZE = 0.001              # BTC per scalp
+EXEC_ALGO = "twap"                 # parent-order algorithm for large entries: twap / vwap / iceberg
+EXEC_ALGO_MIN_SIZE = 0.01          # BTC; entries at least this large are sliced instead of sent at market
+EXEC_ALGO_DURATION = 60            # seconds a parent order is worked before the remainder goes at market
+EXEC_ALGO_INTERVAL = 5             # seconds between child orders
+EXEC_PARTICIPATION = 0.1           # vwap: share of market volume to take
+EXEC_MAX_SLIPPAGE_BPS = 5          # children only take depth within this distance of the mid
+EXEC_QTY_STEP = 0.001              # BTCUSDT order quantity increment; children are floored to it
+EXEC_MIN_QTY = 0.001               # BTCUSDT minimum order quantity; smaller children are not sent
 
 # ── Logging ────────────────────────────────────────────────────────────────
 LOG_FILE = PROJECT_ROOT / "trading_bot.log"
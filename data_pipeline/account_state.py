@@ -0,0 +1,234 @@
+"""
+Account State from Bybit Private Streams
+
+Local cache of the authenticated ``order``, ``execution``, ``position`` and
+``wallet`` topics. The client's private-stream thread (or event loop)
+feeds it with ``apply_message()``; ``TradingSystem`` and the client's
+``get_positions`` / ``get_balance`` read it directly instead of polling
+REST.
+
+* Orders are keyed by ``orderId`` and keep the latest pushed state.
+  Executions are collected per order and deduplicated by ``execId``, so
+  ``fill_summary()`` gives the real filled quantity and average price.
+* ``wait_for_fill()`` blocks the caller until an order is filled (or
+  reaches a final status) — fills usually arrive within milliseconds of
+  the REST order acknowledgement.
+* Positions are kept per symbol in the client's ``get_positions`` row
+  format (one-way mode). The streams only push changes, so a symbol's
+  cached position is served only after the stream pushed one for it —
+  until then readers fall back to REST. (A REST seed could be overtaken
+  by our own fills before the first push and report a stale flat
+  position.) The balance is seeded once from REST after each (re)connect;
+  a seed never overwrites data that already came from the stream.
+* ``live`` is True while the private stream is authenticated and
+  subscribed. Readers fall back to REST whenever it is False.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRIVATE_WS_URL = {
+    True: 'wss://stream-testnet.bybit.com/v5/private',
+    False: 'wss://stream.bybit.com/v5/private',
+}
+PRIVATE_TOPICS = ['order', 'execution', 'position', 'wallet']
+
+# Order statuses after which no further fills can arrive
+FINAL_ORDER_STATUSES = {'Filled', 'Cancelled', 'Rejected', 'PartiallyFilledCanceled', 'Deactivated'}
+
+_SIDE = {'Buy': 'long', 'Sell': 'short'}
+
+
+def auth_message(api_key: str, api_secret: str, ttl_ms: int = 10_000) -> str:
+    """Build the private-stream ``auth`` request (HMAC-SHA256 of ``GET/realtime<expires>``)."""
+    expires = int(time.time() * 1000) + ttl_ms
+    signature = hmac.new(api_secret.encode(), f"GET/realtime{expires}".encode(), hashlib.sha256).hexdigest()
+    return json.dumps({"op": "auth", "args": [api_key, expires, signature]})
+
+
+def _float(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class AccountState:
+    """
+    Thread-safe cache of orders, fills, positions and wallet balances.
+    """
+
+    def __init__(self, max_orders: int = 1000):
+        """
+        Args:
+            max_orders: Orders (and their fills) kept before the oldest are evicted.
+        """
+        self.max_orders = max_orders
+        self.orders: Dict[str, Dict] = {}
+        self.fills: Dict[str, Dict[str, Tuple[float, float]]] = {}   # orderId → execId → (qty, price)
+        self.positions: Dict[str, Dict] = {}
+        self.wallet: Dict[str, Dict[str, float]] = {}
+        self.live = False
+        self.last_update = 0.0
+        self._order_ids: deque = deque()
+        self._cond = threading.Condition()
+
+    # ── Stream input ───────────────────────────────────────────────────────
+
+    def apply_message(self, data: Dict) -> List[Tuple[str, str, object]]:
+        """Apply one private-stream message.
+
+        Returns:
+            ``(event, symbol, payload)`` tuples for the client to emit
+            (``'order'``, ``'execution'``, ``'position'``, ``'wallet'``).
+        """
+        topic = data.get('topic', '')
+        rows = data.get('data') or []
+        events: List[Tuple[str, str, object]] = []
+        with self._cond:
+            if topic == 'order':
+                for row in rows:
+                    self._track(row['orderId'])
+                    self.orders[row['orderId']] = row
+                    events.append(('order', row.get('symbol', ''), row))
+            elif topic == 'execution':
+                by_symbol: Dict[str, List[Dict]] = {}
+                for row in rows:
+                    if row.get('execType', 'Trade') != 'Trade':
+                        continue        # funding, ADL and settlement rows carry no order fill
+                    self._track(row['orderId'])
+                    self.fills.setdefault(row['orderId'], {})[row['execId']] = (
+                        _float(row.get('execQty')), _float(row.get('execPrice')))
+                    by_symbol.setdefault(row.get('symbol', ''), []).append(row)
+                events += [('execution', symbol, fills) for symbol, fills in by_symbol.items()]
+            elif topic == 'position':
+                for row in rows:
+                    position = self._position_row(row)
+                    self.positions[position['symbol']] = position
+                    events.append(('position', position['symbol'], position))
+            elif topic == 'wallet':
+                for account in rows:
+                    for coin in account.get('coin', []):
+                        self.wallet[coin['coin']] = {
+                            'equity': _float(coin.get('equity')),
+                            'wallet_balance': _float(coin.get('walletBalance')),
+                            'available': _float(coin.get('availableToWithdraw')),
+                            'unrealised_pnl': _float(coin.get('unrealisedPnl')),
+                        }
+                if rows:
+                    events.append(('wallet', '', dict(self.wallet)))
+            if events:
+                self.last_update = time.time()
+                self._cond.notify_all()
+        return events
+
+    def _track(self, order_id: str):
+        if order_id in self.orders or order_id in self.fills:
+            return
+        self._order_ids.append(order_id)
+        while len(self._order_ids) > self.max_orders:
+            old = self._order_ids.popleft()
+            self.orders.pop(old, None)
+            self.fills.pop(old, None)
+
+    @staticmethod
+    def _position_row(row: Dict) -> Dict:
+        """Stream position → the client's ``get_positions`` row format."""
+        return {
+            'symbol': row.get('symbol', ''),
+            'contracts': str(row.get('size', '0')),
+            'side': _SIDE.get(row.get('side'), 'None'),
+            'entryPrice': str(row.get('entryPrice') or row.get('avgPrice') or '0'),
+            'leverage': str(row.get('leverage', '0')),
+            'timestamp': int(_float(row.get('updatedTime'), time.time() * 1000)),
+            'unrealisedPnl': str(row.get('unrealisedPnl', '0')),
+        }
+
+    # ── REST seed ──────────────────────────────────────────────────────────
+
+    def seed_balance(self, coin: str, balance: float):
+        with self._cond:
+            if coin not in self.wallet:
+                self.wallet[coin] = {'equity': balance, 'wallet_balance': balance,
+                                     'available': balance, 'unrealised_pnl': 0.0}
+
+    def set_live(self, live: bool):
+        """Mark the stream (dis)connected. Disconnecting drops positions and
+        balances — changes missed while down can only be recovered by a reseed."""
+        with self._cond:
+            self.live = live
+            if not live:
+                self.positions.clear()
+                self.wallet.clear()
+            self._cond.notify_all()
+
+    # ── Readers ────────────────────────────────────────────────────────────
+
+    def get_positions(self, symbol: str) -> Optional[List[Dict]]:
+        """Cached position rows for *symbol*, or None until the stream has pushed its position."""
+        with self._cond:
+            if not self.live or symbol not in self.positions:
+                return None
+            position = self.positions[symbol]
+            return [dict(position)] if _float(position['contracts']) > 0 else []
+
+    def balance(self, coin: str = 'USDT') -> Optional[float]:
+        """Cached wallet balance of *coin*, or None if not available."""
+        with self._cond:
+            if not self.live or coin not in self.wallet:
+                return None
+            return self.wallet[coin]['wallet_balance']
+
+    def order(self, order_id: str) -> Optional[Dict]:
+        with self._cond:
+            return self.orders.get(order_id)
+
+    def fill_summary(self, order_id: str) -> Tuple[float, float]:
+        """(filled quantity, volume-weighted average price) of *order_id*."""
+        with self._cond:
+            return self._fill_summary(order_id)
+
+    def _fill_summary(self, order_id: str) -> Tuple[float, float]:
+        fills = self.fills.get(order_id)
+        if not fills:
+            return 0.0, 0.0
+        qty = sum(q for q, _ in fills.values())
+        notional = sum(q * p for q, p in fills.values())
+        return qty, (notional / qty if qty > 0 else 0.0)
+
+    def wait_for_fill(self, order_id: str, qty: Optional[float] = None,
+                      timeout: float = 2.0) -> Optional[Tuple[float, float]]:
+        """Block until *order_id* has filled *qty* or reached a final status.
+
+        Returns:
+            ``(filled_qty, avg_price)``, the partial fill at the deadline, or
+            None if nothing filled (or the stream is down).
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.live:
+                filled, _ = self._fill_summary(order_id)
+                order = self.orders.get(order_id, {})
+                if qty is not None and filled >= qty * (1 - 1e-9):
+                    break
+                # The order update can overtake its executions — wait for those too
+                if order.get('orderStatus') in FINAL_ORDER_STATUSES \
+                        and filled >= _float(order.get('cumExecQty')) * (1 - 1e-9):
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            filled, avg_price = self._fill_summary(order_id)
+            if filled <= 0:
+                order = self.orders.get(order_id, {})
+                filled, avg_price = _float(order.get('cumExecQty')), _float(order.get('avgPrice'))
+        return (filled, avg_price) if filled > 0 and avg_price > 0 else None
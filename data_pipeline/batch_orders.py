@@ -0,0 +1,62 @@
+"""
+Bybit v5 Batch Order Helpers
+
+Request building and response parsing shared by the sync and async
+clients and the order layer.
+
+* ``v5_order_fields()`` maps the clients' order dicts to v5 request fields.
+* ``batch_results()`` splits a batch response into per-order results in
+  request order; every order of a request that failed outright gets
+  ``REQUEST_FAILED`` (outcome unknown — it may or may not have reached
+  the exchange).
+"""
+
+from typing import Dict, List, Optional
+
+# Bybit v5 batch endpoints accept up to 20 linear orders per request
+BATCH_ORDER_LIMIT = 20
+
+# Batch-result ``msg`` when the request itself failed, so the outcome is unknown
+REQUEST_FAILED = 'request failed'
+
+
+def v5_order_fields(symbol: str, order: Dict) -> Dict:
+    """Order dict (side, qty, order_type, price, reduce_only, post_only, order_id,
+    order_link_id) → v5 request fields."""
+    fields = {'symbol': symbol}
+    if order.get('order_id'):
+        fields['orderId'] = order['order_id']
+    if order.get('order_link_id'):
+        fields['orderLinkId'] = order['order_link_id']
+    if order.get('side'):
+        fields['side'] = order['side'].capitalize()
+    if order.get('order_type'):
+        fields['orderType'] = order['order_type'].capitalize()
+    if order.get('qty') is not None:
+        fields['qty'] = str(order['qty'])
+    if order.get('price') is not None:
+        fields['price'] = str(order['price'])
+    if order.get('reduce_only'):
+        fields['reduceOnly'] = True
+    if order.get('post_only'):
+        fields['timeInForce'] = 'PostOnly'
+    return fields
+
+
+def batch_results(response: Optional[Dict], count: int) -> List[Dict]:
+    """Per-order ``{'id', 'success', 'msg'}`` of a v5 batch response, in request order.
+
+    ``msg`` is ``REQUEST_FAILED`` when the request itself failed (outcome unknown).
+    """
+    if not response:
+        return [{'id': None, 'success': False, 'msg': REQUEST_FAILED} for _ in range(count)]
+    rows = (response.get('result') or {}).get('list') or []
+    infos = (response.get('retExtInfo') or {}).get('list') or []
+    results = []
+    for i in range(count):
+        row = rows[i] if i < len(rows) else {}
+        info = infos[i] if i < len(infos) else {}
+        order_id = row.get('orderId') or None
+        results.append({'id': order_id, 'success': bool(order_id) and info.get('code', 0) == 0,
+                        'msg': info.get('msg', '')})
+    return results
@@ -0,0 +1,204 @@
+"""
+Incremental OHLCV Candle Store
+
+Keeps the most recent candles for one (symbol, interval) pair in a
+preallocated ring buffer so repeated ``get_historical_data`` calls do not
+re-download and rebuild the whole history.
+
+* REST is only hit for candles after the last synced open time — normally
+  once per interval, when the candle that was forming at the last sync
+  has closed.
+* Between syncs the forming candle is updated from the WebSocket trade
+  stream (``apply_trade``).
+* The buffer is mirrored (every row is written at ``i`` and
+  ``i + capacity``) so the newest *n* rows are always one contiguous
+  slice. ``snapshot()`` copies it out under the store lock in one block
+  copy; the trade stream keeps writing into the buffer, so callers never
+  get the live rows.
+"""
+
+import logging
+import threading
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ccxt-style aliases → Bybit interval codes, so '1m' and '1' share one store
+_INTERVAL_ALIASES = {
+    '1m': '1', '3m': '3', '5m': '5', '15m': '15', '30m': '30',
+    '1h': '60', '2h': '120', '4h': '240', '6h': '360', '12h': '720',
+    '1d': 'D', '1w': 'W', '1M': 'M',
+}
+
+
+def normalize_interval(interval: str) -> str:
+    """Map ccxt timeframe strings ('1m', '1h') to Bybit codes ('1', '60')."""
+    return _INTERVAL_ALIASES.get(interval, interval)
+
+
+def interval_to_ms(interval: str) -> Optional[int]:
+    """Candle length in milliseconds, or None for calendar intervals.
+
+    Weekly and monthly candles are not aligned to the Unix epoch, so they
+    cannot be rolled forward from trades and are always fetched from REST.
+    """
+    code = normalize_interval(interval)
+    if code.isdigit():
+        return int(code) * 60_000
+    if code == 'D':
+        return 86_400_000
+    return None
+
+
+class CandleStore:
+    """
+    Ring buffer of ``[timestamp, open, high, low, close, volume]`` rows.
+    """
+
+    def __init__(self, symbol: str, interval: str, capacity: int = 1000, max_staleness_ms: int = 2000):
+        """
+        Args:
+            symbol: Trading pair.
+            interval: Bybit interval code or ccxt timeframe.
+            capacity: Number of candles kept.
+            max_staleness_ms: Without a live trade stream, how long the
+                forming candle may go without a REST refresh.
+        """
+        self.symbol = symbol
+        self.interval = normalize_interval(interval)
+        self.interval_ms = interval_to_ms(interval)
+        self.capacity = capacity
+        self.max_staleness_ms = max_staleness_ms
+        self._buf = np.zeros((2 * capacity, 6), dtype=np.float64)
+        self._head = 0          # next write slot, in [0, capacity)
+        self._count = 0
+        self.last_sync_ms = 0   # exchange-clock time of the last REST sync
+        self.synced_open = 0   # open time of the candle forming at the last sync
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ── Reads ─────────────────────────────────────────────────────────────
+
+    def snapshot(self, limit: int) -> np.ndarray:
+        """Copy of the newest *limit* candles (oldest first)."""
+        with self.lock:
+            return self._view(limit).copy()
+
+    def _view(self, limit: int) -> np.ndarray:
+        # Zero-copy slice of the live buffer; the caller must hold self.lock
+        n = min(limit, self._count)
+        end = self._head + self.capacity
+        return self._buf[end - n:end]
+
+    def last_timestamp(self) -> Optional[int]:
+        if self._count == 0:
+            return None
+        return int(self._buf[self._head - 1 + self.capacity, 0])
+
+    def needs_sync(self, now_ms: int, live: bool) -> bool:
+        """Whether the store must be refreshed from REST before serving.
+
+        Args:
+            now_ms: Current exchange time in ms.
+            live: True while the trade stream is updating the forming candle.
+        """
+        if self._count == 0 or self.interval_ms is None:
+            return True
+        # The candle that was forming at the last sync has closed — fetch its final values
+        if now_ms >= self.synced_open + self.interval_ms:
+            return True
+        return not live and now_ms - self.last_sync_ms >= self.max_staleness_ms
+
+    def candles_since_sync(self, now_ms: int) -> int:
+        """Number of candle opens from the last synced one up to *now_ms*."""
+        if self._count == 0 or self.interval_ms is None:
+            return self.capacity
+        return int((now_ms - self.synced_open) // self.interval_ms) + 1
+
+    # ── Writes ────────────────────────────────────────────────────────────
+
+    def _write(self, rows: np.ndarray):
+        rows = rows[-self.capacity:]
+        slots = (self._head + np.arange(len(rows))) % self.capacity
+        self._buf[slots] = rows
+        self._buf[slots + self.capacity] = rows
+        self._head = (self._head + len(rows)) % self.capacity
+        self._count = min(self._count + len(rows), self.capacity)
+
+    def _mark_synced(self, now_ms: int):
+        self.last_sync_ms = now_ms
+        self.synced_open = int(self._buf[self._head - 1 + self.capacity, 0])
+
+    def replace(self, rows: np.ndarray, now_ms: int):
+        """Reset the store with a full history fetched from REST."""
+        with self.lock:
+            self._head = 0
+            self._count = 0
+            if len(rows):
+                self._write(rows)
+                self._mark_synced(now_ms)
+
+    def merge(self, rows: np.ndarray, now_ms: int) -> bool:
+        """Merge candles fetched since the last synced open time.
+
+        Rows overlapping stored candles overwrite them (the formerly forming
+        candle gets its final values); newer rows are appended.
+
+        Returns:
+            False if *rows* do not connect to the stored history (a gap),
+            in which case the caller should do a full refetch.
+        """
+        if len(rows) == 0:
+            return True
+        with self.lock:
+            if self._count == 0:
+                return False
+            end = self._head + self.capacity
+            stored_ts = self._buf[end - self._count:end, 0]
+            first = rows[0, 0]
+            if first > stored_ts[-1] + self.interval_ms:
+                return False
+            overlap = rows[:, 0] <= stored_ts[-1]
+            idx = np.searchsorted(stored_ts, rows[overlap, 0])
+            if np.any(idx >= len(stored_ts)) or np.any(stored_ts[np.minimum(idx, len(stored_ts) - 1)] != rows[overlap, 0]):
+                return False
+            slots = (end - self._count + idx) % self.capacity
+            self._buf[slots] = rows[overlap]
+            self._buf[slots + self.capacity] = rows[overlap]
+            if np.any(~overlap):
+                self._write(rows[~overlap])
+            self._mark_synced(now_ms)
+        return True
+
+    def apply_trade(self, ts: int, price: float, size: float) -> bool:
+        """Fold a streamed trade into the forming candle.
+
+        Trades older than the last REST sync are already included in the
+        synced candle and are skipped.
+
+        Returns:
+            True if the trade opened a new candle (the previous one closed).
+        """
+        if self.interval_ms is None or ts < self.last_sync_ms:
+            return False
+        with self.lock:
+            if self._count == 0:
+                return False
+            last = self._head - 1 + self.capacity
+            row = self._buf[last]
+            if ts < row[0]:
+                return False
+            if ts < row[0] + self.interval_ms:
+                row[2] = max(row[2], price)
+                row[3] = min(row[3], price)
+                row[4] = price
+                row[5] += size
+                self._buf[last - self.capacity] = row
+                return False
+            open_ts = ts - ts % self.interval_ms
+            self._write(np.array([[open_ts, price, price, price, price, size]]))
+        return True
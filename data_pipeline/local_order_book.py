@@ -0,0 +1,209 @@
+"""
+Local L2 Order Book
+
+Maintains an exchange-consistent copy of a Bybit v5 order book from the
+WebSocket ``orderbook.{depth}.{symbol}`` stream.
+
+Bybit publishes one ``snapshot`` message after subscribing, followed by
+``delta`` messages that only carry the levels that changed (size ``"0"``
+means the level was removed). Every message carries an update id ``u``
+that increases by one per update, and a cross-sequence ``seq``. A missing
+``u`` means we lost a delta — the book is marked out of sync and the owner
+is asked to resubscribe, which makes the exchange send a fresh snapshot.
+
+Price levels are stored as sorted ``(n, 2)`` float64 NumPy arrays
+(bids descending, asks ascending). Updates build new arrays and swap them
+in, so readers can grab a reference without holding the lock.
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_EMPTY = np.empty((0, 2), dtype=np.float64)
+
+
+def _to_levels(raw: List[List[str]]) -> np.ndarray:
+    """Convert Bybit ``[["price", "size"], ...]`` rows to a float array."""
+    if not raw:
+        return _EMPTY
+    return np.asarray(raw, dtype=np.float64).reshape(-1, 2)
+
+
+def _merge_side(book: np.ndarray, delta: np.ndarray, descending: bool, depth: int) -> np.ndarray:
+    """Apply a side delta to a sorted level array.
+
+    Levels present in *delta* replace the existing ones at the same price;
+    a zero size removes the level. The result is re-sorted and truncated
+    to *depth* levels.
+    """
+    if len(delta) == 0:
+        return book
+    merged = np.concatenate([book, delta])
+    key = -merged[:, 0] if descending else merged[:, 0]
+    # Stable sort keeps equal prices in arrival order (book row, then delta
+    # rows), so the last row of each equal-price run is the newest value
+    order = np.argsort(key, kind='stable')
+    merged = merged[order]
+    key = key[order]
+    newest = np.empty(len(key), dtype=bool)
+    newest[-1] = True
+    np.not_equal(key[1:], key[:-1], out=newest[:-1])
+    merged = merged[newest]
+    return merged[merged[:, 1] > 0][:depth]
+
+
+class LocalOrderBook:
+    """
+    Array-backed L2 book for a single symbol, fed by snapshot + delta messages.
+
+    The book is only trusted while ``synced`` is True. On a sequence gap
+    the book is cleared and *on_resync* is called (the client resubscribes
+    to the topic so the exchange replays a snapshot).
+    """
+
+    def __init__(self, symbol: str, depth: int = 50, on_resync: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            symbol: Trading pair (e.g. 'BTCUSDT').
+            depth: Number of levels kept per side.
+            on_resync: Called with the symbol when a gap forces a resync.
+        """
+        self.symbol = symbol
+        self.depth = depth
+        self.on_resync = on_resync
+        self.bids: np.ndarray = _EMPTY
+        self.asks: np.ndarray = _EMPTY
+        self.update_id = 0
+        self.seq = 0
+        self.timestamp = 0
+        self.synced = False
+        self.resync_count = 0
+        self.lock = threading.Lock()
+
+    # ── Message handling ──────────────────────────────────────────────────
+
+    def apply_message(self, message: Dict) -> bool:
+        """Apply a parsed ``orderbook`` WebSocket message.
+
+        Args:
+            message: Full message dict (``type``, ``ts`` and ``data`` keys).
+
+        Returns:
+            True if the book changed and is in sync.
+        """
+        data = message.get('data') or {}
+        msg_type = message.get('type', 'snapshot')
+        ts = int(message.get('cts') or message.get('ts') or 0)
+        update_id = int(data.get('u', 0))
+        seq = int(data.get('seq', 0))
+        bids = _to_levels(data.get('b'))
+        asks = _to_levels(data.get('a'))
+
+        # u == 1 is a snapshot re-sent after a service restart
+        if msg_type == 'snapshot' or update_id == 1:
+            self.apply_snapshot(bids, asks, update_id, seq, ts)
+            return True
+        return self.apply_delta(bids, asks, update_id, seq, ts)
+
+    def apply_snapshot(self, bids: np.ndarray, asks: np.ndarray, update_id: int = 0,
+                       seq: int = 0, timestamp: int = 0):
+        """Replace the whole book."""
+        bids = bids[np.argsort(-bids[:, 0], kind='stable')][:self.depth] if len(bids) else _EMPTY
+        asks = asks[np.argsort(asks[:, 0], kind='stable')][:self.depth] if len(asks) else _EMPTY
+        with self.lock:
+            self.bids = bids[bids[:, 1] > 0]
+            self.asks = asks[asks[:, 1] > 0]
+            self.update_id = update_id
+            self.seq = seq
+            self.timestamp = timestamp
+            self.synced = True
+        logger.debug("%s book snapshot u=%d (%d bids, %d asks)", self.symbol, update_id, len(bids), len(asks))
+
+    def apply_delta(self, bids: np.ndarray, asks: np.ndarray, update_id: int,
+                    seq: int = 0, timestamp: int = 0) -> bool:
+        """Apply an incremental update, checking ``u`` continuity.
+
+        Returns:
+            True if applied, False if ignored (stale or out of sync).
+        """
+        with self.lock:
+            if not self.synced:
+                return False
+            if update_id <= self.update_id:
+                # Duplicate or stale delta — already reflected in the book
+                return False
+            if update_id != self.update_id + 1 or (seq and self.seq and seq < self.seq):
+                gap = (self.update_id, update_id)
+                self._invalidate()
+            else:
+                gap = None
+                self.bids = _merge_side(self.bids, bids, True, self.depth)
+                self.asks = _merge_side(self.asks, asks, False, self.depth)
+                self.update_id = update_id
+                self.seq = seq or self.seq
+                self.timestamp = timestamp
+        if gap:
+            logger.warning("%s book gap: expected u=%d, got u=%d. Resyncing.", self.symbol, gap[0] + 1, gap[1])
+            self.resync_count += 1
+            if self.on_resync:
+                self.on_resync(self.symbol)
+            return False
+        return True
+
+    def _invalidate(self):
+        self.bids = _EMPTY
+        self.asks = _EMPTY
+        self.synced = False
+
+    def reset(self):
+        """Drop the book (e.g. on disconnect) until the next snapshot."""
+        with self.lock:
+            self._invalidate()
+            self.update_id = 0
+            self.seq = 0
+
+    # ── Read accessors ────────────────────────────────────────────────────
+
+    def best_bid(self) -> Optional[float]:
+        bids = self.bids
+        return float(bids[0, 0]) if len(bids) else None
+
+    def best_ask(self) -> Optional[float]:
+        asks = self.asks
+        return float(asks[0, 0]) if len(asks) else None
+
+    def best_bid_ask(self) -> Tuple[Optional[float], Optional[float]]:
+        return self.best_bid(), self.best_ask()
+
+    def mid_price(self) -> Optional[float]:
+        bid, ask = self.best_bid_ask()
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    def spread(self) -> Optional[float]:
+        bid, ask = self.best_bid_ask()
+        if bid is None or ask is None:
+            return None
+        return ask - bid
+
+    def top(self, levels: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(bids, asks)`` views of the top *levels* rows."""
+        with self.lock:
+            return self.bids[:levels], self.asks[:levels]
+
+    def depth_sum(self, levels: int) -> Tuple[float, float]:
+        """Total bid and ask size over the top *levels* levels."""
+        bids, asks = self.top(levels)
+        return float(bids[:, 1].sum()), float(asks[:, 1].sum())
+
+    def to_dict(self, levels: int = 25) -> Dict:
+        """Legacy dict format used across the code base (``b``/``a`` lists)."""
+        with self.lock:
+            bids, asks, ts = self.bids[:levels], self.asks[:levels], self.timestamp
+        return {'b': bids.tolist(), 'a': asks.tolist(), 'timestamp': ts}
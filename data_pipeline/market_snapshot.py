@@ -0,0 +1,137 @@
+"""
+Per-Cycle Market Snapshot
+
+A read-through cache over BybitClient's market-data methods that is built
+once per trade cycle and handed to every analysis component.
+
+Each distinct request (order book, trades, ticker, OHLCV per interval) is
+fetched at most once per TTL. Concurrent callers asking for the same data
+wait on the single in-flight request instead of issuing their own
+(single-flight coalescing), so every component sees the same view of the
+market and a cycle costs one REST call per data type instead of one per
+consumer.
+
+The snapshot exposes the same read methods as BybitClient, so components
+can use ``(snapshot or self.client).get_order_book(symbol)`` unchanged.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from data_pipeline.candle_store import normalize_interval
+
+logger = logging.getLogger(__name__)
+
+
+class MarketSnapshot:
+    """
+    Coalescing, TTL-bounded view of market data for one trade cycle.
+    """
+
+    def __init__(
+        self,
+        client,
+        ttl: float = 1.5,
+        trade_limit: int = 100,
+        ohlcv_limits: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Args:
+            client: BybitClient instance.
+            ttl: Seconds a fetched value stays valid.
+            trade_limit: Minimum number of trades fetched, so consumers
+                asking for fewer share one request.
+            ohlcv_limits: Minimum candle count fetched per interval
+                (e.g. ``{'60': 100}``), for the same reason.
+        """
+        self.client = client
+        self.ttl = ttl
+        self.trade_limit = trade_limit
+        self.ohlcv_limits = {normalize_interval(k): v for k, v in (ohlcv_limits or {}).items()}
+        self.created_at = time.time()
+        self.fetch_count = 0
+        self.hit_count = 0
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    # ── Single-flight cache ────────────────────────────────────────────────
+
+    def _get(self, key: Hashable, fetch: Callable[[], Any], fresh: Optional[Callable[[Any], bool]] = None,
+             valid: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Return a cached value for *key* or fetch it exactly once.
+
+        Args:
+            key: Cache key.
+            fetch: Zero-argument callable performing the request.
+            fresh: Optional predicate; a cached value failing it is refetched
+                (used when a caller needs more rows than were fetched).
+            valid: Optional predicate; a fetched value failing it (a failed
+                request) is returned but not cached, so the next caller
+                retries instead of reading it for the whole TTL.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and time.time() - entry[0] < self.ttl and (fresh is None or fresh(entry[1])):
+                    self.hit_count += 1
+                    return entry[1]
+                event = self._inflight.get(key)
+                owner = event is None
+                if owner:
+                    event = threading.Event()
+                    self._inflight[key] = event
+            if not owner:
+                event.wait()
+                continue
+            try:
+                value = fetch()
+                with self._lock:
+                    if valid is None or valid(value):
+                        self._entries[key] = (time.time(), value)
+                    self.fetch_count += 1
+                return value
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+
+    # ── BybitClient-compatible reads ───────────────────────────────────────
+
+    def get_order_book(self, symbol: str) -> Dict[str, List[List[float]]]:
+        return self._get(('book', symbol), lambda: self.client.get_order_book(symbol))
+
+    def get_recent_trades(self, symbol: str, limit: int = 100) -> List[Dict]:
+        fetch_limit = max(limit, self.trade_limit)
+        trades = self._get(
+            ('trades', symbol),
+            lambda: (fetch_limit, self.client.get_recent_trades(symbol, limit=fetch_limit)),
+            fresh=lambda value: value[0] >= limit,
+        )[1]
+        return trades[-limit:] if limit else trades
+
+    def get_current_price(self, symbol: str) -> float:
+        return self._get(('price', symbol), lambda: self.client.get_current_price(symbol),
+                         valid=lambda price: price is not None and price > 0)
+
+    def get_historical_data(self, symbol: str, interval: str = "1", limit: int = 50) -> np.ndarray:
+        code = normalize_interval(interval)
+        fetch_limit = max(limit, self.ohlcv_limits.get(code, 0))
+        ohlcv = self._get(
+            ('ohlcv', symbol, code),
+            lambda: self.client.get_historical_data(symbol, interval=interval, limit=fetch_limit),
+            fresh=lambda value: value is not None and len(value) >= limit,
+        )
+        return ohlcv[-limit:] if ohlcv is not None else ohlcv
+
+    def stats(self) -> Dict[str, float]:
+        """Fetch/hit counters for the cycle (useful for logging)."""
+        return {
+            'fetches': self.fetch_count,
+            'hits': self.hit_count,
+            'age': round(time.time() - self.created_at, 3),
+        }
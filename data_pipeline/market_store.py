@@ -0,0 +1,281 @@
+"""
+Columnar Market Data Store
+
+Time-indexed, chunked storage for recorded market data, replacing the
+one-CSV-per-snapshot files in ``data/``.
+
+Layout::
+
+    <root>/<dataset>/schema.json            field shapes and dtypes
+    <root>/<dataset>/<first_ts>_<id>/ts.npy  int64 timestamps (ms), sorted
+    <root>/<dataset>/<first_ts>_<id>/<field>.npy
+
+Every field is a plain ``.npy`` array with one row per timestamp
+(e.g. ``bids`` with shape ``(rows, levels, 2)``), so chunks can be opened
+with ``mmap_mode='r'`` and sliced without reading the file. Chunks are
+immutable: ``StoreWriter`` buffers rows in memory and writes a new chunk
+(via a temp directory + rename) when the buffer is full, on ``flush()``
+or on ``close()``.
+
+Range scans only open chunks overlapping ``[start, end)`` and use a
+binary search on ``ts`` inside them.
+"""
+
+import atexit
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# field name → (per-row shape, dtype)
+Schema = Dict[str, Tuple[Tuple[int, ...], str]]
+
+
+def orderbook_schema(levels: int = 50) -> Schema:
+    """Depth snapshots: ``levels`` × [price, size] per side, zero-padded."""
+    return {'bids': ((levels, 2), 'float64'), 'asks': ((levels, 2), 'float64')}
+
+
+def pad_levels(levels: Sequence[Sequence[float]], depth: int) -> np.ndarray:
+    """Convert ``[[price, size], ...]`` to a ``(depth, 2)`` array, zero-padded/truncated."""
+    out = np.zeros((depth, 2), dtype=np.float64)
+    if len(levels):
+        arr = np.asarray(levels, dtype=np.float64).reshape(-1, 2)[:depth]
+        out[:len(arr)] = arr
+    return out
+
+
+class MarketStore:
+    """
+    Root of a set of datasets (one directory each).
+    """
+
+    def __init__(self, root):
+        """
+        Args:
+            root: Store directory (created if missing).
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # ── Datasets ──────────────────────────────────────────────────────────
+
+    def datasets(self) -> List[str]:
+        return sorted(p.name for p in self.root.iterdir() if (p / 'schema.json').exists())
+
+    def schema(self, name: str) -> Optional[Schema]:
+        path = self.root / name / 'schema.json'
+        if not path.exists():
+            return None
+        raw = json.loads(path.read_text())
+        return {field: (tuple(spec['shape']), spec['dtype']) for field, spec in raw.items()}
+
+    def _create(self, name: str, schema: Schema):
+        existing = self.schema(name)
+        if existing is not None:
+            normalized = {f: (tuple(shape), np.dtype(dtype).name) for f, (shape, dtype) in schema.items()}
+            if existing != normalized:
+                raise ValueError(f"Dataset {name} exists with schema {existing}, not {normalized}")
+            return
+        path = self.root / name
+        path.mkdir(parents=True, exist_ok=True)
+        raw = {field: {'shape': list(shape), 'dtype': np.dtype(dtype).name} for field, (shape, dtype) in schema.items()}
+        (path / 'schema.json').write_text(json.dumps(raw, indent=2))
+
+    def chunks(self, name: str) -> List[Path]:
+        """Chunk directories of *name*, oldest first."""
+        path = self.root / name
+        if not path.exists():
+            return []
+        dirs = [p for p in path.iterdir() if p.is_dir() and not p.name.startswith('.')]
+        return sorted(dirs, key=lambda p: tuple(int(x) for x in p.name.split('_')))
+
+    def writer(self, name: str, schema: Schema, chunk_rows: int = 10_000,
+               flush_interval: Optional[float] = 60.0) -> 'StoreWriter':
+        """Open a buffered writer, creating the dataset if needed."""
+        self._create(name, schema)
+        return StoreWriter(self, name, chunk_rows=chunk_rows, flush_interval=flush_interval)
+
+    # ── Reads ─────────────────────────────────────────────────────────────
+
+    def iter_chunks(
+        self,
+        name: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+        mmap: bool = True,
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Yield ``{'ts': ..., field: ...}`` for each chunk overlapping
+        ``[start, end)`` (ms), already sliced to the range.
+
+        With ``mmap=True`` the arrays are read-only memory-mapped views;
+        nothing is read from disk until they are accessed.
+        """
+        schema = self.schema(name)
+        if schema is None:
+            raise KeyError(f"No dataset named {name} in {self.root}")
+        fields = list(schema) if fields is None else list(fields)
+        mode = 'r' if mmap else None
+        for chunk in self.chunks(name):
+            ts = np.load(chunk / 'ts.npy', mmap_mode=mode)
+            if not len(ts):
+                continue
+            if (end is not None and ts[0] >= end) or (start is not None and ts[-1] < start):
+                continue
+            lo = 0 if start is None else int(np.searchsorted(ts, start, side='left'))
+            hi = len(ts) if end is None else int(np.searchsorted(ts, end, side='left'))
+            if lo >= hi:
+                continue
+            out = {'ts': ts[lo:hi]}
+            for field in fields:
+                out[field] = np.load(chunk / f'{field}.npy', mmap_mode=mode)[lo:hi]
+            yield out
+
+    def read(
+        self,
+        name: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+        mmap: bool = True,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Range-scan ``[start, end)`` into one array per field.
+
+        A range inside a single chunk comes back as memory-mapped views
+        (zero-copy); ranges spanning chunks are concatenated.
+        """
+        parts = list(self.iter_chunks(name, start, end, fields, mmap=mmap))
+        if len(parts) == 1:
+            return parts[0]
+        schema = self.schema(name)
+        keys = ['ts'] + (list(schema) if fields is None else list(fields))
+        if not parts:
+            empty = {'ts': np.empty(0, dtype=np.int64)}
+            for field in keys[1:]:
+                shape, dtype = schema[field]
+                empty[field] = np.empty((0,) + tuple(shape), dtype=dtype)
+            return empty
+        return {key: np.concatenate([p[key] for p in parts]) for key in keys}
+
+    def time_range(self, name: str) -> Optional[Tuple[int, int]]:
+        """First and last timestamp stored in *name*."""
+        chunks = self.chunks(name)
+        if not chunks:
+            return None
+        first = np.load(chunks[0] / 'ts.npy', mmap_mode='r')
+        last = np.load(chunks[-1] / 'ts.npy', mmap_mode='r')
+        return int(first[0]), int(last[-1])
+
+    def row_count(self, name: str) -> int:
+        return sum(len(np.load(c / 'ts.npy', mmap_mode='r')) for c in self.chunks(name))
+
+
+class StoreWriter:
+    """
+    Buffered appender for one dataset.
+
+    Rows accumulate in memory and are written as one immutable chunk when
+    ``chunk_rows`` rows are buffered, when ``flush_interval`` seconds have
+    passed since the last write, or on ``flush()``/``close()`` (also run at
+    interpreter exit). Rows must arrive in non-decreasing time order within
+    a chunk; out-of-order rows are sorted at flush.
+    """
+
+    def __init__(self, store: MarketStore, name: str, chunk_rows: int = 10_000,
+                 flush_interval: Optional[float] = 60.0):
+        self.store = store
+        self.name = name
+        self.schema = store.schema(name)
+        self.chunk_rows = chunk_rows
+        self.flush_interval = flush_interval
+        self._ts: List[int] = []
+        self._rows: Dict[str, List[np.ndarray]] = {field: [] for field in self.schema}
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.rows_written = 0
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._ts)
+
+    def append(self, ts: int, **fields):
+        """Buffer one row; every schema field must be given."""
+        with self._lock:
+            self._ts.append(int(ts))
+            for field, (shape, dtype) in self.schema.items():
+                self._rows[field].append(np.asarray(fields[field], dtype=dtype).reshape(shape))
+            due = len(self._ts) >= self.chunk_rows or (
+                self.flush_interval is not None and time.time() - self._last_flush >= self.flush_interval
+            )
+            if due:
+                self._flush_locked()
+
+    def append_many(self, ts: np.ndarray, **fields):
+        """Write a block of rows (e.g. a migration) straight to chunks."""
+        ts = np.asarray(ts, dtype=np.int64)
+        with self._lock:
+            self._flush_locked()
+            for lo in range(0, len(ts), self.chunk_rows):
+                hi = lo + self.chunk_rows
+                self._write_chunk(ts[lo:hi], {f: np.asarray(fields[f])[lo:hi] for f in self.schema})
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        atexit.unregister(self.close)
+
+    def _flush_locked(self):
+        self._last_flush = time.time()
+        if not self._ts:
+            return
+        ts = np.asarray(self._ts, dtype=np.int64)
+        arrays = {field: np.stack(rows) for field, rows in self._rows.items()}
+        self._ts = []
+        self._rows = {field: [] for field in self.schema}
+        self._write_chunk(ts, arrays)
+
+    def _write_chunk(self, ts: np.ndarray, arrays: Dict[str, np.ndarray]):
+        if not len(ts):
+            return
+        if np.any(np.diff(ts) < 0):
+            order = np.argsort(ts, kind='stable')
+            ts = ts[order]
+            arrays = {f: a[order] for f, a in arrays.items()}
+        dataset = self.store.root / self.name
+        final = dataset / f"{int(ts[0]):013d}_{time.time_ns()}"
+        tmp = dataset / f".tmp_{final.name}_{os.getpid()}"
+        tmp.mkdir(parents=True, exist_ok=True)
+        try:
+            np.save(tmp / 'ts.npy', ts)
+            for field, (shape, dtype) in self.schema.items():
+                np.save(tmp / f'{field}.npy', np.ascontiguousarray(arrays[field], dtype=dtype))
+            os.replace(tmp, final)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.rows_written += len(ts)
+        logger.debug("%s: wrote chunk %s (%d rows)", self.name, final.name, len(ts))
@@ -1,70 +1,375 @@
+"""
+Streaming Order Book Recorder
+
+Records the public ``orderbook.<depth>.<symbol>`` and ``publicTrade.<symbol>``
+WebSocket topics at the full exchange rate, replacing the 2-second REST
+polling that wrote two CSV files per snapshot.
+
+* The socket thread does no parsing: each raw message is stamped with its
+  receive time and appended to a bounded in-memory queue. When the queue
+  is full, new messages are dropped and counted — the socket is never
+  blocked by disk I/O.
+* A writer thread drains the queue every ``flush_interval`` seconds and
+  appends the batch to one rolling file per symbol and UTC hour
+  (``<out_dir>/<SYMBOL>/<YYYYmmdd_HH>.jsonl.gz``), so collectors for
+  different symbols never share a file. Each batch is a separate gzip
+  member, so a file is readable up to the last flushed batch even if the
+  process dies.
+* Lines are the exchange's JSON messages with a ``recv_ts`` field (ms)
+  prepended — the format ``replay_backtest.py --data`` reads.
+* The writer thread also keeps a ``LocalOrderBook`` per symbol from the
+  recorded book messages and appends a depth snapshot to the MarketStore
+  (``orderbook_<symbol>`` dataset, as the REST collector did) every
+  ``store_interval`` seconds through a buffered ``StoreWriter``. A
+  sequence gap (e.g. after dropped messages) resubscribes the symbol's
+  book topic so Bybit sends a fresh snapshot.
+
+``stats()`` reports received/written/dropped counts, queue depth and lag
+(exchange ``ts`` → receipt, and receipt → disk); they are also logged every
+``stats_interval`` seconds.
+"""
+
+import argparse
+import gzip
 import json
+import logging
+import os
+import re
+import ssl
+import threading
 import time
-import pandas as pd
-from data_pipeline.bybit_api import BybitAPI
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+import websocket
+
+from data_pipeline.local_order_book import LocalOrderBook
+from data_pipeline.market_store import MarketStore, StoreWriter, orderbook_schema, pad_levels
+
+logger = logging.getLogger(__name__)
+
+_WS_URL = {
+    True: 'wss://stream-testnet.bybit.com/v5/public/linear',
+    False: 'wss://stream.bybit.com/v5/public/linear',
+}
+# Bybit accepts at most 10 topics per subscribe request on linear streams
+_MAX_ARGS_PER_SUBSCRIBE = 10
+# The top-level "ts" is the first one in every orderbook/publicTrade message
+_TS_FIELD = re.compile(r'"ts":(\d+)')
+_TOPIC_FIELD = re.compile(r'"topic"\s*:\s*"([^"]+)"')
+
+
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
 
 class OrderBookCollector:
-    def __init__(self, api: BybitAPI):
-        """
-        Initialize the OrderBookCollector with a BybitAPI instance.
+    """
+    WebSocket recorder for order book and trade streams.
+    """
 
+    def __init__(
+        self,
+        symbols: Sequence[str] = ("BTCUSDT",),
+        out_dir: str = "data/ws",
+        depth: int = 50,
+        testnet: bool = False,
+        max_queue: int = 50_000,
+        flush_interval: float = 1.0,
+        compresslevel: int = 3,
+        stats_interval: float = 60.0,
+        store: Optional[MarketStore] = None,
+        store_interval: Optional[float] = 1.0,
+        store_levels: int = 50,
+    ):
+        """
         Args:
-            api (BybitAPI): Instance of BybitAPI for fetching order book data.
+            symbols: Trading pairs to record.
+            out_dir: Directory for the per-symbol hourly ``.jsonl.gz`` files.
+            depth: Order book stream depth (1, 50, 200 or 500).
+            testnet: Record the testnet streams instead of mainnet.
+            max_queue: Messages buffered before new ones are dropped.
+            flush_interval: Seconds between writer flushes.
+            compresslevel: gzip level; low levels keep CPU use small.
+            stats_interval: Seconds between stats log lines (None disables).
+            store: Store the depth snapshots are written to. Defaults to
+                ``data/store``.
+            store_interval: Seconds between stored snapshots per symbol
+                (None disables the store).
+            store_levels: Depth levels stored per side (zero-padded).
         """
-        self.api = api
+        self.symbols = list(symbols)
+        self.out_dir = out_dir
+        self.depth = depth
+        self.url = _WS_URL[testnet]
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.compresslevel = compresslevel
+        self.stats_interval = stats_interval
+        self.store_interval = store_interval
+        self.store_levels = store_levels
+        self.store = None
+        if store_interval is not None:
+            self.store = store or MarketStore("data/store")
 
-    def fetch_order_book(self, symbol: str = "BTCUSDT", save_to_csv: bool = True) -> dict | None:
-        """
-        Fetch order book data and store it in a structured format.
+        self._queue: deque = deque()
+        self._stop = threading.Event()
+        self.ws: Optional[websocket.WebSocketApp] = None
+        self._ws_thread: Optional[threading.Thread] = None
+        self._writer_thread: Optional[threading.Thread] = None
+        self._files: Dict[str, tuple] = {}             # symbol → (hour, file)
+        self._books: Dict[str, LocalOrderBook] = {}
+        self._writers: Dict[str, StoreWriter] = {}
+        self._last_stored: Dict[str, int] = {}
 
-        Args:
-            symbol (str): Trading pair (e.g., "BTCUSDT"). Defaults to "BTCUSDT".
-            save_to_csv (bool): Option to save data to CSV files. Defaults to True.
+        # Socket-thread counters
+        self.received = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.connected = False
+        # Writer-thread counters
+        self.written = 0
+        self.skipped = 0            # acks / pongs without a topic
+        self.bytes_written = 0
+        self.snapshots_stored = 0
+        self.max_queue_depth = 0
+        self.last_exchange_lag_ms = 0
+        self.max_exchange_lag_ms = 0
+        self.max_write_lag_ms = 0
+        self._last_stats = time.time()
 
-        Returns:
-            dict | None: Order book data if successful, None if failed.
-        """
+        os.makedirs(out_dir, exist_ok=True)
+
+    # ── Lifecycle ──────────────────────────────────────────────────────────
+
+    def start(self):
+        """Connect and start recording in background threads."""
+        self._stop.clear()
+        self._writer_thread = threading.Thread(target=self._writer_loop, name="ob-writer", daemon=True)
+        self._writer_thread.start()
+        self._ws_thread = threading.Thread(target=self._ws_loop, name="ob-socket", daemon=True)
+        self._ws_thread.start()
+        logger.info("Recording %s to %s", ", ".join(self.topics()), self.out_dir)
+
+    def stop(self):
+        """Disconnect, flush everything still queued and close the files."""
+        self._stop.set()
+        if self.ws is not None:
+            self.ws.close()
+        for thread in (self._ws_thread, self._writer_thread):
+            if thread is not None:
+                thread.join(timeout=10)
+        logger.info("Recorder stopped: %s", self.stats())
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def topics(self) -> List[str]:
+        topics = []
+        for symbol in self.symbols:
+            topics += [f"orderbook.{self.depth}.{symbol}", f"publicTrade.{symbol}"]
+        return topics
+
+    # ── Socket thread ──────────────────────────────────────────────────────
+
+    def _ws_loop(self):
+        delay = 1.0
+        while not self._stop.is_set():
+            self.ws = websocket.WebSocketApp(
+                self.url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+            )
+            started = time.time()
+            self.ws.run_forever(ping_interval=20, ping_timeout=10, sslopt={"cert_reqs": ssl.CERT_NONE})
+            if self._stop.is_set():
+                break
+            # A connection that stayed up for a while resets the backoff
+            delay = 1.0 if time.time() - started > 60 else min(delay * 2, 60.0)
+            self.reconnects += 1
+            logger.warning("Recorder socket disconnected, reconnecting in %.0fs", delay)
+            self._stop.wait(delay)
+
+    def _on_open(self, ws):
+        self.connected = True
+        # Bybit sends a fresh book snapshot on subscribe, so a reconnect
+        # leaves a gap in the recording but never a corrupt book
+        topics = self.topics()
+        for i in range(0, len(topics), _MAX_ARGS_PER_SUBSCRIBE):
+            ws.send('{"op":"subscribe","args":["%s"]}' % '","'.join(topics[i:i + _MAX_ARGS_PER_SUBSCRIBE]))
+
+    def _on_message(self, ws, message: str):
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._queue.append((_now_ms(), message))
+        self.received += 1
+
+    def _on_error(self, ws, error):
+        logger.error("Recorder socket error: %s", error)
+
+    def _on_close(self, ws, close_status_code, close_msg):
+        self.connected = False
+
+    # ── Writer thread ──────────────────────────────────────────────────────
+
+    def _writer_loop(self):
         try:
-            # Fetch order book data from the API
-            data = self.api.get_order_book(symbol)
-
-            # Check if the API response is valid
-            if not data or 'bids' not in data or 'asks' not in data:
-                print(f"Error: Invalid or empty order book data for {symbol}.")
-                return None
-
-            bids = sorted(data['bids'], key=lambda x: float(x[0]), reverse=True)  # Highest bid first
-            asks = sorted(data['asks'], key=lambda x: float(x[0]))  # Lowest ask first
-
-            # Prepare data for display and saving
-            df_bids = pd.DataFrame(bids, columns=["Price", "Size"])
-            df_asks = pd.DataFrame(asks, columns=["Price", "Size"])
-
-            # Display the top 5 bids and asks
-            print(f"\n--- Order Book (Top 5 Levels) for {symbol} ---")
-            print("Bids:")
-            print(df_bids.head())
-            print("\nAsks:")
-            print(df_asks.head())
-
-            # Optionally save the data to CSV
-            if save_to_csv:
-                timestamp = int(time.time())
-                df_bids.to_csv(f"data/bids_{symbol}_{timestamp}.csv", index=False)
-                df_asks.to_csv(f"data/asks_{symbol}_{timestamp}.csv", index=False)
-                print(f"Data saved as bids_{symbol}_{timestamp}.csv and asks_{symbol}_{timestamp}.csv")
-
-            # Return the raw data for further use
-            return {'bids': bids, 'asks': asks}
+            while True:
+                stopping = self._stop.wait(self.flush_interval)
+                self._drain()
+                if self.stats_interval is not None and time.time() - self._last_stats >= self.stats_interval:
+                    logger.info("Recorder: %s", self.stats())
+                    self._reset_window()
+                if stopping:
+                    # Catch anything the socket pushed while shutting down
+                    self._drain()
+                    break
+        finally:
+            self._close_files()
+            for writer in self._writers.values():
+                writer.close()
+
+    def _drain(self):
+        n = len(self._queue)
+        if n == 0:
+            return
+        self.max_queue_depth = max(self.max_queue_depth, n)
+        batch = [self._queue.popleft() for _ in range(n)]
+
+        # (symbol, hour) → lines, in arrival order
+        groups: Dict[tuple, List[str]] = {}
+        for recv_ts, message in batch:
+            topic = _TOPIC_FIELD.search(message)
+            if topic is None:
+                self.skipped += 1
+                continue
+            topic = topic.group(1)
+            symbol = topic.rsplit('.', 1)[-1]
+            match = _TS_FIELD.search(message)
+            if match:
+                lag = recv_ts - int(match.group(1))
+                self.last_exchange_lag_ms = lag
+                self.max_exchange_lag_ms = max(self.max_exchange_lag_ms, lag)
+            line = '{"recv_ts":%d,%s\n' % (recv_ts, message[1:].replace('\n', ''))
+            groups.setdefault((symbol, recv_ts // 3_600_000), []).append(line)
+            if self.store is not None and topic.startswith('orderbook'):
+                self._store_book(symbol, recv_ts, message)
+        for (symbol, hour), lines in groups.items():
+            self._write(symbol, hour, lines)
+        self.max_write_lag_ms = max(self.max_write_lag_ms, _now_ms() - batch[0][0])
 
+    def _write(self, symbol: str, hour: int, lines: List[str]):
+        current = self._files.get(symbol)
+        if current is None or current[0] != hour:
+            if current is not None:
+                current[1].close()
+            directory = os.path.join(self.out_dir, symbol)
+            os.makedirs(directory, exist_ok=True)
+            name = time.strftime('%Y%m%d_%H', time.gmtime(hour * 3600)) + '.jsonl.gz'
+            current = self._files[symbol] = (hour, open(os.path.join(directory, name), 'ab'))
+        data = gzip.compress(''.join(lines).encode(), compresslevel=self.compresslevel)
+        current[1].write(data)
+        current[1].flush()
+        self.written += len(lines)
+        self.bytes_written += len(data)
+
+    def _close_files(self):
+        for _, fh in self._files.values():
+            fh.close()
+        self._files.clear()
+
+    def _store_book(self, symbol: str, recv_ts: int, message: str):
+        """Apply a book message and store a snapshot if ``store_interval`` has passed."""
+        book = self._books.get(symbol)
+        if book is None:
+            book = self._books[symbol] = LocalOrderBook(symbol, depth=self.depth, on_resync=self._resubscribe_book)
+        try:
+            book.apply_message(json.loads(message))
+        except (ValueError, TypeError) as e:
+            logger.warning("Unparseable %s book message: %s", symbol, e)
+            return
+        # A gap leaves the book unsynced until the snapshot _resubscribe_book asks for
+        if not book.synced or recv_ts - self._last_stored.get(symbol, 0) < self.store_interval * 1000:
+            return
+        writer = self._writers.get(symbol)
+        if writer is None:
+            writer = self._writers[symbol] = self.store.writer(
+                f"orderbook_{symbol}", orderbook_schema(self.store_levels))
+        bids, asks = book.top(self.store_levels)
+        writer.append(book.timestamp or recv_ts,
+                      bids=pad_levels(bids, self.store_levels), asks=pad_levels(asks, self.store_levels))
+        self._last_stored[symbol] = recv_ts
+        self.snapshots_stored += 1
+
+    def _resubscribe_book(self, symbol: str):
+        """Resubscribe to a book topic so Bybit replays a fresh snapshot."""
+        topic = f"orderbook.{self.depth}.{symbol}"
+        try:
+            if self.ws is not None and self.connected:
+                self.ws.send('{"op":"unsubscribe","args":["%s"]}' % topic)
+                self.ws.send('{"op":"subscribe","args":["%s"]}' % topic)
+                logger.info("Resubscribed to %s for a fresh snapshot", topic)
         except Exception as e:
-            print(f"Error fetching order book for {symbol}: {e}")
-            return None
+            logger.error("Book resubscribe failed for %s: %s", symbol, e)
+
+    # ── Stats ──────────────────────────────────────────────────────────────
+
+    def stats(self) -> Dict[str, float]:
+        """Counters since start; lag/queue maxima since the last stats log."""
+        return {
+            'connected': self.connected,
+            'received': self.received,
+            'written': self.written,
+            'dropped': self.dropped,
+            'skipped': self.skipped,
+            'reconnects': self.reconnects,
+            'queue_depth': len(self._queue),
+            'max_queue_depth': self.max_queue_depth,
+            'exchange_lag_ms': self.last_exchange_lag_ms,
+            'max_exchange_lag_ms': self.max_exchange_lag_ms,
+            'max_write_lag_ms': self.max_write_lag_ms,
+            'mb_written': round(self.bytes_written / 1e6, 2),
+            'snapshots_stored': self.snapshots_stored,
+            'resyncs': sum(book.resync_count for book in list(self._books.values())),
+        }
+
+    def _reset_window(self):
+        self.max_queue_depth = 0
+        self.max_exchange_lag_ms = 0
+        self.max_write_lag_ms = 0
+        self._last_stats = time.time()
+
 
-# Example usage
 if __name__ == "__main__":
-    api = BybitAPI()
-    collector = OrderBookCollector(api)
-    while True:
-        collector.fetch_order_book(symbol="BTCUSDT")
-        time.sleep(2)  # Fetch every 2 seconds
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Record Bybit order book and trade streams')
+    parser.add_argument('--symbol', action='append', default=[], help='Trading pair (repeatable, default BTCUSDT)')
+    parser.add_argument('--out', default='data/ws', help='Output directory')
+    parser.add_argument('--depth', type=int, default=50, choices=[1, 50, 200, 500])
+    parser.add_argument('--testnet', action='store_true', help='Record the testnet streams')
+    parser.add_argument('--store', default='data/store', help='MarketStore directory for depth snapshots')
+    parser.add_argument('--store-interval', type=float, default=1.0,
+                        help='Seconds between stored snapshots per symbol')
+    parser.add_argument('--no-store', action='store_true', help='Record the JSONL files only')
+    args = parser.parse_args()
+
+    collector = OrderBookCollector(
+        args.symbol or ["BTCUSDT"], out_dir=args.out, depth=args.depth, testnet=args.testnet,
+        store=None if args.no_store else MarketStore(args.store),
+        store_interval=None if args.no_store else args.store_interval,
+    )
+    collector.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.stop()
@@ -0,0 +1,277 @@
+"""
+Bybit Rate-Limit Subsystem
+
+Token buckets per endpoint group, sized from Bybit's published v5 limits,
+so order traffic and market-data polling share the quota instead of
+discovering it through ``10006`` errors and blind backoff.
+
+* Every request takes a token from its group's bucket (per-UID limits,
+  e.g. 10/s for order create) **and** from the shared per-IP bucket
+  (600 requests per 5 s for all HTTP traffic).
+* Priorities: orders and cancels are HIGH, account/position reads NORMAL,
+  market data LOW. Lower priorities may not draw a shared bucket below a
+  floor, so polling can never starve order placement.
+* ``check()`` is non-blocking: it takes the tokens and returns 0, or
+  returns how many milliseconds the caller would have to wait (nothing is
+  taken). ``acquire()`` is the blocking convenience for sync clients.
+* ``update_from_headers()`` reads ``X-Bapi-Limit-Status`` (remaining),
+  ``X-Bapi-Limit`` (limit) and ``X-Bapi-Limit-Reset-Timestamp`` from
+  responses: the bucket is clamped to what the exchange says remains,
+  resized if the account's limit differs from the default, and frozen
+  until the reset time when it is exhausted. ``penalize()`` does the same
+  after a ``10006`` error.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HIGH, NORMAL, LOW = 0, 1, 2
+
+# Fraction of a bucket's capacity each priority must leave untouched
+_PRIORITY_FLOOR = {HIGH: 0.0, NORMAL: 0.1, LOW: 0.3}
+
+# group → (requests, per seconds, default priority). Per-UID limits from
+# the Bybit v5 rate-limit table (linear / unified account defaults).
+BYBIT_V5_LIMITS: Dict[str, Tuple[int, float, int]] = {
+    'order': (10, 1.0, HIGH),       # /v5/order/create, /v5/order/amend
+    'cancel': (10, 1.0, HIGH),      # /v5/order/cancel, cancel-all
+    'batch_order': (10, 1.0, HIGH), # /v5/order/*-batch (per request, not per order)
+    'order_query': (50, 1.0, NORMAL),  # /v5/order/realtime, history
+    'position': (50, 1.0, NORMAL),  # /v5/position/list, set-leverage
+    'account': (50, 1.0, NORMAL),   # /v5/account/wallet-balance
+    'market': (120, 1.0, LOW),      # public /v5/market/* (bounded by the IP limit)
+}
+IP_LIMIT = (600, 5.0)               # all HTTP requests per IP
+
+# ccxt method (and v5 path) → endpoint group
+METHOD_GROUPS = {
+    'create_order': 'order',
+    'edit_order': 'order',
+    'cancel_order': 'cancel',
+    'cancel_all_orders': 'cancel',
+    'create_orders': 'batch_order',
+    'fetch_open_orders': 'order_query',
+    'fetch_order': 'order_query',
+    'fetch_positions': 'position',
+    'set_leverage': 'position',
+    'fetch_balance': 'account',
+    'fetch_ohlcv': 'market',
+    'fetch_order_book': 'market',
+    'fetch_trades': 'market',
+    'fetch_ticker': 'market',
+    # ccxt implicit v5 endpoints
+    'private_post_v5_order_amend': 'order',
+    'private_get_v5_order_realtime': 'order_query',
+    'private_post_v5_order_create_batch': 'batch_order',
+    'private_post_v5_order_amend_batch': 'batch_order',
+    'private_post_v5_order_cancel_batch': 'batch_order',
+    '/v5/order/create': 'order',
+    '/v5/order/amend': 'order',
+    '/v5/order/cancel': 'cancel',
+    '/v5/order/cancel-all': 'cancel',
+    '/v5/order/create-batch': 'batch_order',
+    '/v5/order/amend-batch': 'batch_order',
+    '/v5/order/cancel-batch': 'batch_order',
+}
+
+
+@dataclass
+class TokenBucket:
+    """Classic token bucket; ``blocked_until`` freezes it after an exchange-side limit."""
+    rate: float                 # tokens per second
+    capacity: float
+    tokens: float = -1.0
+    updated: float = 0.0
+    blocked_until: float = 0.0
+
+    def __post_init__(self):
+        if self.tokens < 0:
+            self.tokens = self.capacity
+
+    def refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float, n: float, floor: float) -> float:
+        """Seconds until *n* tokens are available above *floor* (0 if now)."""
+        self.refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        missing = n + floor - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate
+
+
+class RateLimiter:
+    """
+    Per-endpoint-group and per-IP token buckets with priorities.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[int, float, int]]] = None,
+        ip_limit: Optional[Tuple[int, float]] = IP_LIMIT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            limits: group → (requests, per seconds, default priority).
+            ip_limit: (requests, per seconds) shared by every group, or None.
+            clock: Monotonic time source (injectable for tests/replay).
+        """
+        self.clock = clock
+        self.limits = dict(BYBIT_V5_LIMITS if limits is None else limits)
+        now = clock()
+        self.buckets: Dict[str, TokenBucket] = {
+            group: TokenBucket(rate=n / per, capacity=float(n), updated=now)
+            for group, (n, per, _) in self.limits.items()
+        }
+        self.ip_bucket = TokenBucket(rate=ip_limit[0] / ip_limit[1], capacity=float(ip_limit[0]), updated=now) \
+            if ip_limit else None
+        self._lock = threading.Lock()
+        self.stats = {'granted': 0, 'deferred': 0, 'penalized': 0}
+
+    # ── Lookup ─────────────────────────────────────────────────────────────
+
+    def group_of(self, method: str) -> Optional[str]:
+        group = METHOD_GROUPS.get(method)
+        if group is None and method in self.buckets:
+            group = method
+        return group
+
+    def priority_of(self, method: str) -> int:
+        group = self.group_of(method)
+        return self.limits[group][2] if group in self.limits else NORMAL
+
+    # ── Acquisition ────────────────────────────────────────────────────────
+
+    def check(self, method: str, priority: Optional[int] = None, cost: float = 1.0) -> int:
+        """Try to take tokens for one *method* call without blocking.
+
+        Returns:
+            0 if the request may go now (tokens taken), otherwise the
+            number of milliseconds to wait before asking again.
+        """
+        group = self.group_of(method)
+        if priority is None:
+            priority = self.priority_of(method)
+        floor_frac = _PRIORITY_FLOOR.get(priority, _PRIORITY_FLOOR[LOW])
+        with self._lock:
+            now = self.clock()
+            bucket = self.buckets.get(group)
+            wait = 0.0
+            if bucket is not None:
+                # Group buckets serve one kind of traffic — only the freeze and
+                # the capacity itself apply, not the priority floor
+                wait = bucket.wait_time(now, cost, 0.0)
+            if self.ip_bucket is not None:
+                wait = max(wait, self.ip_bucket.wait_time(now, cost, floor_frac * self.ip_bucket.capacity))
+            if wait > 0:
+                self.stats['deferred'] += 1
+                return max(1, int(wait * 1000 + 0.999))
+            if bucket is not None:
+                bucket.tokens -= cost
+            if self.ip_bucket is not None:
+                self.ip_bucket.tokens -= cost
+            self.stats['granted'] += 1
+            return 0
+
+    def acquire(self, method: str, priority: Optional[int] = None, cost: float = 1.0,
+                max_wait: Optional[float] = None, sleep: Callable[[float], None] = time.sleep) -> bool:
+        """Block until *method* may be sent.
+
+        Returns:
+            False if that would take longer than *max_wait* seconds.
+        """
+        waited = 0.0
+        while True:
+            wait_ms = self.check(method, priority, cost)
+            if wait_ms == 0:
+                return True
+            if max_wait is not None and waited + wait_ms / 1000 > max_wait:
+                return False
+            sleep(wait_ms / 1000)
+            waited += wait_ms / 1000
+
+    # ── Exchange feedback ──────────────────────────────────────────────────
+
+    def update_from_headers(self, method: str, headers: Optional[Mapping[str, str]]):
+        """Adapt the group's bucket to the ``X-Bapi-Limit*`` response headers."""
+        if not headers:
+            return
+        lowered = {str(k).lower(): v for k, v in headers.items()}
+        remaining = lowered.get('x-bapi-limit-status')
+        if remaining is None:
+            return
+        group = self.group_of(method)
+        bucket = self.buckets.get(group)
+        if bucket is None:
+            return
+        try:
+            remaining = float(remaining)
+            limit = float(lowered.get('x-bapi-limit', bucket.capacity))
+            reset_ms = lowered.get('x-bapi-limit-reset-timestamp')
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            now = self.clock()
+            bucket.refill(now)
+            if limit > 0 and limit != bucket.capacity:
+                # Account-specific limit (VIP tiers, institutional accounts)
+                per = self.limits[group][1]
+                logger.info("Rate limit for %s is %d/%.0fs (was %d)", group, limit, per, bucket.capacity)
+                bucket.capacity = limit
+                bucket.rate = limit / per
+            bucket.tokens = min(bucket.tokens, remaining)
+            if remaining <= 0 and reset_ms is not None:
+                self._block(bucket, now, reset_ms)
+
+    def penalize(self, method: str, headers: Optional[Mapping[str, str]] = None, default_backoff: float = 1.0) -> int:
+        """Record a ``10006`` rejection; returns the ms to wait before retrying."""
+        group = self.group_of(method)
+        bucket = self.buckets.get(group, self.ip_bucket)
+        lowered = {str(k).lower(): v for k, v in (headers or {}).items()}
+        with self._lock:
+            now = self.clock()
+            self.stats['penalized'] += 1
+            if bucket is None:
+                return int(default_backoff * 1000)
+            bucket.refill(now)
+            bucket.tokens = 0.0
+            reset_ms = lowered.get('x-bapi-limit-reset-timestamp')
+            if reset_ms is None or not self._block(bucket, now, reset_ms):
+                bucket.blocked_until = max(bucket.blocked_until, now + default_backoff)
+            logger.warning("Rate limited on %s (%s) — pausing %.2fs", method, group, bucket.blocked_until - now)
+            return int((bucket.blocked_until - now) * 1000)
+
+    def _block(self, bucket: TokenBucket, now: float, reset_ms) -> bool:
+        """Freeze *bucket* until the exchange's reset timestamp (wall-clock ms)."""
+        try:
+            delay = float(reset_ms) / 1000 - time.time()
+        except (TypeError, ValueError):
+            return False
+        if delay <= 0:
+            return False
+        bucket.blocked_until = max(bucket.blocked_until, now + min(delay, 60.0))
+        return True
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Current tokens per bucket (for logging)."""
+        with self._lock:
+            now = self.clock()
+            out = {}
+            for name, bucket in list(self.buckets.items()) + ([('ip', self.ip_bucket)] if self.ip_bucket else []):
+                bucket.refill(now)
+                out[name] = {
+                    'tokens': round(bucket.tokens, 2),
+                    'capacity': bucket.capacity,
+                    'blocked_for': round(max(0.0, bucket.blocked_until - now), 3),
+                }
+            return out
@@ -0,0 +1,243 @@
+"""
+Rolling Trade-Flow Aggregates
+
+One shared view of the public trade stream for every consumer that used
+to fetch (and re-parse) its own batch of recent trades over REST.
+
+* Trades are stored in columnar NumPy ring buffers (timestamp, price,
+  size, side). Each window in ``windows`` (seconds) keeps running sums —
+  buy and sell volume, notional (for the VWAP), trade count and squared
+  trade-to-trade log returns (realized variance) — that are advanced and
+  evicted incrementally, so an update or a read is O(1) amortized.
+* ``attach(client)`` feeds it from the ``publicTrade`` WebSocket topic.
+  While the stream is down, ``poll()`` tops it up from REST; only trades
+  newer than the last one stored are added, so polling and streaming can
+  overlap without double counting.
+* Rows from the stream (``T``/``p``/``v``/``S``), ccxt (``timestamp``/
+  ``price``/``amount``/``side``) and the raw v5 REST API (``time``/
+  ``price``/``size``) are all accepted, which ends the ``qty``-vs-``size``
+  disagreement between consumers.
+"""
+
+import bisect
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = ('buy', 'sell', 'notional', 'count', 'var')
+
+
+def normalize_trade(trade: Dict) -> Optional[tuple]:
+    """``(timestamp s, price, size, side ±1)`` from any supported trade row, or None."""
+    try:
+        ts = trade.get('T', trade.get('timestamp', trade.get('time')))
+        price = trade.get('p', trade.get('price'))
+        size = trade.get('v', trade.get('amount', trade.get('size', trade.get('qty'))))
+        side = str(trade.get('S', trade.get('side', ''))).lower()
+        if ts is None or price is None or size is None or side not in ('buy', 'sell'):
+            return None
+        return float(ts) / 1000, float(price), float(size), 1 if side == 'buy' else -1
+    except (TypeError, ValueError):
+        return None
+
+
+class TradeFlow:
+    """
+    Columnar trade buffer with O(1) rolling aggregates over several windows.
+    """
+
+    def __init__(
+        self,
+        symbol: str = "BTCUSDT",
+        windows: Sequence[float] = (10.0, 60.0, 300.0),
+        capacity: int = 1 << 17,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            symbol: Trading pair.
+            windows: Rolling window lengths in seconds.
+            capacity: Trades kept; should cover the longest window at peak rate.
+            clock: Time source in seconds (injectable for replay).
+        """
+        self.symbol = symbol
+        self.windows = tuple(float(w) for w in windows)
+        self.capacity = capacity
+        self.clock = clock
+        self.ts = np.zeros(capacity)
+        self.price = np.zeros(capacity)
+        self.size = np.zeros(capacity)
+        self.side = np.zeros(capacity, dtype=np.int8)
+        self._ret2 = np.zeros(capacity)             # squared log return vs the previous trade
+        self._head = 0                              # total trades stored
+        self._tail = {w: 0 for w in self.windows}
+        self._sums = {w: dict.fromkeys(_FIELDS, 0.0) for w in self.windows}
+        self._client = None
+        self._lock = threading.Lock()
+
+    # ── Input ──────────────────────────────────────────────────────────────
+
+    def attach(self, client):
+        """Update from *client*'s public trade events."""
+        self._client = client
+        client.add_listener(self._on_client_event)
+
+    @property
+    def streaming(self) -> bool:
+        """True while trades arrive from an attached, connected WebSocket."""
+        return self._client is not None and bool(getattr(self._client, 'ws_connected', False))
+
+    def _on_client_event(self, event: str, symbol: str, payload):
+        if event == 'trade' and symbol == self.symbol:
+            self.add_trades(payload, overlap=False)
+
+    def poll(self, source, limit: int = 100) -> int:
+        """Add recent trades from *source* (client or MarketSnapshot) over REST."""
+        return self.add_trades(source.get_recent_trades(self.symbol, limit=limit) or [])
+
+    def add_trades(self, trades: List[Dict], overlap: bool = True) -> int:
+        """Add trade rows (any order). Returns how many were new.
+
+        Args:
+            trades: Trade rows in any supported format.
+            overlap: The rows may repeat stored trades (REST polls) — skip
+                everything up to and including the newest stored timestamp.
+                Stream batches only skip strictly older trades.
+        """
+        rows = sorted(filter(None, map(normalize_trade, trades)))
+        added = 0
+        with self._lock:
+            last = self.ts[(self._head - 1) % self.capacity] if self._head else -math.inf
+            for ts, price, size, side in rows:
+                if ts < last or (overlap and ts == last):
+                    continue
+                self._add(ts, price, size, side)
+                added += 1
+            if added:
+                self._evict_all(self.ts[(self._head - 1) % self.capacity])
+        return added
+
+    def add(self, ts_ms: float, price: float, size: float, side: int):
+        """Add one trade (*side* +1 = taker buy, -1 = taker sell)."""
+        with self._lock:
+            self._add(ts_ms / 1000, price, size, side)
+            self._evict_all(ts_ms / 1000)
+
+    def _add(self, ts: float, price: float, size: float, side: int):
+        i = self._head % self.capacity
+        if self._head >= self.capacity:
+            # Overwriting the oldest trade — drop it from windows still holding it
+            for w in self.windows:
+                if self._tail[w] == self._head - self.capacity:
+                    self._drop(w)
+        prev = self.price[(self._head - 1) % self.capacity] if self._head else 0.0
+        ret2 = math.log(price / prev) ** 2 if prev > 0 and price > 0 else 0.0
+        self.ts[i], self.price[i], self.size[i], self.side[i], self._ret2[i] = ts, price, size, side, ret2
+        self._head += 1
+        for w in self.windows:
+            s = self._sums[w]
+            s['buy' if side > 0 else 'sell'] += size
+            s['notional'] += price * size
+            s['count'] += 1
+            s['var'] += ret2
+
+    def _drop(self, w: float):
+        j = self._tail[w] % self.capacity
+        s = self._sums[w]
+        s['buy' if self.side[j] > 0 else 'sell'] -= self.size[j]
+        s['notional'] -= self.price[j] * self.size[j]
+        s['count'] -= 1
+        s['var'] -= self._ret2[j]
+        self._tail[w] += 1
+
+    def _evict(self, w: float, now: float):
+        while self._tail[w] < self._head and self.ts[self._tail[w] % self.capacity] <= now - w:
+            self._drop(w)
+        if self._tail[w] == self._head:
+            # Empty window — clear accumulated floating-point residue
+            self._sums[w] = dict.fromkeys(_FIELDS, 0.0)
+
+    def _evict_all(self, now: float):
+        for w in self.windows:
+            self._evict(w, now)
+
+    # ── Readers ────────────────────────────────────────────────────────────
+
+    def _window(self, window: Optional[float]) -> float:
+        if window is None:
+            return self.windows[0]
+        if window not in self._sums:
+            raise ValueError(f"Trade-flow window {window}s not configured (have {self.windows})")
+        return window
+
+    def stats(self, window: Optional[float] = None) -> Dict[str, float]:
+        """Aggregates over the last *window* seconds (default: the first window)."""
+        w = self._window(window)
+        with self._lock:
+            self._evict(w, self.clock())
+            s = dict(self._sums[w])
+        buy, sell = max(s['buy'], 0.0), max(s['sell'], 0.0)
+        volume = buy + sell
+        count = int(round(s['count']))
+        var = max(s['var'], 0.0)
+        return {
+            'buy_volume': buy,
+            'sell_volume': sell,
+            'volume': volume,
+            'net_volume': buy - sell,
+            'imbalance': (buy - sell) / volume if volume > 0 else 0.0,
+            'count': count,
+            'vwap': s['notional'] / volume if volume > 0 else 0.0,
+            'realized_variance': var,
+            'trade_return_std': math.sqrt(var / count) if count > 0 else 0.0,
+        }
+
+    def _columns(self, window: Optional[float]) -> Tuple[int, int]:
+        w = self._window(window)
+        self._evict(w, self.clock())
+        return self._tail[w], self._head
+
+    def sizes(self, window: Optional[float] = None) -> np.ndarray:
+        """Trade sizes in the window, oldest first (a copy)."""
+        with self._lock:
+            return self._take(self.size, *self._columns(window))
+
+    def prices(self, window: Optional[float] = None) -> np.ndarray:
+        """Trade prices in the window, oldest first (a copy)."""
+        with self._lock:
+            return self._take(self.price, *self._columns(window))
+
+    def _take(self, column: np.ndarray, start: int, end: int) -> np.ndarray:
+        idx = np.arange(start, end) % self.capacity
+        return column[idx]
+
+    def since(self, ts_ms: float) -> Tuple[float, float, float]:
+        """``(volume, notional, newest timestamp in ms)`` of stored trades after *ts_ms*.
+
+        For consumers that accumulate over their own span (e.g. the market
+        VWAP of an execution window) by passing the returned timestamp back
+        on the next call. The timestamp is *ts_ms* if nothing is newer;
+        trades already overwritten in the ring buffer are not counted.
+        """
+        with self._lock:
+            head = self._head
+            oldest = max(0, head - self.capacity)
+            start = bisect.bisect_right(range(oldest, head), ts_ms / 1000,
+                                        key=lambda k: self.ts[k % self.capacity]) + oldest
+            if start == head:
+                return 0.0, 0.0, ts_ms
+            sizes = self._take(self.size, start, head)
+            prices = self._take(self.price, start, head)
+            newest = float(self.ts[(head - 1) % self.capacity]) * 1000
+        return float(sizes.sum()), float(prices @ sizes), newest
+
+    @property
+    def last_price(self) -> Optional[float]:
+        with self._lock:
+            return float(self.price[(self._head - 1) % self.capacity]) if self._head else None
@@ -0,0 +1,233 @@
+"""
+Event-Driven Scheduler for the Trade Loop
+
+Runs handlers when market data changes instead of on a fixed sleep
+cadence. Producers (the BybitClient WebSocket thread) call ``publish()``,
+which only records the event and wakes the dispatcher — it never runs
+handler code on the socket thread.
+
+* Coalescing: at most one event per type is pending. Publishing a type
+  that is already pending replaces its payload (the newest book/price
+  wins) and bumps a ``coalesced`` counter, so a slow handler never builds
+  a backlog of stale updates.
+* Ordering: dispatch runs in rounds. Every type pending at the start of
+  a round is dispatched once, by handler priority (lower first), so a
+  busy high-priority stream cannot starve the others. Handlers run one
+  at a time on a single thread and need no extra locking against each
+  other.
+* Lanes: handlers that block on I/O (REST calls, fill waits) are
+  subscribed with a ``lane``. Their events are handed to that lane's
+  worker thread, one at a time, so they never stall the dispatcher (price
+  ticks keep flowing). While a lane is busy its events stay pending and
+  keep coalescing; they are dispatched when the lane is free again.
+  Handlers sharing a lane never overlap.
+* Timers: ``add_timer`` publishes an event periodically (reports,
+  position sync, REST fallback while the stream is down).
+* Metrics: per event type, the latency from the *first* publish of a
+  coalesced event to its handler starting, plus handler run time.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _EventStats:
+    published: int = 0
+    coalesced: int = 0
+    dispatched: int = 0
+    errors: int = 0
+    latency_ms: deque = field(default_factory=lambda: deque(maxlen=1000))
+    handler_ms: deque = field(default_factory=lambda: deque(maxlen=1000))
+
+
+class EventScheduler:
+    """
+    Coalescing single-threaded event dispatcher.
+    """
+
+    def __init__(self, name: str = "event-scheduler"):
+        self.name = name
+        self._handlers: Dict[str, List[Callable[[Any], None]]] = {}
+        self._priority: Dict[str, int] = {}
+        self._lane: Dict[str, str] = {}          # type → worker lane (absent: dispatcher thread)
+        self._busy_lanes: set = set()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, tuple] = {}     # type → (first publish time, payload)
+        self._timers: Dict[str, List[float]] = {}  # type → [interval, next due]
+        self._stats: Dict[str, _EventStats] = {}
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ── Registration ──────────────────────────────────────────────────────
+
+    def subscribe(self, event_type: str, handler: Callable[[Any], None], priority: int = 10,
+                  lane: Optional[str] = None):
+        """Run *handler(payload)* for every dispatched *event_type*.
+
+        Args:
+            event_type: Event name.
+            handler: Callable taking the (latest) payload.
+            priority: Dispatch order when several types are pending (lower first).
+            lane: Run the event's handlers on this lane's worker thread
+                instead of the dispatcher (for handlers that block).
+        """
+        with self._cond:
+            self._handlers.setdefault(event_type, []).append(handler)
+            self._priority[event_type] = min(priority, self._priority.get(event_type, priority))
+            if lane is not None:
+                self._lane[event_type] = lane
+            self._stats.setdefault(event_type, _EventStats())
+
+    def add_timer(self, event_type: str, interval: float, immediate: bool = False):
+        """Publish *event_type* every *interval* seconds."""
+        with self._cond:
+            due = time.monotonic() + (0.0 if immediate else interval)
+            self._timers[event_type] = [interval, due]
+            self._cond.notify()
+
+    # ── Producers ─────────────────────────────────────────────────────────
+
+    def publish(self, event_type: str, payload: Any = None):
+        """Queue *event_type*, coalescing with an undispatched one. Thread-safe, O(1)."""
+        with self._cond:
+            stats = self._stats.get(event_type)
+            if stats is None:
+                # Nobody listens — don't let unused types accumulate
+                return
+            stats.published += 1
+            pending = self._pending.get(event_type)
+            if pending is not None:
+                stats.coalesced += 1
+                self._pending[event_type] = (pending[0], payload)
+            else:
+                self._pending[event_type] = (time.monotonic(), payload)
+            self._cond.notify()
+
+    # ── Dispatch ──────────────────────────────────────────────────────────
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        if self._pool is not None:
+            # A lane handler may be mid-request; don't wait for it
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    wait = self._fire_timers()
+                    ready = [t for t in self._pending if self._lane.get(t) not in self._busy_lanes]
+                    if ready:
+                        break
+                    self._cond.wait(wait)
+                if not self._running:
+                    return
+                round_types = sorted(ready, key=lambda t: self._priority.get(t, 10))
+            for event_type in round_types:
+                # Popped at dispatch time so the handler gets the newest payload
+                with self._cond:
+                    lane = self._lane.get(event_type)
+                    if lane in self._busy_lanes:
+                        continue        # taken by an earlier type of this round
+                    first_seen, payload = self._pending.pop(event_type)
+                    handlers = list(self._handlers.get(event_type, ()))
+                    if lane is not None:
+                        self._busy_lanes.add(lane)
+                if lane is None:
+                    self._dispatch(event_type, first_seen, payload, handlers)
+                else:
+                    if self._pool is None:
+                        self._pool = ThreadPoolExecutor(max_workers=max(len(set(self._lane.values())), 1),
+                                                        thread_name_prefix=f"{self.name}-lane")
+                    self._pool.submit(self._dispatch_lane, lane, event_type, first_seen, payload, handlers)
+
+    def _dispatch_lane(self, lane: str, event_type: str, first_seen: float, payload: Any,
+                       handlers: List[Callable]):
+        try:
+            self._dispatch(event_type, first_seen, payload, handlers)
+        finally:
+            with self._cond:
+                self._busy_lanes.discard(lane)
+                self._cond.notify()
+
+    def _fire_timers(self) -> Optional[float]:
+        """Publish due timers (lock held); return seconds until the next one."""
+        now = time.monotonic()
+        wait = None
+        for event_type, timer in self._timers.items():
+            interval, due = timer
+            if now >= due:
+                if event_type in self._stats and event_type not in self._pending:
+                    self._stats[event_type].published += 1
+                    self._pending[event_type] = (now, None)
+                timer[1] = due = now + interval
+            wait = due - now if wait is None else min(wait, due - now)
+        return wait
+
+    def _dispatch(self, event_type: str, first_seen: float, payload: Any, handlers: List[Callable]):
+        stats = self._stats[event_type]
+        start = time.monotonic()
+        stats.latency_ms.append((start - first_seen) * 1000)
+        for handler in handlers:
+            try:
+                handler(payload)
+            except Exception as e:
+                stats.errors += 1
+                logger.error("Handler %s for %s failed: %s", getattr(handler, '__name__', handler),
+                             event_type, e, exc_info=True)
+        stats.handler_ms.append((time.monotonic() - start) * 1000)
+        stats.dispatched += 1
+
+    # ── Metrics ───────────────────────────────────────────────────────────
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Per event type: counters and latency percentiles (ms) over recent dispatches."""
+        out = {}
+        with self._cond:
+            items = [(t, s, list(s.latency_ms), list(s.handler_ms)) for t, s in self._stats.items()]
+        for event_type, s, latency, handler in items:
+            row = {
+                'published': s.published,
+                'coalesced': s.coalesced,
+                'dispatched': s.dispatched,
+                'errors': s.errors,
+            }
+            if latency:
+                lat = np.asarray(latency)
+                run = np.asarray(handler)
+                row.update({
+                    'latency_p50_ms': round(float(np.percentile(lat, 50)), 3),
+                    'latency_p99_ms': round(float(np.percentile(lat, 99)), 3),
+                    'latency_max_ms': round(float(lat.max()), 3),
+                    'handler_p50_ms': round(float(np.percentile(run, 50)), 3),
+                    'handler_max_ms': round(float(run.max()), 3),
+                })
+            out[event_type] = row
+        return out
@@ -0,0 +1,381 @@
+"""
+Execution Algorithms for Parent Orders
+
+Works a large parent order as a series of child limit orders instead of
+one market order that walks the book:
+
+* ``twap``    — follows a linear schedule: by time *t* the parent should
+  be ``t / duration`` filled; each step sends what is behind schedule.
+* ``vwap``    — participates in the market: each step sends
+  ``participation`` × the volume traded since the start, minus what is
+  already filled, so fills track the market's volume profile.
+* ``iceberg`` — rests ``display_qty`` at the best same-side price and
+  replaces it when it fills or the touch moves away.
+
+TWAP and VWAP children are marketable limits sized from the live book:
+a child never takes more than ``depth_fraction`` of the visible size
+within ``max_slippage_bps`` of the mid, and is priced at the deepest level
+it needs. Whatever a child did not fill is cancelled at the next step and
+rescheduled. With ``complete_at_end`` the remainder is sent as a market
+order when ``duration`` runs out.
+
+Child quantities are floored to the instrument's ``qty_step``; a child
+below ``min_qty`` is not sent and its quantity stays behind schedule until
+a later step (or the final one) can send it.
+
+``ExecutionEngine`` runs all parents on its own thread, so the trade loop
+only submits and is called back when a parent finishes. Children go
+through the ``OrderManager``; ``ParentOrder.report()`` gives the average
+fill price against the arrival mid and the market VWAP over the
+execution window, in basis points (positive = worse than the benchmark).
+Market volume and VWAP come from the parent symbol's ``TradeFlow``.
+"""
+
+import logging
+import math
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from data_pipeline.trade_flow import TradeFlow
+from execution.order_manager import OrderManager
+
+logger = logging.getLogger(__name__)
+
+ALGOS = ('twap', 'vwap', 'iceberg')
+_EPS = 1e-9
+
+
+@dataclass
+class ParentOrder:
+    """A parent order, its parameters and its progress."""
+    symbol: str
+    side: str                           # 'buy' / 'sell'
+    qty: float
+    algo: str = 'twap'
+    duration: float = 60.0              # seconds
+    interval: float = 5.0               # seconds between steps
+    participation: float = 0.1          # vwap: fraction of market volume
+    display_qty: Optional[float] = None  # iceberg: visible size (default qty / 10)
+    max_slippage_bps: float = 5.0       # children never cross further from the mid
+    depth_fraction: float = 0.5         # share of the visible depth a child may take
+    complete_at_end: bool = True
+    qty_step: float = 0.001             # exchange quantity increment
+    min_qty: float = 0.001              # smallest child the exchange accepts
+    reduce_only: bool = False
+    strategy: str = 'algo'
+    on_done: Optional[Callable[['ParentOrder'], None]] = field(default=None, repr=False)
+
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    state: str = 'working'              # working → completing → done / cancelled
+    started: float = 0.0
+    finished: float = 0.0
+    next_step: float = 0.0
+    arrival_price: float = 0.0
+    children: List[str] = field(default_factory=list)      # child orderLinkIds
+    filled: float = 0.0
+    notional: float = 0.0
+    market_volume: float = 0.0
+    market_notional: float = 0.0
+    last_trade_ts: int = 0
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self.qty - self.filled)
+
+    def lot(self, qty: float) -> float:
+        """*qty* floored to a multiple of ``qty_step``."""
+        if self.qty_step <= 0:
+            return round(qty, 8)
+        return round(math.floor(qty / self.qty_step + 1e-9) * self.qty_step, 8)
+
+    @property
+    def avg_price(self) -> float:
+        return self.notional / self.filled if self.filled > 0 else 0.0
+
+    @property
+    def market_vwap(self) -> float:
+        return self.market_notional / self.market_volume if self.market_volume > 0 else 0.0
+
+    def _cost_bps(self, benchmark: float) -> Optional[float]:
+        if self.filled <= 0 or benchmark <= 0:
+            return None
+        sign = 1 if self.side == 'buy' else -1
+        return round(sign * (self.avg_price - benchmark) / benchmark * 1e4, 2)
+
+    def report(self) -> Dict:
+        return {
+            'algo': self.algo,
+            'side': self.side,
+            'qty': self.qty,
+            'filled': round(self.filled, 8),
+            'avg_price': round(self.avg_price, 4),
+            'arrival_price': round(self.arrival_price, 4),
+            'market_vwap': round(self.market_vwap, 4),
+            'slippage_vs_arrival_bps': self._cost_bps(self.arrival_price),
+            'slippage_vs_vwap_bps': self._cost_bps(self.market_vwap),
+            'children': len(self.children),
+            'seconds': round((self.finished or time.time()) - self.started, 1),
+            'state': self.state,
+        }
+
+
+class ExecutionEngine:
+    """
+    Background runner for parent orders.
+    """
+
+    def __init__(self, client, order_manager: OrderManager, clock: Callable[[], float] = time.time,
+                 trade_flows: Optional[Dict[str, TradeFlow]] = None):
+        """
+        Args:
+            client: BybitClient-compatible client (book, trades, orders).
+            order_manager: OrderManager the child orders are sent through.
+            clock: Time source in seconds.
+            trade_flows: Shared TradeFlow per symbol; a symbol without one
+                gets its own, attached to *client*.
+        """
+        self.client = client
+        self.order_manager = order_manager
+        self.clock = clock
+        self.trade_flows: Dict[str, TradeFlow] = dict(trade_flows or {})
+        self.parents: Dict[str, ParentOrder] = {}
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ── Control ────────────────────────────────────────────────────────────
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="execution-algos", daemon=True)
+        self._thread.start()
+
+    def stop(self, cancel_children: bool = True):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if cancel_children:
+            for parent in list(self.parents.values()):
+                self._cancel_open_children(parent)
+
+    def submit(self, parent: ParentOrder) -> ParentOrder:
+        """Start working *parent*; its first child goes out immediately."""
+        if parent.algo not in ALGOS:
+            raise ValueError(f"Unknown execution algorithm: {parent.algo}")
+        book = self.client.get_order_book(parent.symbol)
+        parent.arrival_price = _mid(book) or 0.0
+        parent.started = parent.next_step = self.clock()
+        parent.last_trade_ts = int(parent.started * 1000)
+        parent.display_qty = parent.display_qty or parent.qty / 10
+        with self._cond:
+            self.parents[parent.id] = parent
+            self._cond.notify()
+        logger.info("Parent %s: %s %s %.6f %s via %s over %.0fs (arrival %.2f)", parent.id, parent.algo.upper(),
+                    parent.side, parent.qty, parent.symbol, parent.strategy, parent.duration, parent.arrival_price)
+        return parent
+
+    def cancel(self, parent_id: str):
+        """Stop working a parent; what already filled stays filled."""
+        with self._cond:
+            parent = self.parents.get(parent_id)
+        if parent is not None:
+            self._cancel_open_children(parent)
+            self._finish(parent, 'cancelled')
+
+    def active(self, symbol: Optional[str] = None) -> List[ParentOrder]:
+        with self._cond:
+            return [p for p in self.parents.values() if symbol is None or p.symbol == symbol]
+
+    # ── Loop ───────────────────────────────────────────────────────────────
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    now = self.clock()
+                    due = [p for p in self.parents.values() if p.next_step <= now]
+                    if due:
+                        break
+                    wait = min((p.next_step - now for p in self.parents.values()), default=None)
+                    self._cond.wait(wait)
+                if not self._running:
+                    return
+            for parent in due:
+                try:
+                    self.step(parent)
+                except Exception as e:
+                    logger.error("Parent %s step failed: %s", parent.id, e, exc_info=True)
+                parent.next_step = self.clock() + parent.interval
+
+    def step(self, parent: ParentOrder):
+        """Advance *parent* by one step (public for synchronous use and replay)."""
+        now = self.clock()
+        open_children = self._update_fills(parent)
+        self._update_market(parent)
+
+        # A remainder below the minimum order size can never be sent
+        unsendable = parent.lot(parent.remaining) < parent.min_qty - _EPS and not open_children
+        if parent.remaining <= _EPS or unsendable or (parent.state == 'completing' and not open_children):
+            self._finish(parent, 'done')
+            return
+
+        if parent.state == 'completing':
+            return              # the final market order is still being confirmed
+
+        book = self.client.get_order_book(parent.symbol)
+        expired = now >= parent.started + parent.duration
+        if parent.algo == 'iceberg' and not expired:
+            best = _best(book, parent.side)
+            if open_children and all(self.order_manager.get(c).price == best for c in open_children):
+                return          # still resting at the touch
+        self._cancel_open_children(parent)
+        # Children whose cancel did not go through may still fill
+        open_qty = sum(self.order_manager.get(c).remaining for c in self._open_children(parent))
+
+        if expired:
+            final = parent.lot(parent.remaining - open_qty)
+            if parent.complete_at_end and final > _EPS and final >= parent.min_qty - _EPS:
+                self._send(parent, final, None)
+                parent.state = 'completing'
+            else:
+                self._finish(parent, 'done')
+            return
+
+        qty = self._target(parent, now) - parent.filled - open_qty
+        qty = min(qty, parent.remaining - open_qty)
+        if qty <= _EPS:
+            return
+        if parent.algo == 'iceberg':
+            price = _best(book, parent.side)
+        else:
+            qty, price = _size_from_depth(book, parent.side, qty, parent.max_slippage_bps, parent.depth_fraction)
+        qty = parent.lot(qty)
+        if price is not None and qty > _EPS and qty >= parent.min_qty - _EPS:
+            self._send(parent, qty, price)
+
+    def _target(self, parent: ParentOrder, now: float) -> float:
+        """Cumulative quantity the parent should have sent by the end of this step."""
+        if parent.algo == 'twap':
+            elapsed = now - parent.started + parent.interval
+            return parent.qty * min(1.0, elapsed / parent.duration) if parent.duration > 0 else parent.qty
+        if parent.algo == 'vwap':
+            return min(parent.qty, parent.participation * parent.market_volume)
+        return parent.filled + min(parent.display_qty, parent.remaining)
+
+    # ── Children ───────────────────────────────────────────────────────────
+
+    def _send(self, parent: ParentOrder, qty: float, price: Optional[float]):
+        order_type = 'Limit' if price is not None else 'Market'
+        child = self.order_manager.submit(parent.symbol, parent.side.upper(), qty, order_type=order_type,
+                                          price=price, reduce_only=parent.reduce_only, strategy=parent.strategy)
+        parent.children.append(child.link_id)
+        logger.debug("Parent %s child %s: %s %.6f @ %s", parent.id, child.link_id, order_type, qty, price or 'market')
+
+    def _open_children(self, parent: ParentOrder) -> List[str]:
+        return [c for c in parent.children if self.order_manager.get(c) is not None and self.order_manager.get(c).is_open]
+
+    def _update_fills(self, parent: ParentOrder) -> List[str]:
+        """Recompute the parent's fills from its children; returns the open ones."""
+        open_children = self._open_children(parent)
+        if not self.order_manager.streaming:
+            # No stream updates — look up the children that may have changed
+            for link_id in open_children:
+                rows = self.client.get_order_rows(parent.symbol, order_link_id=link_id)
+                if rows:
+                    self.order_manager.on_order_update(rows[0])
+            open_children = self._open_children(parent)
+        filled = notional = 0.0
+        for link_id in parent.children:
+            child = self.order_manager.get(link_id)
+            if child is not None and child.filled > 0:
+                filled += child.filled
+                notional += child.filled * child.avg_price
+        parent.filled, parent.notional = filled, notional
+        return open_children
+
+    def _cancel_open_children(self, parent: ParentOrder):
+        open_children = self._open_children(parent)
+        if open_children:
+            self.order_manager.cancel_batch(open_children)
+
+    def _trade_flow(self, symbol: str) -> TradeFlow:
+        flow = self.trade_flows.get(symbol)
+        if flow is None:
+            flow = self.trade_flows[symbol] = TradeFlow(symbol, clock=self.clock)
+            flow.attach(self.client)
+        return flow
+
+    def _update_market(self, parent: ParentOrder):
+        """Add the symbol's trades printed since the last step to the window's volume and VWAP."""
+        flow = self._trade_flow(parent.symbol)
+        if not flow.streaming:
+            flow.poll(self.client)
+        volume, notional, last = flow.since(parent.last_trade_ts)
+        parent.market_volume += volume
+        parent.market_notional += notional
+        parent.last_trade_ts = last
+
+    def _finish(self, parent: ParentOrder, state: str):
+        with self._cond:
+            if self.parents.pop(parent.id, None) is None:
+                return
+        parent.state = state
+        parent.finished = self.clock()
+        logger.info("Parent %s %s: %s", parent.id, state, parent.report())
+        if parent.on_done is not None:
+            try:
+                parent.on_done(parent)
+            except Exception as e:
+                logger.error("Parent %s completion callback failed: %s", parent.id, e, exc_info=True)
+
+
+# ── Book helpers ───────────────────────────────────────────────────────────
+
+def _mid(book: Dict) -> Optional[float]:
+    if not book or not book.get('b') or not book.get('a'):
+        return None
+    return (float(book['b'][0][0]) + float(book['a'][0][0])) / 2
+
+
+def _best(book: Dict, side: str) -> Optional[float]:
+    """Best same-side price (where a passive child rests)."""
+    levels = book.get('b' if side == 'buy' else 'a') if book else None
+    return float(levels[0][0]) if levels else None
+
+
+def _size_from_depth(book: Dict, side: str, qty: float, max_slippage_bps: float,
+                     depth_fraction: float) -> Tuple[float, Optional[float]]:
+    """Cap *qty* by the opposite-side depth within the slippage band.
+
+    Returns:
+        (child qty, limit price of the deepest level it needs), or
+        (0, None) if nothing is available within the band.
+    """
+    mid = _mid(book)
+    if mid is None:
+        return 0.0, None
+    levels = book['a'] if side == 'buy' else book['b']
+    band = mid * max_slippage_bps / 1e4
+    available = []
+    for price, size in levels:
+        price, size = float(price), float(size)
+        if (side == 'buy' and price > mid + band) or (side == 'sell' and price < mid - band):
+            break
+        available.append((price, size))
+    depth = sum(size for _, size in available)
+    qty = min(qty, depth * depth_fraction)
+    if qty <= _EPS:
+        return 0.0, None
+    cumulative = 0.0
+    for price, size in available:
+        cumulative += size * depth_fraction
+        if cumulative >= qty - _EPS:
+            return qty, price
+    return qty, available[-1][0]
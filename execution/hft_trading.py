@@ -7,7 +7,10 @@ Uses the centralized BybitClient WebSocket data — no duplicate connections.
 
 import logging
 import time
-from typing import Optional
+from typing import Callable, Optional
+
+from analysis.microstructure import MicrostructureFeatures
+from execution.order_manager import REJECTED, OrderManager
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +31,11 @@ class HFTTrading:
         risk_components: Optional[dict] = None,
         spread_threshold: float = 0.0002,
         order_size: float = 0.001,
+        clock: Callable[[], float] = time.time,
+        features: Optional[MicrostructureFeatures] = None,
+        order_manager: Optional[OrderManager] = None,
+        strategy: str = 'hft',
+        fill_timeout: float = 2.0,
     ):
         """
         Args:
@@ -37,6 +45,12 @@ class HFTTrading:
             risk_components: Shared risk components dict.
             spread_threshold: Min spread (%) to attempt a trade.
             order_size: BTC per HFT order.
+            clock: Time source in seconds (a simulated clock when replaying).
+            features: Shared microstructure feature store (optional).
+            order_manager: Shared OrderManager; orders are sent, tracked
+                and confirmed through it (a private one if not given).
+            strategy: Tag in this strategy's ``orderLinkId``s.
+            fill_timeout: Seconds to wait for a fill on the private stream.
         """
         self.client = client
         self.symbol = symbol
@@ -44,6 +58,11 @@ class HFTTrading:
         self.risk_components = risk_components or {}
         self.spread_threshold = spread_threshold
         self.order_size = order_size
+        self.clock = clock
+        self.features = features or MicrostructureFeatures(symbol)
+        self.order_manager = order_manager or OrderManager(client)
+        self.strategy = strategy
+        self.fill_timeout = fill_timeout
         self.running = False
         self._last_trade_time = 0
         logger.info("HFT initialized for %s (spread >= %.4f%%)", symbol, spread_threshold * 100)
@@ -63,49 +82,30 @@ class HFTTrading:
             return None
 
         # Rate limit: max one HFT trade per 5 seconds
-        if time.time() - self._last_trade_time < 5:
+        if self.clock() - self._last_trade_time < 5:
             return None
 
         try:
-            book = self.client.get_order_book(self.symbol)
-            if not book or 'b' not in book or 'a' not in book:
-                return None
-
-            bids = book['b'][:5]
-            asks = book['a'][:5]
-            if not bids or not asks:
+            features = self.features.get(self.client)
+            if features is None:
                 return None
 
-            best_bid = float(bids[0][0])
-            best_ask = float(asks[0][0])
-            spread_pct = (best_ask - best_bid) / best_bid
+            spread_pct = features['spread_pct'] / 100
 
             if spread_pct < self.spread_threshold:
                 logger.debug("HFT: spread %.4f%% below threshold", spread_pct * 100)
                 return None
 
-            # Calculate pressure: bid volume vs ask volume at top levels
-            bid_vol = sum(float(b[1]) for b in bids)
-            ask_vol = sum(float(a[1]) for a in asks)
-            total = bid_vol + ask_vol
-            if total == 0:
-                return None
-
-            pressure = (bid_vol - ask_vol) / total  # -1 to 1
+            # Pressure: bid volume vs ask volume at the top 5 levels
+            pressure = features['imbalance_5']  # -1 to 1
 
             # Only trade with conviction
             if pressure > 0.3:
                 logger.info("HFT BUY signal: spread=%.4f%% pressure=%.3f", spread_pct * 100, pressure)
-                order = self.client.place_order(self.symbol, self.order_size, "BUY", order_type="Market")
-                if order and 'id' in order:
-                    self._last_trade_time = time.time()
-                    return "buy"
+                return "buy" if self._trade("BUY") else None
             elif pressure < -0.3:
                 logger.info("HFT SELL signal: spread=%.4f%% pressure=%.3f", spread_pct * 100, pressure)
-                order = self.client.place_order(self.symbol, self.order_size, "SELL", order_type="Market")
-                if order and 'id' in order:
-                    self._last_trade_time = time.time()
-                    return "sell"
+                return "sell" if self._trade("SELL") else None
 
             return None
 
@@ -113,6 +113,17 @@ class HFTTrading:
             logger.error("HFT execution error: %s", e, exc_info=True)
             return None
 
+    def _trade(self, side: str) -> bool:
+        """Send a market order through the OrderManager; True once it executed."""
+        order = self.order_manager.submit(self.symbol, side, self.order_size, order_type="Market",
+                                          strategy=self.strategy)
+        if order.state == REJECTED:
+            logger.warning("HFT %s rejected: %s", side, order.reason)
+            return False
+        # Sent, even if not confirmed yet — don't stack another order on it
+        self._last_trade_time = self.clock()
+        return self.order_manager.confirm_fill(order.link_id, timeout=self.fill_timeout)
+
 
 if __name__ == "__main__":
     from dotenv import load_dotenv
@@ -3,14 +3,187 @@ Market Making Execution Module
 
 Places bid and ask limit orders around the mid-price to capture the spread.
 Includes order tracking, cancellation of stale orders, and inventory management.
+
+Quotes are kept by ``QuoteManager``, which diffs the desired bid/ask
+against the live orders: unchanged quotes (within ``requote_ticks``) are
+left alone, moved quotes are amended in place, and creates, amends and
+cancels each go out as one batch request. A requote therefore costs at
+most three round trips instead of cancel-everything-and-replace, and a
+quote that only shrinks keeps its queue priority.
 """
 
 import logging
-import time
-from typing import Optional, Dict, List
+import math
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Tuple
+
+from analysis.microstructure import MicrostructureFeatures
+from data_pipeline.batch_orders import REQUEST_FAILED
 
 logger = logging.getLogger(__name__)
 
+SIDES = ('buy', 'sell')
+
+# Per-order errors meaning the order is no longer on the book (Bybit 110001 / 110008)
+_GONE_MARKERS = ('not exist', 'too late', 'finished or cancel')
+
+
+def _order_gone(msg: str) -> bool:
+    """True if a failed amend's message says the order already filled or was cancelled."""
+    msg = (msg or '').lower()
+    return msg != REQUEST_FAILED and any(marker in msg for marker in _GONE_MARKERS)
+
+
+@dataclass
+class LiveQuote:
+    """One of our resting orders as last sent to the exchange."""
+    order_id: str
+    price: float
+    qty: float
+
+
+class QuoteManager:
+    """
+    Maintains at most one resting limit order per side with minimal API calls.
+    """
+
+    def __init__(self, client, symbol: str, tick_size: float = 0.1, requote_ticks: int = 1,
+                 size_tolerance: float = 0.0, order_manager=None, strategy: str = 'mm'):
+        """
+        Args:
+            client: BybitClient-compatible client with the batch order calls.
+            symbol: Trading pair.
+            tick_size: Price increment of the symbol.
+            requote_ticks: Price moves smaller than this many ticks are ignored.
+            size_tolerance: Relative size change ignored (0.1 = 10%).
+            order_manager: Optional OrderManager; quotes are then sent with
+                client order IDs and checked against its order states.
+            strategy: Tag of this manager's orders in the OrderManager.
+        """
+        self.client = client
+        self.order_manager = order_manager
+        self.strategy = strategy
+        self.symbol = symbol
+        self.tick_size = tick_size
+        self.requote_ticks = requote_ticks
+        self.size_tolerance = size_tolerance
+        self.live: Dict[str, LiveQuote] = {}
+        self.stats = {'created': 0, 'amended': 0, 'cancelled': 0, 'unchanged': 0, 'requests': 0}
+
+    @property
+    def order_ids(self) -> List[str]:
+        return [q.order_id for q in self.live.values()]
+
+    def sync(self, desired: Dict[str, Optional[Tuple[float, float]]]):
+        """Bring the live orders in line with *desired* (side → (price, qty) or None)."""
+        if self.order_manager is not None:
+            self._reconcile()
+        creates: List[Tuple[str, float, float]] = []
+        amends: List[Tuple[str, Optional[float], Optional[float]]] = []
+        cancels: List[str] = []
+        for side in SIDES:
+            want, have = desired.get(side), self.live.get(side)
+            if want is None or want[1] <= 0:
+                if have is not None:
+                    cancels.append(side)
+                continue
+            price, qty = want
+            if have is None:
+                creates.append((side, price, qty))
+                continue
+            moved = abs(price - have.price) >= self.requote_ticks * self.tick_size - 1e-9
+            resized = abs(qty - have.qty) > self.size_tolerance * have.qty + 1e-12
+            if not moved and not resized:
+                self.stats['unchanged'] += 1
+                continue
+            amends.append((side, price if moved else None, qty if resized else None))
+
+        if cancels:
+            self._cancel(cancels)
+        if amends:
+            # Quotes that filled or were cancelled meanwhile come back for re-creation
+            creates += self._amend(amends)
+        if creates:
+            self._create(creates)
+
+    def cancel_all(self):
+        if self.live:
+            self._cancel(list(self.live))
+
+    def _reconcile(self):
+        """Drop quotes the OrderManager saw finish; adopt open ones we lost track of."""
+        for side in SIDES:
+            quote = self.live.get(side)
+            if quote is not None:
+                order = self.order_manager.get(quote.order_id)
+                if order is not None and not order.is_open:
+                    del self.live[side]
+                continue
+            # e.g. a create whose response was lost, resolved later by the stream
+            for order in self.order_manager.open_orders(self.symbol, side):
+                if order.strategy == self.strategy and order.order_id and order.price:
+                    self.live[side] = LiveQuote(order.order_id, order.price, order.remaining)
+                    break
+
+    def _create(self, creates: List[Tuple[str, float, float]]):
+        self.stats['requests'] += 1
+        orders = [{'side': side.upper(), 'qty': qty, 'order_type': 'Limit', 'price': price}
+                  for side, price, qty in creates]
+        if self.order_manager is not None:
+            results = [{'id': o.order_id, 'success': o.order_id is not None, 'msg': o.reason}
+                       for o in self.order_manager.submit_batch(self.symbol, orders, strategy=self.strategy)]
+        else:
+            results = self.client.place_batch_orders(self.symbol, orders)
+        for (side, price, qty), result in zip(creates, results):
+            if result['success']:
+                self.live[side] = LiveQuote(result['id'], price, qty)
+                self.stats['created'] += 1
+            else:
+                logger.warning("Quote %s %.6f @ %.2f rejected: %s", side, qty, price, result['msg'])
+
+    def _amend(self, amends: List[Tuple[str, Optional[float], Optional[float]]]) -> List[Tuple[str, float, float]]:
+        self.stats['requests'] += 1
+        results = self.client.amend_batch_orders(self.symbol, [
+            {'order_id': self.live[side].order_id, 'qty': qty, 'price': price}
+            for side, price, qty in amends
+        ])
+        replace = []
+        for (side, price, qty), result in zip(amends, results):
+            quote = self.live[side]
+            if result['success']:
+                quote.price = price if price is not None else quote.price
+                quote.qty = qty if qty is not None else quote.qty
+                self.stats['amended'] += 1
+                if self.order_manager is not None:
+                    self.order_manager.record_amend(quote.order_id, qty, price)
+            elif _order_gone(result['msg']):
+                # Filled or cancelled meanwhile — quote it again
+                del self.live[side]
+                replace.append((side, price if price is not None else quote.price,
+                                qty if qty is not None else quote.qty))
+            else:
+                # A failed request (or a rejected new price/size) leaves the
+                # order resting as it was — keep it and amend again next time
+                logger.warning("Amend of %s quote %s failed (%s) — will retry",
+                               side, quote.order_id, result['msg'])
+        return replace
+
+    def _cancel(self, sides: List[str]):
+        self.stats['requests'] += 1
+        order_ids = [self.live[side].order_id for side in sides]
+        if self.order_manager is not None:
+            results = self.order_manager.cancel_batch(order_ids)
+        else:
+            results = self.client.cancel_batch_orders(self.symbol, order_ids)
+        for side, result in zip(sides, results):
+            # A per-order error means the order is already gone; a failed
+            # request leaves it live, so keep it and cancel again next time
+            if result['success'] or result['msg'] != REQUEST_FAILED:
+                del self.live[side]
+                self.stats['cancelled'] += 1
+            else:
+                logger.warning("Cancel of %s quote %s failed — will retry", side, self.live[side].order_id)
+
 
 class MarketMaker:
     """
@@ -29,6 +202,10 @@ class MarketMaker:
         position_info: Optional[dict] = None,
         risk_components: Optional[dict] = None,
         max_inventory_ratio: float = 0.5,
+        tick_size: float = 0.1,
+        requote_ticks: int = 1,
+        order_manager=None,
+        features: Optional[MicrostructureFeatures] = None,
     ):
         """
         Args:
@@ -39,40 +216,48 @@ class MarketMaker:
             position_info: Shared position info.
             risk_components: Shared risk components.
             max_inventory_ratio: Max net inventory relative to base size.
+            tick_size: Price increment; quotes are rounded away from the mid.
+            requote_ticks: Quote moves smaller than this are not sent.
+            order_manager: Shared OrderManager (optional).
+            features: Shared microstructure feature store (optional).
         """
         self.client = client
         self.symbol = symbol
+        self.features = features or MicrostructureFeatures(symbol)
         self.spread = spread
         self.base_size = size
         self.position_info = position_info or {}
         self.risk_components = risk_components or {}
         self.max_inventory_ratio = max_inventory_ratio
+        self.tick_size = tick_size
 
-        # Track our own orders so we can cancel stale ones
-        self.open_order_ids: List[str] = []
+        # Tracks our own orders so stale ones are amended or cancelled
+        self.quotes = QuoteManager(client, symbol, tick_size=tick_size, requote_ticks=requote_ticks,
+                                   order_manager=order_manager)
         self.running = False
         logger.info(
             "MarketMaker initialized for %s: spread=%.4f%% size=%.4f",
             symbol, spread * 200, size
         )
 
+    @property
+    def open_order_ids(self) -> List[str]:
+        return self.quotes.order_ids
+
     def cancel_all_orders(self):
         """Cancel all tracked open orders."""
-        for order_id in list(self.open_order_ids):
-            try:
-                self.client.cancel_order(self.symbol, order_id)
-                logger.debug("Cancelled order %s", order_id)
-            except Exception as e:
-                logger.debug("Order %s already filled/cancelled: %s", order_id, e)
-        self.open_order_ids.clear()
+        try:
+            self.quotes.cancel_all()
+        except Exception as e:
+            logger.debug("Cancel of tracked orders failed: %s", e)
 
     def execute_market_making(self):
         """
-        Place bid and ask orders around the mid-price.
+        Quote bid and ask orders around the mid-price.
 
-        1. Cancel existing orders
-        2. Check inventory limits
-        3. Place new bid and ask orders
+        1. Check inventory limits
+        2. Compute the desired bid and ask
+        3. Amend, create or keep the live orders to match
         """
         # Check if we already have a directional position
         current_position = self.position_info.get('size', 0)
@@ -82,20 +267,11 @@ class MarketMaker:
             return
 
         try:
-            book = self.client.get_order_book(self.symbol)
-            if not book or 'b' not in book or 'a' not in book:
+            features = self.features.get(self.client)
+            if features is None:
                 return
 
-            best_bid = float(book['b'][0][0]) if book['b'] else None
-            best_ask = float(book['a'][0][0]) if book['a'] else None
-
-            if not best_bid or not best_ask:
-                return
-
-            mid = (best_bid + best_ask) / 2
-
-            # Cancel old orders before placing new ones
-            self.cancel_all_orders()
+            mid = features['mid']
 
             # Apply position sizing from risk management if available
             size = self.base_size
@@ -105,22 +281,11 @@ class MarketMaker:
                 except Exception:
                     pass
 
-            bid_price = round(mid * (1 - self.spread), 2)
-            ask_price = round(mid * (1 + self.spread), 2)
-
-            # Place bid
-            bid_order = self.client.place_order(
-                self.symbol, size, "BUY", order_type="Limit", price=bid_price
-            )
-            if bid_order and 'id' in bid_order:
-                self.open_order_ids.append(bid_order['id'])
+            tick = self.tick_size
+            bid_price = round(math.floor(mid * (1 - self.spread) / tick + 1e-9) * tick, 8)
+            ask_price = round(math.ceil(mid * (1 + self.spread) / tick - 1e-9) * tick, 8)
 
-            # Place ask
-            ask_order = self.client.place_order(
-                self.symbol, size, "SELL", order_type="Limit", price=ask_price
-            )
-            if ask_order and 'id' in ask_order:
-                self.open_order_ids.append(ask_order['id'])
+            self.quotes.sync({'buy': (bid_price, size), 'sell': (ask_price, size)})
 
             logger.info(
                 "Market making: bid=%.2f ask=%.2f mid=%.2f spread=%.4f%%",
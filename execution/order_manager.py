@@ -0,0 +1,420 @@
+"""
+Local Order Manager
+
+Tracks every order the system sends in an indexed in-memory table, so
+strategies stop treating "the REST call returned an id" as "filled" and
+stop re-listing open orders over REST.
+
+* Each submission gets a client ``orderLinkId`` before it is sent. The
+  client retries with the same id, and Bybit rejects a duplicate id, so a
+  retried placement can never create a second order.
+* State machine per order::
+
+      PendingNew ──► New ──► PartiallyFilled ──► Filled
+          │           │             │
+          ▼           ▼             ▼
+       Rejected   Cancelled     Cancelled
+
+  ``PendingNew`` means sent but not yet acknowledged (or the
+  acknowledgement was lost). Transitions come from the private
+  ``order``/``execution`` streams (client listener events) or from REST
+  responses, and never move an order backwards.
+* Lookups are O(1): by ``orderLinkId`` or exchange ``orderId``
+  (``get``), and open orders by ``(symbol, side)`` (``open_orders``).
+* Reconciliation: ``load_open_orders()`` reads the exchange's open orders
+  once (start-up, reconnect); afterwards the table is kept current from
+  the streams. ``resolve_pending()`` looks up only the submissions whose
+  outcome is still unknown.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from data_pipeline.batch_orders import REQUEST_FAILED
+
+logger = logging.getLogger(__name__)
+
+# Order states
+PENDING_NEW = 'PendingNew'
+NEW = 'New'
+PARTIALLY_FILLED = 'PartiallyFilled'
+FILLED = 'Filled'
+CANCELLED = 'Cancelled'
+REJECTED = 'Rejected'
+
+OPEN_STATES = {PENDING_NEW, NEW, PARTIALLY_FILLED}
+FINAL_STATES = {FILLED, CANCELLED, REJECTED}
+_RANK = {PENDING_NEW: 0, NEW: 1, PARTIALLY_FILLED: 2, FILLED: 3, CANCELLED: 3, REJECTED: 3}
+
+# Bybit v5 orderStatus → local state
+_EXCHANGE_STATES = {
+    'Created': PENDING_NEW,
+    'New': NEW,
+    'Untriggered': NEW,
+    'Triggered': NEW,
+    'PartiallyFilled': PARTIALLY_FILLED,
+    'Filled': FILLED,
+    'Cancelled': CANCELLED,
+    'PartiallyFilledCanceled': CANCELLED,
+    'Deactivated': CANCELLED,
+    'Rejected': REJECTED,
+}
+
+
+def _float(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass
+class ManagedOrder:
+    """One order in the local table."""
+    link_id: str
+    symbol: str
+    side: str                       # 'buy' / 'sell'
+    qty: float
+    order_type: str                 # 'market' / 'limit'
+    price: Optional[float] = None
+    reduce_only: bool = False
+    strategy: str = ''
+    order_id: Optional[str] = None
+    state: str = PENDING_NEW
+    filled: float = 0.0
+    avg_price: float = 0.0
+    reason: str = ''
+    created: float = field(default_factory=time.time)
+    updated: float = field(default_factory=time.time)
+    fills: Dict[str, Tuple[float, float]] = field(default_factory=dict)   # execId → (qty, price)
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self.qty - self.filled)
+
+    @property
+    def is_open(self) -> bool:
+        return self.state in OPEN_STATES
+
+
+class OrderManager:
+    """
+    Indexed order table fed by REST acknowledgements and the private streams.
+    """
+
+    def __init__(self, client, prefix: str = 'atb', max_closed: int = 1000):
+        """
+        Args:
+            client: BybitClient-compatible client. Its listener events keep
+                the table current while the private stream is up.
+            prefix: ``orderLinkId`` prefix identifying this system's orders.
+            max_closed: Finished orders kept for lookups before eviction.
+        """
+        self.client = client
+        self.prefix = prefix
+        self._orders: Dict[str, ManagedOrder] = {}          # link id → order
+        self._by_order_id: Dict[str, str] = {}              # exchange id → link id
+        self._open: Dict[Tuple[str, str], Dict[str, ManagedOrder]] = {}
+        self._closed: deque = deque()
+        self.max_closed = max_closed
+        self._cond = threading.Condition(threading.RLock())
+        if hasattr(client, 'add_listener'):
+            client.add_listener(self._on_client_event)
+
+    # ── Lookups ────────────────────────────────────────────────────────────
+
+    def new_link_id(self, strategy: str = '') -> str:
+        """Unique ``orderLinkId`` (Bybit allows at most 36 characters)."""
+        tag = ''.join(c for c in strategy if c.isalnum())[:8]
+        return f"{self.prefix}-{tag}-{uuid.uuid4().hex[:20]}" if tag else f"{self.prefix}-{uuid.uuid4().hex[:24]}"
+
+    def strategy_of(self, link_id: str) -> str:
+        """Strategy tag encoded in one of this system's ``orderLinkId``s ('' if untagged).
+
+        The tag is the cleaned, truncated name ``new_link_id`` embedded —
+        the full strategy name when it is at most 8 alphanumerics.
+        """
+        parts = link_id[len(self.prefix) + 1:].split('-')
+        return parts[0] if len(parts) == 2 else ''
+
+    def get(self, key: str) -> Optional[ManagedOrder]:
+        """Order by ``orderLinkId`` or exchange ``orderId``."""
+        with self._cond:
+            order = self._orders.get(key)
+            if order is None and key in self._by_order_id:
+                order = self._orders.get(self._by_order_id[key])
+            return order
+
+    def open_orders(self, symbol: str, side: Optional[str] = None) -> List[ManagedOrder]:
+        """Open orders for *symbol* (and *side*), from the local table."""
+        with self._cond:
+            if side is not None:
+                return list(self._open.get((symbol, side.lower()), {}).values())
+            return [o for s in ('buy', 'sell') for o in self._open.get((symbol, s), {}).values()]
+
+    @property
+    def streaming(self) -> bool:
+        """True while the client's private stream keeps the table current."""
+        account = getattr(self.client, 'account', None)
+        return bool(account is not None and account.live)
+
+    # ── Submission ─────────────────────────────────────────────────────────
+
+    def submit(self, symbol: str, side: str, qty: float, order_type: str = "Market",
+               price: Optional[float] = None, reduce_only: bool = False, strategy: str = '') -> ManagedOrder:
+        """Register and send one order.
+
+        Returns:
+            The managed order. ``REJECTED`` if the exchange refused it;
+            ``PENDING_NEW`` if the outcome is unknown (resolved later by the
+            stream or ``resolve_pending``).
+        """
+        order = self._register(symbol, side, qty, order_type, price, reduce_only, strategy)
+        response = self.client.place_order(symbol, qty, side, order_type=order_type, price=price,
+                                           reduce_only=reduce_only, order_link_id=order.link_id)
+        with self._cond:
+            if response and response.get('id'):
+                self._bind(order, response['id'])
+                self._transition(order, NEW)
+            else:
+                logger.warning("Order %s not acknowledged — awaiting stream/lookup", order.link_id)
+        return order
+
+    def submit_batch(self, symbol: str, orders: List[Dict], strategy: str = '') -> List[ManagedOrder]:
+        """Register and send several orders in batch requests.
+
+        Args:
+            symbol: Trading pair.
+            orders: Dicts as for ``client.place_batch_orders`` (``side``,
+                ``qty``, ``order_type``, ``price``, ``reduce_only``).
+        """
+        managed = [self._register(symbol, o['side'], o['qty'], o.get('order_type', 'Limit'), o.get('price'),
+                                  o.get('reduce_only', False), strategy) for o in orders]
+        results = self.client.place_batch_orders(
+            symbol, [dict(o, order_link_id=m.link_id) for o, m in zip(orders, managed)])
+        with self._cond:
+            for order, result in zip(managed, results):
+                if result['success']:
+                    self._bind(order, result['id'])
+                    self._transition(order, NEW)
+                elif result['msg'] != REQUEST_FAILED:
+                    order.reason = result['msg']
+                    self._transition(order, REJECTED)
+        return managed
+
+    def cancel(self, key: str) -> bool:
+        """Cancel an open order. Returns False if it is unknown or the cancel failed."""
+        order = self.get(key)
+        if order is None or not order.is_open or order.order_id is None:
+            return False
+        response = self.client.cancel_order(order.symbol, order.order_id)
+        if response:
+            self._confirm_cancel(order)
+        return bool(response)
+
+    def cancel_batch(self, keys: List[str]) -> List[Dict]:
+        """Cancel several open orders of one symbol in batch requests.
+
+        Returns:
+            One ``{'id', 'success', 'msg'}`` per key, in order.
+        """
+        orders = [self.get(k) for k in keys]
+        targets = [o for o in orders if o is not None and o.is_open and o.order_id is not None]
+        results = {}
+        if targets:
+            for order, result in zip(targets, self.client.cancel_batch_orders(
+                    targets[0].symbol, [o.order_id for o in targets])):
+                if result['success']:
+                    self._confirm_cancel(order)
+                results[order.link_id] = result
+        return [results.get(o.link_id) if o is not None and o.link_id in results
+                else {'id': k, 'success': False, 'msg': 'not open'} for k, o in zip(keys, orders)]
+
+    def record_amend(self, key: str, qty: Optional[float] = None, price: Optional[float] = None):
+        """Apply an acknowledged amend to the local copy."""
+        with self._cond:
+            order = self.get(key)
+            if order is not None and order.is_open:
+                order.qty = qty if qty is not None else order.qty
+                order.price = price if price is not None else order.price
+                order.updated = time.time()
+
+    def wait_for_fill(self, key: str, timeout: float = 2.0) -> Optional[ManagedOrder]:
+        """Block until the order is filled or final (or *timeout*). Returns the order.
+
+        Without a live private stream nothing would update it, so this
+        returns at once.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            order = self.get(key)
+            while self.streaming and order is not None and not (order.state in FINAL_STATES or
+                                             (order.filled > 0 and order.remaining <= 1e-12)):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return order
+
+    def confirm_fill(self, key: str, timeout: float = 2.0) -> bool:
+        """Wait for the order's fills and report whether it executed.
+
+        True if a fill was reported, or if the order was acknowledged while
+        no private stream could report one. False if it was rejected,
+        cancelled unfilled, never acknowledged, or acknowledged without a
+        fill from the live stream within *timeout*.
+        """
+        order = self.wait_for_fill(key, timeout=timeout)
+        if order is None:
+            return False
+        if order.filled > 0:
+            return True
+        if order.state in (PENDING_NEW, REJECTED, CANCELLED):
+            return False
+        if self.streaming:
+            logger.warning("Order %s acknowledged but no fill within %.1fs — not assuming one",
+                           order.link_id, timeout)
+            return False
+        return True
+
+    # ── Reconciliation ─────────────────────────────────────────────────────
+
+    def load_open_orders(self, symbol: str) -> int:
+        """Adopt the exchange's open orders for *symbol* (one REST call).
+
+        Orders this system placed in an earlier run are recognised by their
+        ``orderLinkId`` prefix and adopted under the strategy tag embedded
+        in it; locally open orders the exchange no longer lists are marked
+        cancelled.
+        """
+        rows = self.client.get_order_rows(symbol)
+        if rows is None:
+            return 0
+        listed = set()
+        with self._cond:
+            for row in rows:
+                link_id = row.get('orderLinkId') or ''
+                if not link_id.startswith(self.prefix + '-'):
+                    continue
+                listed.add(link_id)
+                if link_id not in self._orders:
+                    self._register(symbol, row.get('side', ''), _float(row.get('qty')),
+                                   row.get('orderType', 'Limit'), _float(row.get('price')) or None,
+                                   bool(row.get('reduceOnly')), self.strategy_of(link_id), link_id=link_id)
+                self.on_order_update(row)
+            for order in self.open_orders(symbol):
+                if order.link_id not in listed and order.state != PENDING_NEW:
+                    order.reason = 'not open on exchange'
+                    self._transition(order, CANCELLED)
+        return len(listed)
+
+    def resolve_pending(self, min_age: float = 5.0) -> int:
+        """Look up submissions still ``PENDING_NEW`` after *min_age* seconds."""
+        now = time.time()
+        with self._cond:
+            pending = [o for o in self._orders.values() if o.state == PENDING_NEW and now - o.created >= min_age]
+        resolved = 0
+        for order in pending:
+            rows = self.client.get_order_rows(order.symbol, order_link_id=order.link_id)
+            if rows is None:
+                continue
+            with self._cond:
+                if rows:
+                    self.on_order_update(rows[0])
+                else:
+                    # Bybit has no order with this link id — it never arrived
+                    order.reason = 'not found on exchange'
+                    self._transition(order, REJECTED)
+            resolved += 1
+        return resolved
+
+    # ── Stream / REST updates ──────────────────────────────────────────────
+
+    def _on_client_event(self, event: str, symbol: str, payload):
+        if event == 'order':
+            self.on_order_update(payload)
+        elif event == 'execution':
+            for row in payload:
+                self.on_execution(row)
+
+    def on_order_update(self, row: Dict):
+        """Apply a v5 order row (private stream or ``/v5/order/realtime``)."""
+        with self._cond:
+            order = self._lookup(row)
+            if order is None:
+                return
+            if row.get('orderId'):
+                self._bind(order, row['orderId'])
+            order.filled = max(order.filled, _float(row.get('cumExecQty')))
+            if _float(row.get('avgPrice')) > 0 and not order.fills:
+                order.avg_price = _float(row.get('avgPrice'))
+            if row.get('rejectReason') not in (None, '', 'EC_NoError'):
+                order.reason = row['rejectReason']
+            self._transition(order, _EXCHANGE_STATES.get(row.get('orderStatus'), order.state))
+
+    def on_execution(self, row: Dict):
+        """Apply a v5 execution row."""
+        with self._cond:
+            order = self._lookup(row)
+            if order is None or row.get('execId') in order.fills:
+                return
+            order.fills[row.get('execId', str(len(order.fills)))] = (_float(row.get('execQty')),
+                                                                    _float(row.get('execPrice')))
+            qty = sum(q for q, _ in order.fills.values())
+            order.avg_price = sum(q * p for q, p in order.fills.values()) / qty if qty > 0 else 0.0
+            order.filled = max(order.filled, qty)
+            self._transition(order, FILLED if order.remaining <= 1e-12 else PARTIALLY_FILLED)
+
+    # ── Internals (lock held) ──────────────────────────────────────────────
+
+    def _register(self, symbol: str, side: str, qty: float, order_type: str, price: Optional[float],
+                  reduce_only: bool, strategy: str, link_id: Optional[str] = None) -> ManagedOrder:
+        order = ManagedOrder(
+            link_id=link_id or self.new_link_id(strategy), symbol=symbol, side=side.lower(),
+            qty=float(qty), order_type=order_type.lower(), price=price,
+            reduce_only=reduce_only, strategy=strategy,
+        )
+        with self._cond:
+            self._orders[order.link_id] = order
+            self._open.setdefault((symbol, order.side), {})[order.link_id] = order
+        return order
+
+    def _lookup(self, row: Dict) -> Optional[ManagedOrder]:
+        link_id = row.get('orderLinkId')
+        if link_id and link_id in self._orders:
+            return self._orders[link_id]
+        order_id = row.get('orderId')
+        if order_id and order_id in self._by_order_id:
+            return self._orders.get(self._by_order_id[order_id])
+        return None
+
+    def _bind(self, order: ManagedOrder, order_id: str):
+        if order.order_id is None:
+            order.order_id = order_id
+            self._by_order_id[order_id] = order.link_id
+
+    def _confirm_cancel(self, order: ManagedOrder):
+        with self._cond:
+            # The stream may already have reported a fill that raced the cancel
+            if order.is_open:
+                self._transition(order, CANCELLED)
+
+    def _transition(self, order: ManagedOrder, state: str):
+        if state == order.state or _RANK[state] < _RANK[order.state] or order.state in FINAL_STATES:
+            return
+        logger.debug("Order %s %s → %s", order.link_id, order.state, state)
+        order.state = state
+        order.updated = time.time()
+        if state in FINAL_STATES:
+            self._open.get((order.symbol, order.side), {}).pop(order.link_id, None)
+            self._closed.append(order.link_id)
+            while len(self._closed) > self.max_closed:
+                old = self._orders.pop(self._closed.popleft(), None)
+                if old is not None and old.order_id:
+                    self._by_order_id.pop(old.order_id, None)
+        self._cond.notify_all()
@@ -8,6 +8,9 @@ No duplicate WebSockets — uses shared client data.
 import logging
 from typing import Optional
 
+from analysis.microstructure import MicrostructureFeatures
+from execution.order_manager import REJECTED, OrderManager
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,6 +31,10 @@ class ScalpingStrategy:
         position_info: Optional[dict] = None,
         risk_components: Optional[dict] = None,
         min_confidence: float = 0.4,
+        features: Optional[MicrostructureFeatures] = None,
+        order_manager: Optional[OrderManager] = None,
+        strategy: str = 'scalp',
+        fill_timeout: float = 2.0,
     ):
         """
         Args:
@@ -38,6 +45,11 @@ class ScalpingStrategy:
             position_info: Shared position info.
             risk_components: Shared risk components.
             min_confidence: Minimum signal confidence to scalp.
+            features: Shared microstructure feature store (optional).
+            order_manager: Shared OrderManager; orders are sent, tracked
+                and confirmed through it (a private one if not given).
+            strategy: Tag in this strategy's ``orderLinkId``s.
+            fill_timeout: Seconds to wait for a fill on the private stream.
         """
         self.client = client
         self.symbol = symbol
@@ -46,6 +58,10 @@ class ScalpingStrategy:
         self.position_info = position_info or {}
         self.risk_components = risk_components or {}
         self.min_confidence = min_confidence
+        self.features = features or MicrostructureFeatures(symbol)
+        self.order_manager = order_manager or OrderManager(client)
+        self.strategy = strategy
+        self.fill_timeout = fill_timeout
         logger.info("ScalpingStrategy initialized for %s", symbol)
 
     def execute_scalp(self) -> Optional[str]:
@@ -65,40 +81,24 @@ class ScalpingStrategy:
             return None
 
         try:
-            book = self.client.get_order_book(self.symbol)
-            if not book or 'b' not in book or 'a' not in book:
-                return None
-
-            bids = book['b'][:10]
-            asks = book['a'][:10]
-            if not bids or not asks:
+            features = self.features.get(self.client)
+            if features is None:
                 return None
 
-            bid_vol = sum(float(b[1]) for b in bids)
-            ask_vol = sum(float(a[1]) for a in asks)
-            total = bid_vol + ask_vol
-
-            if total == 0:
-                return None
-
-            ratio = bid_vol / ask_vol if ask_vol > 0 else 2.0
+            ratio = features['bid_ask_ratio_10']
 
             # Strong buy pressure (ratio > 1.5)
             if ratio > 1.5:
                 logger.debug("Scalp BUY opportunity: bid/ask ratio=%.3f", ratio)
-                size = self.base_size
-                order = self.client.place_order(self.symbol, size, "BUY", order_type="Market")
-                if order and 'id' in order:
-                    logger.info("Scalp BUY executed: %.4f @ market", size)
+                if self._trade("BUY"):
+                    logger.info("Scalp BUY executed: %.4f @ market", self.base_size)
                     return "buy"
 
             # Strong sell pressure (ratio < 0.67)
             elif ratio < 0.67:
                 logger.debug("Scalp SELL opportunity: bid/ask ratio=%.3f", ratio)
-                size = self.base_size
-                order = self.client.place_order(self.symbol, size, "SELL", order_type="Market")
-                if order and 'id' in order:
-                    logger.info("Scalp SELL executed: %.4f @ market", size)
+                if self._trade("SELL"):
+                    logger.info("Scalp SELL executed: %.4f @ market", self.base_size)
                     return "sell"
 
             return None
@@ -107,6 +107,15 @@ class ScalpingStrategy:
             logger.error("Scalp execution error: %s", e, exc_info=True)
             return None
 
+    def _trade(self, side: str) -> bool:
+        """Send a market order through the OrderManager; True once it executed."""
+        order = self.order_manager.submit(self.symbol, side, self.base_size, order_type="Market",
+                                          strategy=self.strategy)
+        if order.state == REJECTED:
+            logger.warning("Scalp %s rejected: %s", side, order.reason)
+            return False
+        return self.order_manager.confirm_fill(order.link_id, timeout=self.fill_timeout)
+
 
 if __name__ == "__main__":
     from dotenv import load_dotenv
@@ -2,7 +2,10 @@
 Main Trading System — Orchestrator
 
 Integrates market analysis, signal generation, risk management,
-trade execution, and performance tracking into a single coherent loop.
+trade execution, and performance tracking. Work is driven by WebSocket
+market events through an EventScheduler: signals run on candle close,
+position management on price ticks and order-flow analytics on book
+updates, with a REST polling cycle only while the stream is down.
 
 Key improvements over the original:
   - No "always-buy-first" bug — trades are purely signal-driven
@@ -20,8 +23,8 @@ import time
 import signal
 import numpy as np
 from pathlib import Path
-from typing import Optional, Dict, List
-from threading import Thread, Lock
+from typing import Optional, Dict, List, Tuple
+from threading import Lock
 from collections import deque
 from datetime import datetime
 
@@ -48,6 +51,10 @@ load_dotenv()
 import config as cfg
 
 from bybit_client import BybitClient
+from data_pipeline.candle_store import normalize_interval
+from data_pipeline.market_snapshot import MarketSnapshot
+from data_pipeline.trade_flow import TradeFlow
+from event_scheduler import EventScheduler
 
 from risk_management.leverage_control import LeverageControl
 from risk_management.max_drawdown import MaxDrawdown
@@ -57,19 +64,24 @@ from risk_management.risk_manager import RiskManager
 from risk_management.stop_loss_take_profit import StopLossTakeProfit
 from risk_management.trailing_stop import TrailingStopLoss
 
+from analysis.fanout import AnalysisFanout
 from analysis.iceberg_detector import IcebergDetector
 from analysis.market_analysis import MarketInsights
-from analysis.ofi_analysis import OFIAnalysis
+from analysis.microstructure import MicrostructureFeatures
+from analysis.ofi_analysis import StreamingOFI
 from analysis.order_book_analysis import OrderBookAnalysis
 from analysis.order_timing import OrderTimingOptimizer
-from analysis.stop_hunt_detector import StopHuntDetector
+from analysis.stop_hunt_detector import StreamingStopHuntDetector
 
+from ai.indicator_engine import IncrementalIndicators
 from ai.self_learning import HedgeFundStrategy, TradeRecord
 
 from strategies.trading_strategy import AdvancedTradingStrategy
 
+from execution.execution_algos import ExecutionEngine, ParentOrder
 from execution.hft_trading import HFTTrading
 from execution.market_maker import MarketMaker
+from execution.order_manager import OrderManager, ManagedOrder
 from execution.scalping_strategy import ScalpingStrategy
 
 from tracking.profit_tracker import ProfitTracker
@@ -80,7 +92,7 @@ class TradingSystem:
     """
     Central orchestrator for the AI Trading Agent.
 
-    Owns all components and runs a single coherent trade loop.
+    Owns all components and dispatches market events to them.
     """
 
     def __init__(self):
@@ -102,13 +114,22 @@ class TradingSystem:
 
         # Component containers
         self.client: Optional[BybitClient] = None
+        self.order_manager: Optional[OrderManager] = None
         self.risk_components: Dict = {}
         self.analysis_components: Dict = {}
         self.trading_strategy: Optional[AdvancedTradingStrategy] = None
         self.signal_generator: Optional[HedgeFundStrategy] = None
+        self.indicators: Optional[IncrementalIndicators] = None
         self.execution_strategies: Dict = {}
         self.tracking_components: Dict = {}
 
+        # Event-driven dispatch; latest_analysis collects the order-flow
+        # metrics refreshed on book updates between signal cycles
+        self.scheduler = EventScheduler()
+        self.analysis_fanout = AnalysisFanout(max_workers=cfg.ANALYSIS_WORKERS)
+        self.latest_analysis: Dict = {}
+        self.last_price = 0.0
+
         # Timing
         self.last_report_time = time.time()
         self.report_interval = cfg.REPORT_INTERVAL
@@ -124,10 +145,19 @@ class TradingSystem:
 
         # Initialize
         try:
-            self.client = BybitClient(
-                cfg.BYBIT_API_KEY, cfg.BYBIT_API_SECRET, testnet=cfg.USE_TESTNET
-            )
+            if cfg.USE_ASYNC_CLIENT:
+                from async_bybit_client import SyncBybitClient
+                self.client = SyncBybitClient(
+                    cfg.BYBIT_API_KEY, cfg.BYBIT_API_SECRET, testnet=cfg.USE_TESTNET, symbols=[self.symbol]
+                )
+            else:
+                self.client = BybitClient(
+                    cfg.BYBIT_API_KEY, cfg.BYBIT_API_SECRET, testnet=cfg.USE_TESTNET
+                )
             self.client.start_websocket()
+            if cfg.USE_PRIVATE_STREAM:
+                self.client.start_private_stream()
+            self.order_manager = OrderManager(self.client)
             self._initialize_components()
             self.running = True
             logger.info("TradingSystem v2 initialized successfully")
@@ -140,9 +170,19 @@ class TradingSystem:
     def _initialize_components(self):
         """Initialize all sub-components."""
         self._sync_balance()
+        self.order_manager.load_open_orders(self.symbol)
+        # Rolling trade aggregates shared by every trade consumer
+        self.trade_flow = TradeFlow(self.symbol, windows=cfg.TRADE_FLOW_WINDOWS)
+        self.trade_flow.attach(self.client)
+        self.execution_engine = ExecutionEngine(self.client, self.order_manager,
+                                                trade_flows={self.symbol: self.trade_flow})
+        # Book features computed once per book update, read by every strategy
+        self.features = MicrostructureFeatures(self.symbol)
+        self.features.attach(self.client)
         self.risk_components = self._init_risk()
         self.analysis_components = self._init_analysis()
         self.signal_generator = HedgeFundStrategy()
+        self.indicators = IncrementalIndicators(self.signal_generator, window=cfg.SIGNAL_BARS)
         self.trading_strategy = self._init_strategy()
         self.tracking_components = self._init_tracking()
         self._init_execution_strategies()
@@ -166,21 +206,34 @@ class TradingSystem:
             'position_sizing': PositionSizing(self.client, self.initial_balance),
             'risk_manager': RiskManager(
                 self.client, symbol=self.symbol,
-                max_loss=cfg.RISK_PER_TRADE, volatility_threshold=cfg.VOLATILITY_THRESHOLD
+                max_loss=cfg.RISK_PER_TRADE, volatility_threshold=cfg.VOLATILITY_THRESHOLD,
+                trade_flow=self.trade_flow, window=cfg.TRADE_FLOW_WINDOW,
             ),
             'stop_loss': StopLossTakeProfit(self.client),
             'trailing_stop': TrailingStopLoss(self.client),
         }
 
     def _init_analysis(self) -> Dict:
+        ofi = StreamingOFI(self.symbol, levels=cfg.OFI_LEVELS, windows=cfg.OFI_WINDOWS)
+        ofi.attach(self.client)
+        iceberg = IcebergDetector(
+            self.symbol, tick_size=cfg.MARKET_MAKER_TICK_SIZE,
+            min_refills=cfg.ICEBERG_REFRESH_THRESHOLD, volume_ratio=cfg.ICEBERG_VOLUME_RATIO,
+            level_ttl=cfg.ICEBERG_LEVEL_TTL, max_levels=cfg.ICEBERG_MAX_LEVELS,
+        )
+        iceberg.attach(self.client)
+        stop_hunt = StreamingStopHuntDetector(self.symbol, threshold=cfg.STOP_HUNT_THRESHOLD)
+        stop_hunt.attach(self.client)
         return {
-            'iceberg': IcebergDetector(self.client, self.symbol),
+            'iceberg': iceberg,
             'market_insights': MarketInsights(self.client, [self.symbol], timeframe='60'),
             'market_insights_1h': MarketInsights(self.client, [self.symbol], timeframe='60'),
-            'ofi': OFIAnalysis(self.client, self.symbol),
-            'order_book': OrderBookAnalysis(self.client, self.symbol),
-            'order_timing': OrderTimingOptimizer(self.client, self.symbol),
-            'stop_hunt': StopHuntDetector(self.client, self.symbol),
+            'ofi': ofi,
+            'order_book': OrderBookAnalysis(self.client, self.symbol, features=self.features),
+            'order_timing': OrderTimingOptimizer(
+                self.client, self.symbol, trade_flow=self.trade_flow, window=cfg.TRADE_FLOW_WINDOW
+            ),
+            'stop_hunt': stop_hunt,
         }
 
     def _init_strategy(self) -> AdvancedTradingStrategy:
@@ -193,6 +246,7 @@ class TradingSystem:
             stop_loss_factor=cfg.STOP_LOSS_FACTOR,
             take_profit_factor=cfg.TAKE_PROFIT_FACTOR,
             sequence_length=cfg.SEQUENCE_LENGTH,
+            features=self.features,
         )
 
     def _init_tracking(self) -> Dict:
@@ -202,90 +256,120 @@ class TradingSystem:
         }
 
     def _init_execution_strategies(self):
-        common = {'position_info': self.position_info, 'risk_components': self.risk_components}
+        common = {'position_info': self.position_info, 'risk_components': self.risk_components,
+                  'features': self.features, 'order_manager': self.order_manager}
         self.execution_strategies = {
             'hft': HFTTrading(
                 self.client, self.symbol, **common,
                 spread_threshold=cfg.HFT_SPREAD_THRESHOLD,
                 order_size=cfg.HFT_ORDER_SIZE,
+                fill_timeout=cfg.FILL_WAIT_TIMEOUT,
             ),
             'market_making': MarketMaker(
                 self.client, self.symbol, **common,
                 spread=cfg.MARKET_MAKER_SPREAD,
                 size=cfg.MARKET_MAKER_SIZE,
+                tick_size=cfg.MARKET_MAKER_TICK_SIZE,
+                requote_ticks=cfg.MARKET_MAKER_REQUOTE_TICKS,
             ),
             'scalping': ScalpingStrategy(
                 self.client, self.symbol, **common,
                 spread=cfg.SCALPING_SPREAD,
                 size=cfg.SCALPING_SIZE,
+                fill_timeout=cfg.FILL_WAIT_TIMEOUT,
             ),
         }
 
     # ── Market Analysis ────────────────────────────────────────────────────
 
-    def _analyze_market_conditions(self) -> Dict:
-        """Collect and fuse all market analysis into a single dict."""
-        analysis = {}
+    def _new_snapshot(self) -> MarketSnapshot:
+        """Build the shared market view for one cycle."""
+        # 1h candles are read with limit=60 (insights) and limit=100 (signal) —
+        # fetch 100 once and slice
+        return MarketSnapshot(self.client, ttl=cfg.MARKET_SNAPSHOT_TTL, ohlcv_limits={'60': 100})
 
-        # 1. Market insights (OHLCV-based)
-        try:
-            mi = self.analysis_components['market_insights'].analyze_market()
-            analysis['market'] = mi.get(self.symbol, {})
-        except Exception as e:
-            logger.error("Market insights failed: %s", e)
-            analysis['market'] = {}
+    def _analyze_market_conditions(self, snapshot: MarketSnapshot) -> Dict:
+        """Collect and fuse all market analysis into a single dict.
 
-        # 2. Order book metrics
-        try:
-            ob = self.analysis_components['order_book']
-            analysis['ofi'] = ob.calculate_order_flow_imbalance(levels=cfg.OFI_LEVELS)
-            analysis['spread_pct'] = ob.calculate_spread_pct()
-            analysis['bid_ask_ratio'] = ob.calculate_bid_ask_ratio()
-        except Exception as e:
-            logger.error("Order book analysis failed: %s", e)
+        Components run concurrently with per-component deadlines; one that
+        is late or failing contributes its last good value, and
+        ``analysis['staleness']`` records how old each value is.
+        """
+        tasks = {
+            'market': lambda: self._analyze_market_insights(snapshot),
+            'order_book': lambda: self._analyze_order_book(snapshot),
+            'stop_hunt': lambda: self._analyze_stop_hunt(snapshot),
+            'large_order': lambda: self.analysis_components['order_timing'].detect_large_orders(snapshot=snapshot),
+        }
+        result = self.analysis_fanout.run(
+            tasks, deadlines=cfg.ANALYSIS_DEADLINES,
+            defaults={'market': {}, 'order_book': {}, 'stop_hunt': False, 'large_order': None},
+        )
 
-        # 3. Stop hunt check — only if we have enough data
-        try:
-            ohlcv = self.client.get_historical_data(self.symbol, interval='1', limit=30)
-            if ohlcv is not None and len(ohlcv) > 10:
-                import pandas as pd
-                df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                analysis['stop_hunt'] = self.analysis_components['stop_hunt'].detect_stop_hunts(df)
-            else:
-                analysis['stop_hunt'] = False
-        except Exception as e:
-            logger.error("Stop-hunt check failed: %s", e)
-            analysis['stop_hunt'] = False
+        analysis = {
+            'market': result.values['market'] or {},
+            'stop_hunt': bool(result.values['stop_hunt']),
+            'large_order': result.values['large_order'],
+        }
+        analysis.update(result.values['order_book'] or {})
+        analysis['staleness'] = result.staleness
+        analysis['degraded'] = result.degraded
+        return analysis
 
-        # 4. Large order detection
-        try:
-            timing = self.analysis_components['order_timing']
-            analysis['large_order'] = timing.detect_large_orders()
-        except Exception as e:
-            logger.error("Order timing check failed: %s", e)
-            analysis['large_order'] = None
+    def _analyze_market_insights(self, snapshot: MarketSnapshot) -> Dict:
+        mi = self.analysis_components['market_insights'].analyze_market(snapshot)
+        return mi.get(self.symbol, {})
 
-        return analysis
+    def _analyze_order_book(self, snapshot: MarketSnapshot) -> Dict:
+        ob = self.analysis_components['order_book']
+        ofi = self.analysis_components['ofi']
+        if self.client.get_local_order_book(self.symbol) is None:
+            # Book stream down — no book events, so diff the polled books
+            ofi.update_from_book(snapshot.get_order_book(self.symbol))
+        return {
+            'ofi': ofi.value(cfg.OFI_WINDOW),
+            **ofi.snapshot(),
+            'icebergs': self.analysis_components['iceberg'].detect_iceberg_orders(),
+            'spread_pct': ob.calculate_spread_pct(snapshot=snapshot),
+            'bid_ask_ratio': ob.calculate_bid_ask_ratio(snapshot=snapshot),
+        }
+
+    def _analyze_stop_hunt(self, snapshot: MarketSnapshot) -> bool:
+        detector = self.analysis_components['stop_hunt']
+        # Bars are built from the trade stream; (re)seed from 1m candles at
+        # start-up and whenever the stream is down
+        if not detector.seeded or not self.client.ws_connected:
+            ohlcv = snapshot.get_historical_data(self.symbol, interval='1', limit=cfg.STOP_HUNT_BARS)
+            if ohlcv is None or len(ohlcv) <= 10:
+                return False
+            detector.seed(ohlcv[:, 0], ohlcv[:, 4])
+        return detector.recent(cfg.STOP_HUNT_BARS)
 
     # ── Signal Generation ──────────────────────────────────────────────────
 
-    def _generate_signal(self, analysis: Dict) -> 'TradeSignal':
+    def _generate_signal(self, analysis: Dict, snapshot: MarketSnapshot) -> 'TradeSignal':
         """Generate a trading signal from live market data."""
-        ohlcv = self.client.get_historical_data(self.symbol, interval='60', limit=100)
+        ohlcv = snapshot.get_historical_data(self.symbol, interval=cfg.SIGNAL_INTERVAL, limit=cfg.SIGNAL_BARS)
         if ohlcv is None or len(ohlcv) < 60:
             from ai.self_learning import TradeSignal
             return TradeSignal('hold', 0.0, 0.0, 0.0, 'ranging', 'Warm-up')
 
-        closes = ohlcv[:, 4]
-        highs = ohlcv[:, 2]
-        lows = ohlcv[:, 3]
-        volumes = ohlcv[:, 5]
+        # Only candles from the last one seen onward are folded into the
+        # indicator state; a gap (or the first call) reseeds it
+        engine = self.indicators
+        last = engine.last_timestamp
+        if last is None or ohlcv[0, 0] > last:
+            engine.seed(ohlcv)
+        else:
+            for candle in ohlcv[ohlcv[:, 0] >= last]:
+                engine.update(candle)
 
-        return self.signal_generator.generate_signal(closes, highs, lows, volumes)
+        return self.signal_generator.signal_from_state(engine.state, engine.window_bars)
 
     # ── Risk Gates ─────────────────────────────────────────────────────────
 
-    def _check_risk_gates(self, action: str, size: float, price: float) -> tuple:
+    def _check_risk_gates(self, action: str, size: float, price: float,
+                          snapshot: Optional[MarketSnapshot] = None) -> tuple:
         """
         Check all risk management gates before allowing a trade.
 
@@ -317,7 +401,7 @@ class TradingSystem:
 
         # 4. Volatility check
         try:
-            high_vol = rc['risk_manager'].check_volatility()
+            high_vol = rc['risk_manager'].check_volatility(snapshot=snapshot)
             if high_vol and size > cfg.HFT_ORDER_SIZE:
                 # In high volatility, reduce size but don't block entirely
                 size *= 0.5
@@ -328,11 +412,12 @@ class TradingSystem:
 
     # ── Position Sizing ────────────────────────────────────────────────────
 
-    def _calculate_dynamic_size(self, price: float) -> float:
+    def _calculate_dynamic_size(self, price: float, snapshot: Optional[MarketSnapshot] = None) -> float:
         """Calculate position size using risk-based sizing."""
         try:
             sizing = self.risk_components['position_sizing']
-            size = sizing.calculate_position_size(self.current_balance, price)
+            sizing.account_balance = self.current_balance
+            size = sizing.calculate_position_size(cfg.RISK_PER_TRADE * 100, snapshot=snapshot)
         except Exception:
             # Fallback: fixed fractional sizing
             risk_amount = self.current_balance * cfg.RISK_PER_TRADE
@@ -354,12 +439,16 @@ class TradingSystem:
     def _execute_trade(self, action: str, size: float, price: float, source: str = 'signal'):
         """Execute a trade and update state."""
         side = action.upper()
+        if size >= cfg.EXEC_ALGO_MIN_SIZE:
+            return self._execute_with_algo(side, size, source)
 
         with self.lock:
-            order = self.client.place_order(self.symbol, size, side, order_type="Market")
-            if not order or 'id' not in order:
-                logger.error("Order placement failed: %s", order)
+            order = self.order_manager.submit(self.symbol, side, size, order_type="Market", strategy=source)
+            fill = self._confirmed_fill(order, size, price)
+            if fill is None:
+                logger.error("Order %s not filled: %s %s", order.link_id, order.state, order.reason)
                 return False
+            size, price = fill
 
             self.position_info.update({
                 'size': size,
@@ -380,6 +469,50 @@ class TradingSystem:
             logger.info("OPEN %s %.6f @ %.2f [source=%s]", side, size, price, source)
             return True
 
+    def _execute_with_algo(self, side: str, size: float, source: str) -> bool:
+        """Work a large entry as a parent order on the execution engine.
+
+        The position is recorded from the parent's fills when it finishes
+        (``_on_parent_done``), so the trade loop is not blocked meanwhile.
+        """
+        if self.execution_engine.active(self.symbol):
+            logger.info("Parent order already working on %s — skipping %s %.6f", self.symbol, side, size)
+            return False
+        self.execution_engine.submit(ParentOrder(
+            symbol=self.symbol, side=side.lower(), qty=size, algo=cfg.EXEC_ALGO,
+            duration=cfg.EXEC_ALGO_DURATION, interval=cfg.EXEC_ALGO_INTERVAL,
+            participation=cfg.EXEC_PARTICIPATION, max_slippage_bps=cfg.EXEC_MAX_SLIPPAGE_BPS,
+            qty_step=cfg.EXEC_QTY_STEP, min_qty=cfg.EXEC_MIN_QTY, strategy=source, on_done=self._on_parent_done,
+        ))
+        self._last_trade_time = time.time()
+        return True
+
+    def _on_parent_done(self, parent: ParentOrder):
+        """Record the position opened by a finished parent order."""
+        report = parent.report()
+        if parent.filled <= 0:
+            logger.error("Parent %s finished without fills: %s", parent.id, report)
+            return
+        with self.lock:
+            self.position_info.update({
+                'size': parent.filled,
+                'side': parent.side,
+                'entry_price': parent.avg_price,
+                'unrealised_pnl': 0.0,
+                'timestamp': datetime.now(),
+            })
+            self.total_trades += 1
+
+            self.trade_history.append({
+                'type': 'open', 'side': parent.side, 'size': parent.filled,
+                'price': parent.avg_price, 'source': parent.strategy,
+                'timestamp': datetime.now(), 'execution': report,
+            })
+
+            logger.info("OPEN %s %.6f @ %.2f [source=%s, %s: %s bps vs arrival, %s bps vs VWAP]",
+                        parent.side.upper(), parent.filled, parent.avg_price, parent.strategy, parent.algo,
+                        report['slippage_vs_arrival_bps'], report['slippage_vs_vwap_bps'])
+
     def _close_position(self, price: float, source: str = 'signal'):
         """Close the current position."""
         with self.lock:
@@ -390,12 +523,14 @@ class TradingSystem:
             size = self.position_info['size']
             entry_price = self.position_info['entry_price']
 
-            order = self.client.place_order(
-                self.symbol, size, close_side, order_type="Market", reduce_only=True
+            order = self.order_manager.submit(
+                self.symbol, close_side, size, order_type="Market", reduce_only=True, strategy=source
             )
-            if not order or 'id' not in order:
-                logger.error("Failed to close position: %s", order)
+            fill = self._confirmed_fill(order, size, price)
+            if fill is None:
+                logger.error("Failed to close position: %s %s %s", order.link_id, order.state, order.reason)
                 return False
+            price = fill[1]
 
             # Calculate P&L
             if self.position_info['side'] == 'long':
@@ -406,7 +541,9 @@ class TradingSystem:
                 pnl_pct = (entry_price - price) / entry_price * 100
 
             self.total_pnl += pnl
-            self.current_balance += pnl
+            if not self.client.account.live:
+                # Otherwise the wallet stream delivers the settled balance
+                self.current_balance += pnl
             self.peak_balance = max(self.peak_balance, self.current_balance)
 
             self.trade_history.append({
@@ -435,26 +572,41 @@ class TradingSystem:
                         close_side, size, price, pnl, pnl_pct)
             return True
 
+    def _confirmed_fill(self, order: ManagedOrder, size: float, price: float) -> Optional[Tuple[float, float]]:
+        """Actual (size, average price) of *order*, or None if it did not execute.
+
+        See ``OrderManager.confirm_fill``; an order acknowledged while the
+        private stream is down is taken at the assumed *size* and *price*.
+        """
+        if not self.order_manager.confirm_fill(order.link_id, cfg.FILL_WAIT_TIMEOUT):
+            return None
+        if order.filled > 0:
+            if order.filled < size:
+                logger.warning("Order %s partially filled: %.6f of %.6f", order.link_id, order.filled, size)
+            return order.filled, order.avg_price or price
+        return size, price
+
     # ── Main Trade Decision ────────────────────────────────────────────────
 
-    def _make_trade_decision(self, analysis: Dict):
+    def _make_trade_decision(self, analysis: Dict, snapshot: MarketSnapshot):
         """Core trading logic — called every cycle."""
         try:
             self._sync_open_positions()
-            current_price = self.client.get_current_price(self.symbol)
+            current_price = snapshot.get_current_price(self.symbol)
             if not current_price or current_price <= 0:
                 logger.error("Invalid current price")
                 return
 
             # 1. Generate signal
-            signal = self._generate_signal(analysis)
+            signal = self._generate_signal(analysis, snapshot)
             logger.debug("Signal: %s (conf=%.3f, regime=%s)",
                          signal.action, signal.confidence, signal.regime)
 
             # 2. If in a position, check if we should close
             if self.position_info['size'] > 0:
                 # Check stop-loss / take-profit first
-                self._manage_open_position(current_price)
+                with self.lock:
+                    self._manage_open_position(current_price)
 
                 # If still in a position after risk management, check signal reversal
                 if self.position_info['size'] > 0:
@@ -471,14 +623,14 @@ class TradingSystem:
             # 3. No position — check if we should open one
             if signal.action in ('buy', 'sell') and signal.confidence >= 0.4:
                 action = signal.action.upper()
-                size = self._calculate_dynamic_size(current_price)
+                size = self._calculate_dynamic_size(current_price, snapshot)
 
                 if size <= 0:
                     logger.debug("Calculated size <= 0, skipping trade")
                     return
 
                 # Check all risk gates
-                allowed, reason = self._check_risk_gates(action, size, current_price)
+                allowed, reason = self._check_risk_gates(action, size, current_price, snapshot)
                 if not allowed:
                     logger.warning("Risk gate blocked %s: %s", action, reason)
                     return
@@ -524,21 +676,29 @@ class TradingSystem:
         if pi['size'] <= 0:
             pnl = pi['unrealised_pnl']
             self.total_pnl += pnl
-            self.current_balance += pnl
+            if not self.client.account.live:
+                self.current_balance += pnl
             self.peak_balance = max(self.peak_balance, self.current_balance)
             logger.info("Position closed by risk management. PnL: %.2f", pnl)
 
     # ── Position Sync ──────────────────────────────────────────────────────
 
-    def _sync_open_positions(self):
+    def _sync_open_positions(self, force: bool = False):
         """Sync position state from the exchange."""
-        if time.time() - self.last_position_sync_time < self.position_sync_interval:
+        if not force and time.time() - self.last_position_sync_time < self.position_sync_interval:
             return
         self.last_position_sync_time = time.time()
 
         try:
             positions = self.client.get_positions(self.symbol)
-            if positions:
+            if self.position_info['size'] > 0 and self.client.account.get_positions(self.symbol) == []:
+                # Only a position pushed by the stream can say it is flat — an
+                # empty REST answer may just be a failed request, and the cache
+                # answers None until the stream has reported this symbol
+                with self.lock:
+                    self.position_info['size'] = 0.0
+                    self.position_info['side'] = None
+            elif positions:
                 pos = positions[0]
                 size = float(pos.get('contracts', 0))
                 if size > 0:
@@ -577,9 +737,9 @@ class TradingSystem:
 
     # ── Reporting ──────────────────────────────────────────────────────────
 
-    def _generate_report(self):
+    def _generate_report(self, force: bool = False):
         """Generate a performance report."""
-        if time.time() - self.last_report_time < self.report_interval:
+        if not force and time.time() - self.last_report_time < self.report_interval:
             return
         self.last_report_time = time.time()
 
@@ -599,34 +759,98 @@ class TradingSystem:
             logger.info("  Current drawdown: %.2f%%", dd)
             logger.info("  Signal generator win rate: %.1f%%",
                         self.signal_generator.win_rate * 100 if self.signal_generator else 0)
+            for event_type, stats in self.scheduler.metrics().items():
+                logger.info("  Event %-14s %s", event_type, stats)
             logger.info("=" * 50)
         except Exception as e:
             logger.error("Report generation failed: %s", e)
 
-    # ── Main Loop ──────────────────────────────────────────────────────────
-
-    def _trade_loop(self):
-        """Main trading loop."""
-        logger.info("Trade loop started (interval=%ds)", cfg.TRADE_LOOP_INTERVAL)
-        while self.running:
+    # ── Event Handlers ─────────────────────────────────────────────────────
+
+    def _register_event_handlers(self):
+        """Wire market events and timers to the components that depend on them."""
+        sch = self.scheduler
+        sch.subscribe('tick', self._on_price_tick, priority=0)
+        sch.subscribe('book', self._on_book_update, priority=2)
+        # Handlers making REST calls or waiting for fills run on the 'trade'
+        # lane (one at a time, off the dispatcher) so ticks keep driving the
+        # stop-loss while a cycle is blocked
+        sch.subscribe('candle_close', self._on_candle_close, priority=1, lane='trade')
+        sch.subscribe('account', self._on_account_update, priority=1, lane='trade')
+        sch.subscribe('position_sync', self._on_position_sync, priority=3, lane='trade')
+        sch.subscribe('rest_poll', self._on_rest_poll, priority=4, lane='trade')
+        sch.subscribe('report', lambda _: self._generate_report(force=True), priority=5, lane='report')
+        sch.add_timer('position_sync', self.position_sync_interval)
+        sch.add_timer('rest_poll', cfg.TRADE_LOOP_INTERVAL)
+        sch.add_timer('report', self.report_interval)
+        self.client.add_listener(self._on_market_event)
+
+    def _on_market_event(self, event: str, symbol: str, payload):
+        """BybitClient callback (WebSocket thread) — only publishes, never blocks."""
+        if symbol != self.symbol:
+            return
+        if event == 'trade':
+            self.scheduler.publish('tick', float(payload[-1]['p']))
+        elif event == 'book':
+            self.scheduler.publish('book')
+        elif event == 'candle_close' and payload == normalize_interval(cfg.SIGNAL_INTERVAL):
+            self.scheduler.publish('candle_close', payload)
+        elif event in ('position', 'wallet'):
+            self.scheduler.publish('account')
+
+    def _run_cycle(self):
+        """Full cycle: analysis, signal and entry/exit decision."""
+        # One shared, coalesced view of the market for this cycle
+        snapshot = self._new_snapshot()
+        analysis = self._analyze_market_conditions(snapshot)
+        self.latest_analysis.update(analysis)
+        # Informational — actual decisions are made by the signal
+        self.active_strategy = self._select_strategy(self.latest_analysis)
+        self._make_trade_decision(analysis, snapshot)
+        logger.debug("Cycle market data: %s", snapshot.stats())
+
+    def _on_candle_close(self, _interval):
+        """Signals only change when a signal-interval candle closes."""
+        self._run_cycle()
+
+    def _on_price_tick(self, price: float):
+        """Stop-loss / take-profit / trailing stop on the latest trade price."""
+        self.last_price = price
+        if self.position_info['size'] > 0 and price > 0:
+            # The trade lane holds the lock while an order is in flight; the
+            # position is about to change, so skip this tick rather than wait
+            if not self.lock.acquire(blocking=False):
+                return
             try:
-                # 1. Analyze market
-                analysis = self._analyze_market_conditions()
-
-                # 2. Select strategy (informational — actual decisions made by signal)
-                self.active_strategy = self._select_strategy(analysis)
-
-                # 3. Make trade decision
-                self._make_trade_decision(analysis)
+                self._manage_open_position(price)
+            finally:
+                self.lock.release()
+
+    def _on_book_update(self, _payload):
+        """Refresh order-flow metrics from the local book (no REST while in sync)."""
+        snapshot = MarketSnapshot(self.client, ttl=cfg.MARKET_SNAPSHOT_TTL)
+        self.latest_analysis.update(self._analyze_order_book(snapshot))
+        self.active_strategy = self._select_strategy(self.latest_analysis)
+
+    def _on_position_sync(self, _payload):
+        self._sync_open_positions(force=True)
+        # Submissions whose acknowledgement was lost and no stream update explained
+        self.order_manager.resolve_pending()
+
+    def _on_account_update(self, _payload):
+        """Private-stream position/wallet change — re-read the account cache (no REST)."""
+        self._sync_open_positions(force=True)
+        balance = self.client.account.balance('USDT')
+        if balance is not None and balance > 0:
+            self.current_balance = balance
+            self.peak_balance = max(self.peak_balance, balance)
+
+    def _on_rest_poll(self, _payload):
+        """While the WebSocket is down no events arrive — fall back to polling."""
+        if not self.client.ws_connected:
+            self._run_cycle()
 
-                # 4. Periodic report
-                self._generate_report()
-
-                time.sleep(cfg.TRADE_LOOP_INTERVAL)
-
-            except Exception as e:
-                logger.error("Trade loop error: %s", e, exc_info=True)
-                time.sleep(5)
+    # ── Main Loop ──────────────────────────────────────────────────────────
 
     def run(self):
         """Start the trading system."""
@@ -634,11 +858,16 @@ class TradingSystem:
             logger.error("System not running due to initialization failure")
             return
 
-        trade_thread = Thread(target=self._trade_loop, daemon=True)
-        trade_thread.start()
-        logger.info("TradingSystem running")
+        self._register_event_handlers()
+        self.scheduler.start()
+        self.execution_engine.start()
+        # First cycle seeds the indicator state and the candle stores that
+        # produce candle_close events
+        self.scheduler.publish('candle_close')
+        logger.info("TradingSystem running (event-driven, signal interval=%s)", cfg.SIGNAL_INTERVAL)
         try:
-            trade_thread.join()
+            while self.running:
+                self.scheduler.join(timeout=1.0)
         except KeyboardInterrupt:
             logger.info("Shutting down (SIGINT)")
             self.shutdown()
@@ -651,7 +880,11 @@ class TradingSystem:
         logger.info("Shutting down...")
         self.running = False
         try:
+            self.scheduler.stop()
+            self.execution_engine.stop()
+            self.analysis_fanout.shutdown()
             if self.client:
+                self.client.stop_private_stream()
                 self.client.stop_websocket()
             self._generate_report()
             logger.info("Shutdown complete. Final balance: %.2f USDT", self.current_balance)
@@ -0,0 +1,149 @@
+"""
+Migrate Recorded Market Data into the Columnar Store
+
+Converts the legacy files in ``data/`` into ``MarketStore`` datasets:
+
+    - ``bids_<symbol>_<ts>.csv`` / ``asks_<symbol>_<ts>.csv`` snapshot pairs
+      → ``orderbook_<symbol>`` (``bids``/``asks`` arrays of ``levels`` × 2,
+      timestamped ``ts * 1000`` ms).
+    - ``combined_market_<symbol>.csv`` (AdvancedMarketPredictor training rows)
+      → ``combined_market_<symbol>`` (``ohlcv`` × 5, ``order_book`` × 100).
+      These rows carry no timestamp, so the row number is used as ``ts``.
+
+``combined_bids_*.csv`` files are skipped: their rows are concatenated
+without snapshot boundaries or timestamps and cannot be recovered.
+
+Migrating a dataset that already exists is refused unless ``--force`` is
+given (which deletes it first), so the tool is safe to re-run.
+
+Usage:
+    python migrate_market_data.py --data-dir data --store data/store
+    python migrate_market_data.py --symbol BTCUSDT --delete-originals
+"""
+
+import argparse
+import glob
+import logging
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+from data_pipeline.market_store import MarketStore, orderbook_schema, pad_levels
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger('migrate_market_data')
+
+
+def _prepare(store: MarketStore, name: str, force: bool) -> bool:
+    """Return False if *name* exists and may not be replaced."""
+    if store.schema(name) is None:
+        return True
+    if not force:
+        logger.warning("Dataset %s already exists in %s — skipping (use --force to rebuild)", name, store.root)
+        return False
+    shutil.rmtree(store.root / name)
+    return True
+
+
+def migrate_snapshots(data_dir: str, store: MarketStore, symbol: str, levels: int, force: bool = False) -> list:
+    """Convert bids_/asks_ CSV pairs. Returns the migrated source files."""
+    prefix = f"bids_{symbol}_"
+    stamps = []
+    for path in glob.glob(os.path.join(data_dir, f"{prefix}*.csv")):
+        stamp = os.path.basename(path)[len(prefix):-len('.csv')]
+        if stamp.isdigit() and os.path.exists(os.path.join(data_dir, f"asks_{symbol}_{stamp}.csv")):
+            stamps.append(int(stamp))
+    if not stamps:
+        return []
+    name = f"orderbook_{symbol}"
+    if not _prepare(store, name, force):
+        return []
+
+    ts, bids, asks, sources = [], [], [], []
+    for stamp in sorted(stamps):
+        bid_path = os.path.join(data_dir, f"bids_{symbol}_{stamp}.csv")
+        ask_path = os.path.join(data_dir, f"asks_{symbol}_{stamp}.csv")
+        try:
+            bid_rows = np.loadtxt(bid_path, delimiter=',', skiprows=1, ndmin=2)
+            ask_rows = np.loadtxt(ask_path, delimiter=',', skiprows=1, ndmin=2)
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping snapshot %s: %s", stamp, e)
+            continue
+        ts.append(stamp * 1000)
+        bids.append(pad_levels(bid_rows, levels))
+        asks.append(pad_levels(ask_rows, levels))
+        sources += [bid_path, ask_path]
+
+    with store.writer(name, orderbook_schema(levels)) as writer:
+        writer.append_many(np.array(ts, dtype=np.int64), bids=np.stack(bids), asks=np.stack(asks))
+    logger.info("%s: %d snapshots from %d files", name, len(ts), len(sources))
+    return sources
+
+
+def migrate_combined(path: str, store: MarketStore, force: bool = False) -> list:
+    """Convert an AdvancedMarketPredictor training CSV. Returns [path] on success."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    try:
+        # Short order books leave trailing cells empty — those are zero padding
+        rows = pd.read_csv(path).fillna(0.0).to_numpy(dtype=np.float64)
+    except (OSError, ValueError) as e:
+        logger.warning("Skipping %s: %s", path, e)
+        return []
+    if rows.shape[1] < 5:
+        logger.warning("Skipping %s: expected OHLCV + order book columns, got %d", path, rows.shape[1])
+        return []
+    if not _prepare(store, name, force):
+        return []
+
+    order_book = np.zeros((len(rows), 100))
+    book_cols = rows[:, 5:105]
+    order_book[:, :book_cols.shape[1]] = book_cols
+    schema = {'ohlcv': ((5,), 'float64'), 'order_book': ((100,), 'float64')}
+    with store.writer(name, schema) as writer:
+        writer.append_many(np.arange(len(rows), dtype=np.int64), ohlcv=rows[:, :5], order_book=order_book)
+    logger.info("%s: %d rows (no timestamps in source, ts = row number)", name, len(rows))
+    return [path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate CSV market data into the columnar store')
+    parser.add_argument('--data-dir', default='data', help='Directory with the legacy CSV files')
+    parser.add_argument('--store', default=None, help='Store directory (default: <data-dir>/store)')
+    parser.add_argument('--symbol', default='BTCUSDT', help='Trading pair')
+    parser.add_argument('--levels', type=int, default=50, help='Depth levels kept per side')
+    parser.add_argument('--force', action='store_true', help='Rebuild datasets that already exist')
+    parser.add_argument('--delete-originals', action='store_true',
+                        help='Delete the CSV files after a successful migration')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.data_dir):
+        parser.error(f"No such directory: {args.data_dir}")
+    store = MarketStore(args.store or os.path.join(args.data_dir, 'store'))
+
+    migrated = migrate_snapshots(args.data_dir, store, args.symbol, args.levels, force=args.force)
+    for path in sorted(glob.glob(os.path.join(args.data_dir, f"combined_market_{args.symbol}*.csv"))):
+        migrated += migrate_combined(path, store, force=args.force)
+    for path in glob.glob(os.path.join(args.data_dir, f"combined_bids_{args.symbol}*.csv")):
+        logger.info("Not migrating %s: rows have no snapshot boundaries or timestamps", path)
+
+    if not store.datasets():
+        logger.warning("Nothing migrated")
+        sys.exit(1)
+    for name in store.datasets():
+        logger.info("  %-28s %8d rows  range=%s", name, store.row_count(name), store.time_range(name))
+
+    if args.delete_originals:
+        for path in migrated:
+            os.remove(path)
+        logger.info("Deleted %d migrated CSV files", len(migrated))
+
+
+if __name__ == '__main__':
+    main()
@@ -10,15 +10,24 @@ import logging
 from pathlib import Path
 from collections import deque
 import random
+import time
 from typing import Dict, Optional
 
+from data_pipeline.market_store import MarketStore, StoreWriter
+
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class AdvancedMarketPredictor:
-    def __init__(self, model_path: str, data_path: str, seq_length: int = 50, prediction_steps: int = 5, rl_enabled: bool = True):
+    def __init__(self, model_path: str, data_path: str, seq_length: int = 50, prediction_steps: int = 5, rl_enabled: bool = True,
+                 store: Optional[MarketStore] = None):
         self.model_path = model_path if model_path.endswith('.h5') else model_path + '.h5'
         self.data_path = data_path
+        # Training rows go to the market store dataset named after data_path
+        # (e.g. combined_market_BTCUSDT) instead of being appended to the CSV
+        self.store = store or MarketStore(Path(data_path).parent / "store")
+        self.dataset = Path(data_path).stem
+        self._writer: Optional[StoreWriter] = None
         self.seq_length = seq_length
         self.prediction_steps = prediction_steps
         self.ohlcv_features = 5
@@ -91,10 +100,15 @@ class AdvancedMarketPredictor:
             if not all(col in ohlcv_data.columns for col in required_cols):
                 raise ValueError(f"OHLCV data missing required columns: {required_cols}")
             ob_processed = self._preprocess_order_book(order_book_data)
-            ob_df = pd.DataFrame(ob_processed.reshape(1, -1), columns=[f"ob_{i}" for i in range(self.order_book_features)])
-            combined = pd.concat([ohlcv_data.tail(1)[required_cols], ob_df], axis=1)
-            combined.to_csv(self.data_path, mode='a', header=not os.path.exists(self.data_path), index=False)
-            logger.info(f"Successfully updated training data at {self.data_path}")
+            last = ohlcv_data.tail(1)
+            ts = int(last["timestamp"].iloc[0]) if "timestamp" in last.columns else int(time.time() * 1000)
+            if self._writer is None:
+                self._writer = self.store.writer(self.dataset, {
+                    'ohlcv': ((self.ohlcv_features,), 'float64'),
+                    'order_book': ((self.order_book_features,), 'float64'),
+                })
+            self._writer.append(ts, ohlcv=last[required_cols].to_numpy(dtype=float)[0], order_book=ob_processed)
+            logger.info(f"Buffered training row for {self.dataset} ({len(self._writer)} pending)")
         except Exception as e:
             logger.error(f"Data update failed: {str(e)}", exc_info=True)
 
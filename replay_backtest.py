@@ -0,0 +1,730 @@
+"""
+Event-Driven L2 Replay Backtester for the Execution Strategies
+
+Replays recorded order book updates and public trades in time order
+through ``ReplayClient`` — a stand-in for BybitClient — and drives
+``HFTTrading``, ``MarketMaker`` or ``ScalpingStrategy`` on a simulated
+clock, so their real ``execute_*`` methods are tested against market
+data instead of 1h candle closes.
+
+The simulator models:
+    - Latency: orders, amends and cancels reach the "exchange"
+      ``latency_ms`` (+ optional jitter) after they are sent. A batch call
+      is one request whose orders all travel with it.
+    - Queue position: a resting limit order joins the back of the visible
+      size at its price. Trades at that price consume the queue ahead
+      first, and a shrinking level caps it. Amending the price or raising
+      the size sends the order to the back again.
+    - Partial fills: market orders walk the book level by level, and
+      resting orders fill by the trade volume that reaches them.
+
+Book state is the array-based ``LocalOrderBook`` used live. Simulated
+events (order arrivals, cancels, strategy timers) sit in a heap that is
+merged with the time-ordered market data stream.
+
+Inputs:
+    - Raw WebSocket messages, one JSON object per line (``.jsonl`` or
+      ``.jsonl.gz``), as written by OrderBookCollector.
+    - The legacy ``data/bids_<symbol>_<ts>.csv`` / ``asks_...`` snapshot pairs.
+    - The ``orderbook_<symbol>`` dataset of a MarketStore (see
+      ``migrate_market_data.py``), range-scanned with ``--start``/``--end``.
+
+Usage:
+    python replay_backtest.py --data "data/ws/BTCUSDT/*.jsonl.gz" --strategy market_maker
+    python replay_backtest.py --csv-dir data --strategy hft --latency-ms 80
+    python replay_backtest.py --store data/store --start 1741305163000
+"""
+
+import argparse
+import glob
+import gzip
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from data_pipeline.local_order_book import LocalOrderBook
+from data_pipeline.market_store import MarketStore
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger('replay_backtest')
+
+# Market event kinds yielded by the loaders
+BOOK, SNAPSHOT, TRADE = 'book', 'snapshot', 'trade'
+
+_EPS = 1e-12
+_FINAL = ('Filled', 'Cancelled', 'PartiallyFilledCanceled')
+
+
+# ── Market Data Loaders ────────────────────────────────────────────────────
+
+
+def _open_text(path: str):
+    return gzip.open(path, 'rt') if path.endswith('.gz') else open(path, 'r')
+
+
+def iter_ws_messages(paths: List[str], symbol: Optional[str] = None) -> Iterator[Tuple[int, str, object]]:
+    """
+    Yield ``(ts_ms, kind, payload)`` from recorded WebSocket messages.
+
+    Files are read in name order (recorder files are hour-stamped).
+    Order book messages yield the whole message, trade messages yield
+    their ``data`` list. Timestamps are clamped to be non-decreasing.
+    """
+    last_ts = 0
+    for path in sorted(paths):
+        with _open_text(path) as fh:
+            for line in fh:
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    continue
+                topic = msg.get('topic', '')
+                if symbol and not topic.endswith(symbol):
+                    continue
+                ts = max(int(msg.get('ts', 0)), last_ts)
+                last_ts = ts
+                if topic.startswith('orderbook'):
+                    yield ts, BOOK, msg
+                elif topic.startswith('publicTrade'):
+                    yield ts, TRADE, msg.get('data', [])
+
+
+def iter_csv_snapshots(data_dir: str, symbol: str) -> Iterator[Tuple[int, str, object]]:
+    """Yield ``(ts_ms, 'snapshot', (bids, asks))`` from legacy CSV pairs."""
+    stamps = []
+    for path in glob.glob(os.path.join(data_dir, f"bids_{symbol}_*.csv")):
+        stamp = os.path.basename(path)[len(f"bids_{symbol}_"):-len('.csv')]
+        if stamp.isdigit():
+            stamps.append(int(stamp))
+    for stamp in sorted(stamps):
+        try:
+            bids = np.loadtxt(os.path.join(data_dir, f"bids_{symbol}_{stamp}.csv"),
+                              delimiter=',', skiprows=1, ndmin=2)
+            asks = np.loadtxt(os.path.join(data_dir, f"asks_{symbol}_{stamp}.csv"),
+                              delimiter=',', skiprows=1, ndmin=2)
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping snapshot %s: %s", stamp, e)
+            continue
+        yield stamp * 1000, SNAPSHOT, (bids, asks)
+
+
+def iter_store_snapshots(root: str, symbol: str, start: Optional[int] = None,
+                         end: Optional[int] = None) -> Iterator[Tuple[int, str, object]]:
+    """Yield ``(ts_ms, 'snapshot', (bids, asks))`` from a MarketStore dataset.
+
+    Chunks are memory-mapped, so only the scanned range is read.
+    """
+    store = MarketStore(root)
+    for chunk in store.iter_chunks(f"orderbook_{symbol}", start, end):
+        for ts, bids, asks in zip(chunk['ts'], chunk['bids'], chunk['asks']):
+            # Zero-size rows are padding
+            yield int(ts), SNAPSHOT, (bids[bids[:, 1] > 0], asks[asks[:, 1] > 0])
+
+
+# ── Simulated Exchange ─────────────────────────────────────────────────────
+
+
+@dataclass
+class SimOrder:
+    """An order inside the simulator."""
+    id: str
+    side: str                   # 'buy' / 'sell'
+    order_type: str             # 'market' / 'limit'
+    qty: float
+    price: Optional[float]
+    reduce_only: bool
+    sent_ts: int
+    status: str = 'Pending'     # Pending → New / PartiallyFilled / Filled / Cancelled
+    filled: float = 0.0
+    avg_price: float = 0.0
+    queue_ahead: float = 0.0    # visible size ahead of us at our price
+
+    @property
+    def remaining(self) -> float:
+        return self.qty - self.filled
+
+
+class ReplayClient:
+    """
+    BybitClient stand-in backed by a replayed order book.
+
+    Implements the calls the execution strategies make (``get_order_book``,
+    ``place_order``, ``amend_order``, the batch calls, ``get_positions`` …) against a
+    simulated clock. Orders are acknowledged immediately but only reach
+    the matching logic after the configured latency.
+    """
+
+    def __init__(
+        self,
+        symbol: str = "BTCUSDT",
+        initial_balance: float = 1000.0,
+        latency_ms: int = 50,
+        jitter_ms: int = 0,
+        maker_fee: float = 0.0002,
+        taker_fee: float = 0.00055,
+        depth: int = 50,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            symbol: Replayed trading pair.
+            initial_balance: Starting USDT balance.
+            latency_ms: One-way order/cancel latency.
+            jitter_ms: Uniform random latency added on top (seeded).
+            maker_fee: Fee rate for resting fills.
+            taker_fee: Fee rate for aggressive fills.
+            depth: Book levels kept per side.
+            seed: RNG seed for the latency jitter.
+        """
+        self.symbol = symbol
+        self.initial_balance = initial_balance
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.book = LocalOrderBook(symbol, depth=depth)
+        self.now = 0
+        self._rng = random.Random(seed)
+
+        # Same shape as TradingSystem.position_info, shared with the strategies
+        self.position_info = {
+            'size': 0.0, 'side': None, 'entry_price': 0.0,
+            'unrealised_pnl': 0.0, 'timestamp': None,
+        }
+        self.net_position = 0.0     # signed contracts
+        self.avg_entry = 0.0
+        self.realized_pnl = 0.0
+        self.fees = 0.0
+
+        self.orders: Dict[str, SimOrder] = {}
+        self.resting: Dict[str, SimOrder] = {}
+        self.fills: List[Dict] = []
+        self.recent_trades: deque = deque(maxlen=1000)
+        self.last_trade_price = 0.0
+        self.order_count = 0
+        self.cancel_count = 0
+        self.amend_count = 0
+        self.request_count = 0      # REST round trips (a batch counts once)
+
+        self._events: List[Tuple[int, int, str, object]] = []
+        self._seq = itertools.count()
+        self._order_ids = itertools.count(1)
+
+    # ── Clock & event queue ───────────────────────────────────────────────
+
+    def clock(self) -> float:
+        """Simulated time in seconds (drop-in for ``time.time``)."""
+        return self.now / 1000.0
+
+    def schedule(self, ts: int, kind: str, payload=None):
+        heapq.heappush(self._events, (ts, next(self._seq), kind, payload))
+
+    def advance(self, ts: int):
+        """Process every simulated event due at or before *ts*."""
+        events = self._events
+        while events and events[0][0] <= ts:
+            event_ts, _, kind, payload = heapq.heappop(events)
+            self.now = max(self.now, event_ts)
+            if kind == 'order':
+                self._on_order_arrival(payload)
+            elif kind == 'cancel':
+                self._on_cancel_arrival(payload)
+            elif kind == 'amend':
+                self._on_amend_arrival(*payload)
+            elif kind == 'timer':
+                payload()
+        self.now = max(self.now, ts)
+
+    def _latency(self) -> int:
+        if self.jitter_ms:
+            return self.latency_ms + self._rng.randint(0, self.jitter_ms)
+        return self.latency_ms
+
+    # ── Market data ───────────────────────────────────────────────────────
+
+    def on_market_event(self, ts: int, kind: str, payload):
+        """Apply one replayed market event at time *ts*."""
+        self.now = max(self.now, ts)
+        if kind == BOOK:
+            if self.book.apply_message(payload):
+                self._update_resting_from_book()
+        elif kind == SNAPSHOT:
+            bids, asks = payload
+            self.book.apply_snapshot(bids, asks, timestamp=ts)
+            self._update_resting_from_book()
+        elif kind == TRADE:
+            for trade in payload:
+                price, size = float(trade['p']), float(trade['v'])
+                self.recent_trades.append(trade)
+                self.last_trade_price = price
+                if self.resting:
+                    self._match_trade(price, size, trade.get('S', ''))
+
+    # ── BybitClient-compatible API ────────────────────────────────────────
+
+    def get_order_book(self, symbol: str) -> Dict[str, List[List[float]]]:
+        return self.book.to_dict(25)
+
+    def get_local_order_book(self, symbol: str) -> Optional[LocalOrderBook]:
+        return self.book if self.book.synced else None
+
+    def get_current_price(self, symbol: str) -> float:
+        mid = self.book.mid_price()
+        return mid if mid is not None else self.last_trade_price
+
+    def get_recent_trades(self, symbol: str, limit: int = 100) -> List[Dict]:
+        return list(self.recent_trades)[-limit:]
+
+    def get_balance(self) -> float:
+        return self.initial_balance + self.realized_pnl - self.fees
+
+    def get_positions(self, symbol: str) -> List[Dict]:
+        if abs(self.net_position) < _EPS:
+            return []
+        return [{
+            'symbol': symbol,
+            'contracts': str(abs(self.net_position)),
+            'side': 'long' if self.net_position > 0 else 'short',
+            'entryPrice': str(self.avg_entry),
+            'leverage': '1',
+            'timestamp': self.now,
+            'unrealisedPnl': str(self.unrealized_pnl()),
+        }]
+
+    def place_order(self, symbol: str, qty: float, side: str, order_type: str = "Market",
+                    price: Optional[float] = None, reduce_only: bool = False,
+                    order_link_id: Optional[str] = None) -> Dict:
+        self.request_count += 1
+        return self._send_order(symbol, qty, side, order_type, price, reduce_only)
+
+    def _send_order(self, symbol: str, qty: float, side: str, order_type: str,
+                    price: Optional[float], reduce_only: bool) -> Dict:
+        order_type = order_type.lower()
+        if qty <= 0 or (order_type == 'limit' and price is None):
+            return {}
+        order = SimOrder(
+            id=f"sim-{next(self._order_ids)}", side=side.lower(), order_type=order_type,
+            qty=float(qty), price=float(price) if price is not None else None,
+            reduce_only=reduce_only, sent_ts=self.now,
+        )
+        self.orders[order.id] = order
+        self.order_count += 1
+        self.schedule(self.now + self._latency(), 'order', order)
+        return {'id': order.id, 'status': 'New', 'symbol': symbol, 'side': order.side,
+                'amount': order.qty, 'price': order.price}
+
+    def cancel_order(self, symbol: str, order_id: str) -> Optional[Dict]:
+        self.request_count += 1
+        return self._send_cancel(order_id)
+
+    def _send_cancel(self, order_id: str) -> Optional[Dict]:
+        if order_id not in self.orders:
+            return None
+        self.cancel_count += 1
+        self.schedule(self.now + self._latency(), 'cancel', order_id)
+        return {'id': order_id, 'status': 'PendingCancel'}
+
+    def amend_order(self, symbol: str, order_id: str, qty: Optional[float] = None,
+                    price: Optional[float] = None) -> Optional[Dict]:
+        self.request_count += 1
+        return self._send_amend(order_id, qty, price)
+
+    def _send_amend(self, order_id: str, qty: Optional[float], price: Optional[float]) -> Optional[Dict]:
+        order = self.orders.get(order_id)
+        if order is None or order.status in _FINAL or order.order_type != 'limit':
+            return None
+        self.amend_count += 1
+        self.schedule(self.now + self._latency(), 'amend', (order_id, qty, price))
+        return {'id': order_id}
+
+    def place_batch_orders(self, symbol: str, orders: List[Dict]) -> List[Dict]:
+        self.request_count += 1
+        results = []
+        for o in orders:
+            ack = self._send_order(symbol, o['qty'], o['side'], o.get('order_type', 'Limit'),
+                                   o.get('price'), o.get('reduce_only', False))
+            results.append({'id': ack.get('id'), 'success': bool(ack), 'msg': '' if ack else 'rejected'})
+        return results
+
+    def amend_batch_orders(self, symbol: str, amends: List[Dict]) -> List[Dict]:
+        self.request_count += 1
+        results = []
+        for a in amends:
+            ack = self._send_amend(a['order_id'], a.get('qty'), a.get('price'))
+            results.append({'id': a['order_id'], 'success': ack is not None, 'msg': '' if ack else 'order not exists or too late to replace'})
+        return results
+
+    def cancel_batch_orders(self, symbol: str, order_ids: List[str]) -> List[Dict]:
+        self.request_count += 1
+        results = []
+        for order_id in order_ids:
+            ack = self._send_cancel(order_id)
+            results.append({'id': order_id, 'success': ack is not None, 'msg': '' if ack else 'unknown order'})
+        return results
+
+    def close_position(self, symbol: str) -> Optional[Dict]:
+        if abs(self.net_position) < _EPS:
+            return None
+        side = "SELL" if self.net_position > 0 else "BUY"
+        return self.place_order(symbol, abs(self.net_position), side, order_type="Market", reduce_only=True)
+
+    # ── Matching ──────────────────────────────────────────────────────────
+
+    def _on_order_arrival(self, order: SimOrder):
+        if order.status != 'Pending':
+            return
+        if order.reduce_only:
+            closable = abs(self.net_position) if (self.net_position > 0) == (order.side == 'sell') else 0.0
+            order.qty = min(order.qty, closable)
+            if order.qty <= _EPS:
+                order.status = 'Cancelled'
+                return
+        order.status = 'New'
+        self._take_liquidity(order)
+        if order.remaining <= _EPS:
+            return
+        if order.order_type == 'market':
+            # Book too thin for the rest — the remainder is cancelled (IOC semantics)
+            order.status = 'Cancelled' if order.filled == 0 else 'PartiallyFilledCanceled'
+            return
+        order.queue_ahead = self._level_size(order.side, order.price)
+        self.resting[order.id] = order
+
+    def _on_cancel_arrival(self, order_id: str):
+        order = self.orders.get(order_id)
+        if order is None or order.status in _FINAL:
+            return
+        order.status = 'Cancelled' if order.filled == 0 else 'PartiallyFilledCanceled'
+        self.resting.pop(order_id, None)
+
+    def _on_amend_arrival(self, order_id: str, qty: Optional[float], price: Optional[float]):
+        order = self.orders.get(order_id)
+        if order is None or order.status in _FINAL:
+            return      # filled or cancelled while the amend was in flight
+        repriced = price is not None and price != order.price
+        grown = qty is not None and qty > order.qty
+        if qty is not None and qty > order.filled:
+            order.qty = qty
+        if price is not None:
+            order.price = price
+        if order.status == 'Pending':
+            return      # overtook its own create; the arrival uses the new values
+        if repriced or grown:
+            # A new price or a larger size loses queue priority (a smaller size keeps it)
+            self.resting.pop(order.id, None)
+            if repriced:
+                self._take_liquidity(order)
+            if order.remaining > _EPS:
+                order.queue_ahead = self._level_size(order.side, order.price)
+                self.resting[order.id] = order
+
+    def _take_liquidity(self, order: SimOrder):
+        """Fill against the opposite side, level by level, up to the limit price."""
+        levels = self.book.asks if order.side == 'buy' else self.book.bids
+        for price, size in levels.tolist():
+            if order.remaining <= _EPS:
+                break
+            if order.order_type == 'limit':
+                if (order.side == 'buy' and price > order.price) or (order.side == 'sell' and price < order.price):
+                    break
+            self._fill(order, price, min(order.remaining, size), maker=False)
+
+    def _level_size(self, side: str, price: float) -> float:
+        levels = self.book.bids if side == 'buy' else self.book.asks
+        match = levels[levels[:, 0] == price] if len(levels) else levels
+        return float(match[0, 1]) if len(match) else 0.0
+
+    def _update_resting_from_book(self):
+        if not self.resting:
+            return
+        best_bid, best_ask = self.book.best_bid_ask()
+        for order in list(self.resting.values()):
+            crossed = (order.side == 'buy' and best_ask is not None and best_ask <= order.price) or \
+                      (order.side == 'sell' and best_bid is not None and best_bid >= order.price)
+            if crossed:
+                # The opposite side traded through our price — we were hit
+                self._fill(order, order.price, order.remaining, maker=True)
+                continue
+            # Volume ahead of us can only leave (cancels or fills), never grow
+            order.queue_ahead = min(order.queue_ahead, self._level_size(order.side, order.price))
+
+    def _match_trade(self, price: float, size: float, taker_side: str):
+        """Let a public trade fill resting orders it reaches.
+
+        The print is shared out in price-time priority: the best-priced
+        orders first, ties in the order they started resting. At each of
+        our prices the visible queue ahead is consumed before we fill, and
+        both come out of the print's size.
+        """
+        if taker_side == 'Sell':
+            reached = [o for o in self.resting.values() if o.side == 'buy' and price <= o.price]
+            reached.sort(key=lambda o: -o.price)
+        elif taker_side == 'Buy':
+            reached = [o for o in self.resting.values() if o.side == 'sell' and price >= o.price]
+            reached.sort(key=lambda o: o.price)
+        else:
+            return
+        left = size
+        cleared: Dict[float, float] = {}    # queue volume this print took at each of our prices
+        for order in reached:
+            done = cleared.get(order.price, 0.0)
+            ahead = min(max(0.0, order.queue_ahead - done), left)
+            left -= ahead
+            cleared[order.price] = done + ahead
+            order.queue_ahead = max(0.0, order.queue_ahead - done - ahead)
+            qty = min(order.remaining, left)
+            if qty > _EPS:
+                self._fill(order, order.price, qty, maker=True)
+                left -= qty
+
+    def _fill(self, order: SimOrder, price: float, qty: float, maker: bool):
+        if qty <= _EPS:
+            return
+        fee = price * qty * (self.maker_fee if maker else self.taker_fee)
+        self.fees += fee
+        order.avg_price = (order.avg_price * order.filled + price * qty) / (order.filled + qty)
+        order.filled += qty
+        if order.remaining <= _EPS:
+            order.status = 'Filled'
+            self.resting.pop(order.id, None)
+        else:
+            order.status = 'PartiallyFilled'
+
+        signed = qty if order.side == 'buy' else -qty
+        pos = self.net_position
+        realized = 0.0
+        if abs(pos) < _EPS or (pos > 0) == (signed > 0):
+            new = pos + signed
+            self.avg_entry = (abs(pos) * self.avg_entry + qty * price) / abs(new)
+        else:
+            closing = min(abs(pos), qty)
+            realized = closing * (price - self.avg_entry) * (1 if pos > 0 else -1)
+            self.realized_pnl += realized
+            new = pos + signed
+            if abs(new) < _EPS:
+                new, self.avg_entry = 0.0, 0.0
+            elif qty > closing:
+                self.avg_entry = price      # flipped through zero
+        self.net_position = new
+
+        self.position_info.update({
+            'size': abs(new),
+            'side': None if new == 0 else ('long' if new > 0 else 'short'),
+            'entry_price': self.avg_entry,
+            'timestamp': self.now,
+        })
+        self.fills.append({
+            'ts': self.now, 'order_id': order.id, 'side': order.side, 'price': price,
+            'qty': qty, 'maker': maker, 'fee': fee, 'realized_pnl': realized,
+            'latency_ms': self.now - order.sent_ts,
+        })
+
+    # ── Accounting ────────────────────────────────────────────────────────
+
+    def unrealized_pnl(self) -> float:
+        mark = self.get_current_price(self.symbol)
+        if abs(self.net_position) < _EPS or not mark:
+            return 0.0
+        return self.net_position * (mark - self.avg_entry)
+
+    def equity(self) -> float:
+        return self.get_balance() + self.unrealized_pnl()
+
+
+# ── Replay Engine ──────────────────────────────────────────────────────────
+
+
+def run_replay(
+    events: Iterable[Tuple[int, str, object]],
+    client: ReplayClient,
+    step: Callable[[], object],
+    interval_ms: int = 1000,
+    max_hold_ms: Optional[int] = None,
+) -> Dict:
+    """
+    Replay *events* through *client*, calling *step* every *interval_ms*.
+
+    The strategy timer lives in the client's event heap next to order and
+    cancel arrivals, and is merged with the market stream by timestamp.
+
+    Args:
+        events: Time-ordered ``(ts_ms, kind, payload)`` market events.
+        client: ReplayClient the strategy was built with.
+        step: Strategy callback (e.g. ``HFTTrading.execute_hft``).
+        interval_ms: Strategy decision interval.
+        max_hold_ms: If set, flatten a position held longer than this
+            (the execution strategies only open positions).
+
+    Returns:
+        Dict of replay statistics and PnL.
+    """
+    equity_curve: List[float] = []
+    opened_at = [None]
+
+    def on_timer():
+        if client.book.synced:
+            if max_hold_ms is not None:
+                if abs(client.net_position) < _EPS:
+                    opened_at[0] = None
+                elif opened_at[0] is None:
+                    opened_at[0] = client.now
+                elif client.now - opened_at[0] >= max_hold_ms:
+                    client.close_position(client.symbol)
+                    opened_at[0] = None
+            step()
+            equity_curve.append(client.equity())
+        client.schedule(client.now + interval_ms, 'timer', on_timer)
+
+    started = time.time()
+    n_events = 0
+    first_ts = last_ts = None
+    for ts, kind, payload in events:
+        if first_ts is None:
+            first_ts = ts
+            client.now = ts
+            client.schedule(ts + interval_ms, 'timer', on_timer)
+        client.advance(ts)
+        client.on_market_event(ts, kind, payload)
+        last_ts = ts
+        n_events += 1
+    if first_ts is None:
+        logger.error("No market events to replay")
+        return {}
+    # Let in-flight orders and cancels land, without further timer ticks
+    client._events = [e for e in client._events if e[2] != 'timer']
+    heapq.heapify(client._events)
+    client.advance(last_ts + 10 * client.latency_ms + client.jitter_ms)
+
+    elapsed = time.time() - started
+    equity = np.asarray(equity_curve or [client.initial_balance])
+    peak = np.maximum.accumulate(equity)
+    maker_fills = sum(1 for f in client.fills if f['maker'])
+    filled_orders = sum(1 for o in client.orders.values() if o.filled > 0)
+    return {
+        'events': n_events,
+        'simulated_hours': round((last_ts - first_ts) / 3_600_000, 3),
+        'wall_seconds': round(elapsed, 2),
+        'events_per_second': round(n_events / elapsed, 1) if elapsed > 0 else 0.0,
+        'orders': client.order_count,
+        'cancels': client.cancel_count,
+        'amends': client.amend_count,
+        'requests': client.request_count,
+        'fills': len(client.fills),
+        'maker_fills': maker_fills,
+        'fill_ratio': round(filled_orders / client.order_count, 4) if client.order_count else 0.0,
+        'volume': round(sum(f['qty'] for f in client.fills), 6),
+        'realized_pnl': round(client.realized_pnl, 4),
+        'fees': round(client.fees, 4),
+        'unrealized_pnl': round(client.unrealized_pnl(), 4),
+        'final_position': client.net_position,
+        'final_equity': round(client.equity(), 4),
+        'max_drawdown_pct': round(float(np.min((equity - peak) / peak)) * 100, 3),
+        'book_resyncs': client.book.resync_count,
+    }
+
+
+def build_strategy(name: str, client: ReplayClient, size: float, spread: Optional[float]) -> Callable[[], object]:
+    """Instantiate an execution strategy on the replay client and return its step method."""
+    if name == 'hft':
+        from execution.hft_trading import HFTTrading
+        kwargs = {'spread_threshold': spread} if spread is not None else {}
+        strategy = HFTTrading(client, client.symbol, position_info=client.position_info,
+                              order_size=size, clock=client.clock, **kwargs)
+        return strategy.execute_hft
+    if name == 'market_maker':
+        from execution.market_maker import MarketMaker
+        kwargs = {'spread': spread} if spread is not None else {}
+        strategy = MarketMaker(client, client.symbol, size=size, position_info=client.position_info, **kwargs)
+        return strategy.execute_market_making
+    if name == 'scalping':
+        from execution.scalping_strategy import ScalpingStrategy
+        kwargs = {'spread': spread} if spread is not None else {}
+        strategy = ScalpingStrategy(client, client.symbol, size=size, position_info=client.position_info, **kwargs)
+        return strategy.execute_scalp
+    raise ValueError(f"Unknown strategy: {name}")
+
+
+# ── Main ───────────────────────────────────────────────────────────────────
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded L2 data through an execution strategy')
+    parser.add_argument('--data', action='append', default=[],
+                        help='Recorded WebSocket JSONL file or glob (.jsonl / .jsonl.gz, repeatable)')
+    parser.add_argument('--csv-dir', type=str, help='Directory with legacy bids_/asks_ snapshot CSVs')
+    parser.add_argument('--store', type=str, help='MarketStore directory with an orderbook_<symbol> dataset')
+    parser.add_argument('--start', type=int, default=None, help='Replay from this timestamp (ms, --store only)')
+    parser.add_argument('--end', type=int, default=None, help='Replay up to this timestamp (ms, --store only)')
+    parser.add_argument('--symbol', default='BTCUSDT', help='Trading pair')
+    parser.add_argument('--strategy', default='market_maker', choices=['hft', 'market_maker', 'scalping'])
+    parser.add_argument('--size', type=float, default=0.001, help='Order size')
+    parser.add_argument('--spread', type=float, default=None, help='Strategy spread parameter (default: strategy default)')
+    parser.add_argument('--balance', type=float, default=1000.0, help='Initial balance')
+    parser.add_argument('--latency-ms', type=int, default=50, help='One-way order latency')
+    parser.add_argument('--jitter-ms', type=int, default=0, help='Random extra latency')
+    parser.add_argument('--interval-ms', type=int, default=1000, help='Strategy decision interval')
+    parser.add_argument('--max-hold-ms', type=int, default=None, help='Flatten positions held longer than this')
+    parser.add_argument('--maker-fee', type=float, default=0.0002, help='Maker fee rate')
+    parser.add_argument('--taker-fee', type=float, default=0.00055, help='Taker fee rate')
+    parser.add_argument('--verbose', action='store_true', help='Keep per-order strategy logs')
+    args = parser.parse_args()
+
+    paths = sorted({p for pattern in args.data for p in glob.glob(pattern)})
+    if paths:
+        events = iter_ws_messages(paths, args.symbol)
+        logger.info("Replaying %d recorded file(s)", len(paths))
+    elif args.store:
+        events = iter_store_snapshots(args.store, args.symbol, args.start, args.end)
+        logger.info("Replaying store snapshots from %s", args.store)
+    elif args.csv_dir:
+        events = iter_csv_snapshots(args.csv_dir, args.symbol)
+        logger.info("Replaying CSV snapshots from %s", args.csv_dir)
+    else:
+        parser.error("Provide --data, --store or --csv-dir")
+
+    if not args.verbose:
+        for name in ('execution', 'data_pipeline'):
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+    client = ReplayClient(
+        args.symbol, initial_balance=args.balance, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        maker_fee=args.maker_fee, taker_fee=args.taker_fee,
+    )
+    step = build_strategy(args.strategy, client, args.size, args.spread)
+    stats = run_replay(events, client, step, interval_ms=args.interval_ms, max_hold_ms=args.max_hold_ms)
+    if not stats:
+        sys.exit(1)
+
+    print("\n" + "=" * 55)
+    print(f"  REPLAY RESULTS — {args.strategy} on {args.symbol}")
+    print("=" * 55)
+    for key, value in stats.items():
+        print(f"  {key:<20} {value}")
+    print("=" * 55)
+
+    if client.fills:
+        import pandas as pd
+        from datetime import datetime
+        from config import BACKTEST_RESULTS_DIR
+        fills_file = BACKTEST_RESULTS_DIR / f"replay_{args.strategy}_{args.symbol}_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+        pd.DataFrame(client.fills).to_csv(fills_file, index=False)
+        logger.info("Fill log saved to %s", fills_file)
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -30,19 +30,20 @@ class RiskManagement:
         self.symbol = symbol
         self.min_position_size = 0.001  # Bybit minimum precision for BTCUSDT
 
-    def calculate_position_size(self, risk_percentage: float = 1.0) -> float:
+    def calculate_position_size(self, risk_percentage: float = 1.0, *, snapshot=None) -> float:
         """
         Calculates position size based on balance and risk percentage, enforcing minimum size.
 
         Args:
             risk_percentage (float): Percentage of balance to risk per trade (default: 1%)
+            snapshot (MarketSnapshot, optional): Shared per-cycle market data
 
         Returns:
             float: Position size in terms of the base currency (BTC)
         """
         try:
             risk_amount = self.account_balance * (risk_percentage / 100)
-            stop_loss_distance = self.calculate_stop_loss_distance()
+            stop_loss_distance = self.calculate_stop_loss_distance(snapshot=snapshot)
             if stop_loss_distance <= 0:
                 logger.warning("Stop-loss distance is zero or negative, returning minimum size.")
                 return self.min_position_size
@@ -58,15 +59,18 @@ class RiskManagement:
             logger.error(f"Position size calculation failed: {str(e)}")
             return self.min_position_size  # Fallback to minimum on error
 
-    def calculate_stop_loss_distance(self) -> float:
+    def calculate_stop_loss_distance(self, snapshot=None) -> float:
         """
         Calculate the stop-loss distance using a static percentage of the current price.
 
+        Args:
+            snapshot (MarketSnapshot, optional): Shared per-cycle market data
+
         Returns:
             float: Stop loss distance in terms of price
         """
         try:
-            current_price = self.client.get_current_price(self.symbol)
+            current_price = (snapshot or self.client).get_current_price(self.symbol)
             if current_price <= 0:
                 logger.warning("Current price is zero or negative, returning 0.")
                 return 0.0
@@ -2,11 +2,15 @@
 import logging
 import numpy as np
 import time
+from typing import Optional
+
+from data_pipeline.trade_flow import TradeFlow
 
 logger = logging.getLogger(__name__)
 
 class RiskManager:
-    def __init__(self, client, symbol: str = "BTCUSDT", max_loss: float = 0.02, volatility_threshold: float = 0.5):
+    def __init__(self, client, symbol: str = "BTCUSDT", max_loss: float = 0.02, volatility_threshold: float = 0.5,
+                 trade_flow: Optional[TradeFlow] = None, window: float = 60.0):
         """
         Initialize the Risk Manager.
 
@@ -15,38 +19,46 @@ class RiskManager:
             symbol (str): Trading pair
             max_loss (float): Maximum percentage loss before exiting a trade
             volatility_threshold (float): Adjust spread based on volatility
+            trade_flow (TradeFlow, optional): Shared trade-flow aggregates (default: a REST-polled one)
+            window (float): Trade-flow window in seconds (must be one of its windows)
         """
         self.client = client
         self.symbol = symbol
         self.max_loss = max_loss
         self.volatility_threshold = volatility_threshold
         self.current_volatility = 0.0
+        self.trade_flow = trade_flow or TradeFlow(symbol, windows=(window,))
+        self.window = window
         logger.info(f"RiskManager initialized for {symbol}")
 
-    def check_volatility(self) -> bool:
+    def check_volatility(self, snapshot=None) -> bool:
         """
         Measures market volatility and adjusts the spread dynamically.
 
+        Args:
+            snapshot (MarketSnapshot, optional): Shared per-cycle market data
+
         Returns:
             bool: True if high volatility detected, False otherwise
         """
         try:
-            # Try fetching recent trades first
-            price_data = self.client.get_recent_trades(self.symbol, limit=100)
-            if not price_data or len(price_data) < 2:
+            source = snapshot or self.client
+            # Trade-to-trade returns from the shared trade flow first
+            if not self.trade_flow.streaming:
+                self.trade_flow.poll(source, limit=100)
+            flow = self.trade_flow.stats(self.window)
+            if flow['count'] >= 2:
+                self.current_volatility = flow['trade_return_std']
+            else:
                 logger.warning(f"Insufficient trade data for {self.symbol} volatility calculation. Falling back to OHLCV.")
                 # Fallback to OHLCV data
-                ohlcv_data = self.client.get_historical_data(self.symbol, interval='1m', limit=100)
-                if not ohlcv_data or len(ohlcv_data) < 2:
+                ohlcv_data = source.get_historical_data(self.symbol, interval='1m', limit=100)
+                if ohlcv_data is None or len(ohlcv_data) < 2:
                     logger.warning(f"Insufficient OHLCV data for {self.symbol} volatility calculation.")
                     self.current_volatility = 0.0
                     return False
-                prices = [float(candle[4]) for candle in ohlcv_data]  # Use closing prices
-            else:
-                prices = [float(trade["price"]) for trade in price_data]
-
-            returns = np.diff(prices) / prices[:-1]
-            self.current_volatility = np.std(returns)
+                prices = np.asarray(ohlcv_data, dtype=float)[:, 4]  # Use closing prices
+                self.current_volatility = float(np.std(np.diff(prices) / prices[:-1]))
             logger.debug(f"Volatility for {self.symbol}: {self.current_volatility:.4f}")
 
             if self.current_volatility > self.volatility_threshold:
@@ -0,0 +1,98 @@
+"""
+Rolling Hurst / Entropy Feature Engine
+
+Vectorized replacements for the per-window ``rolling(...).apply`` loops of
+``AdvancedTradingStrategy._feature_engineering``, used by ``FeaturePipeline``
+for the Hurst and entropy columns.
+
+* ``rolling_hurst()`` views the close series as a ``(windows, window)``
+  matrix (``sliding_window_view``, no copy), takes the lagged-difference
+  standard deviation of every window in one NumPy call per lag and fits
+  all the log-log slopes with one batched least-squares expression
+  instead of a ``polyfit`` per window.
+* ``rolling_entropy()`` bins every window at once — the same equal-width
+  edges, right-edge handling and density normalisation as
+  ``np.histogram(bins=20, density=True)`` — with one offset ``bincount``.
+* Both return the same values as the per-window functions (NaN for the
+  first ``window - 1`` bars and for windows with a zero lagged spread).
+  The default Hurst lags stop at ``window - 2``: the old ``range(2, 20)``
+  on 20 bars included lag 19, whose single difference has zero spread,
+  so every window was NaN and ``dropna()`` emptied the feature frame.
+"""
+
+import logging
+from typing import Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+
+def _nan_padded(values: np.ndarray, n: int) -> np.ndarray:
+    out = np.full(n, np.nan)
+    out[n - len(values):] = values
+    return out
+
+
+def hurst_windows(windows: np.ndarray, lags: Optional[Sequence[int]] = None) -> np.ndarray:
+    """Hurst exponent of each row of a ``(m, window)`` matrix.
+
+    The slope of ``log std(x[t + lag] - x[t])`` against ``log lag``, as
+    ``np.polyfit(np.log(lags), np.log(tau), 1)[0]`` per row. *lags*
+    defaults to ``range(2, window - 1)`` (at least two differences each).
+    """
+    windows = np.asarray(windows, dtype=np.float64)
+    lags = np.arange(2, windows.shape[1] - 1) if lags is None else np.asarray(lags)
+    tau = np.empty((len(windows), len(lags)))
+    for j, lag in enumerate(lags):
+        tau[:, j] = np.std(windows[:, lag:] - windows[:, :-lag], axis=1)
+    x = np.log(lags)
+    dx = x - x.mean()
+    valid = np.all(tau > 0, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = np.log(tau)
+        slope = (y - y.mean(axis=1, keepdims=True)) @ dx / (dx @ dx)
+    slope[~valid] = np.nan
+    return slope
+
+
+def entropy_windows(windows: np.ndarray, bins: int = 20) -> np.ndarray:
+    """Shannon entropy (bits) of each row's density histogram.
+
+    ``-sum(p * log2(p + 1e-10))`` with ``p = np.histogram(row, bins,
+    density=True)[0]``, binned exactly like ``np.histogram``.
+    """
+    windows = np.asarray(windows, dtype=np.float64)
+    m, n = windows.shape
+    lo, hi = windows.min(axis=1), windows.max(axis=1)
+    flat = lo == hi
+    lo, hi = np.where(flat, lo - 0.5, lo), np.where(flat, hi + 0.5, hi)
+    edges = np.linspace(lo, hi, bins + 1, axis=1)
+
+    # Same index arithmetic and ±1 ULP edge corrections as np.histogram
+    idx = ((windows - lo[:, None]) / (hi - lo)[:, None] * bins).astype(np.intp)
+    idx[idx == bins] -= 1
+    idx -= windows < np.take_along_axis(edges, idx, axis=1)
+    idx += (windows >= np.take_along_axis(edges, idx + 1, axis=1)) & (idx != bins - 1)
+
+    offsets = np.arange(m)[:, None] * bins
+    counts = np.bincount((idx + offsets).ravel(), minlength=m * bins).reshape(m, bins)
+    p = counts / np.diff(edges, axis=1) / n
+    return -np.sum(p * np.log2(p + 1e-10), axis=1)
+
+
+def rolling_hurst(close: np.ndarray, window: int = 20, lags: Optional[Sequence[int]] = None) -> np.ndarray:
+    """Rolling Hurst exponent, aligned with *close* (NaN until the first full window)."""
+    close = np.asarray(close, dtype=np.float64)
+    if len(close) < window:
+        return np.full(len(close), np.nan)
+    return _nan_padded(hurst_windows(sliding_window_view(close, window), lags), len(close))
+
+
+def rolling_entropy(close: np.ndarray, window: int = 20, bins: int = 20) -> np.ndarray:
+    """Rolling histogram entropy, aligned with *close* (NaN until the first full window)."""
+    close = np.asarray(close, dtype=np.float64)
+    if len(close) < window:
+        return np.full(len(close), np.nan)
+    return _nan_padded(entropy_windows(sliding_window_view(close, window), bins), len(close))
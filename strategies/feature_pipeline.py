@@ -0,0 +1,272 @@
+"""
+Incremental Feature Pipeline
+
+Keeps ``AdvancedTradingStrategy``'s feature matrix (SMA, RSI, MACD, ATR,
+Hurst, entropy, VWAP) keyed by candle timestamp across ``get_signal``
+calls, instead of rebuilding the whole pandas frame from every fetch.
+
+* ``update(candles)`` lines the fetched candles up with the stored rows by
+  timestamp. Only rows that are new, or whose candle changed (the still
+  forming last bar), are computed — each from the fixed-size tail it
+  depends on and the previous row's EMA / cumulative state — so the cost
+  per signal does not grow with the lookback.
+* The first update, a gap, or a fetch reaching further back than the
+  stored history (a retraining download) is computed in one vectorized
+  batch pass. Batch and incremental rows use the same definitions.
+* EMAs and the VWAP carry over between fetches: EMAs run from the first
+  stored bar, and the VWAP is a rolling ``vwap_window``-bar VWAP (the old
+  cumulative VWAP of a ``vwap_window``-bar fetch, anchored per bar rather
+  than at whichever candle a fetch happened to start with).
+* Input whose timestamps are not positive and strictly increasing (e.g.
+  the zero-filled array a failed fetch returns) is rejected and the
+  stored rows are kept.
+* ``latest(columns, rows)`` returns the last complete (NaN-free) rows as
+  an array for the models; ``frame()`` returns them as the DataFrame the
+  training code expects.
+"""
+
+import logging
+import threading
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from strategies.feature_engine import entropy_windows, hurst_windows, rolling_entropy, rolling_hurst
+
+logger = logging.getLogger(__name__)
+
+RAW_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+FEATURE_COLUMNS = ('sma_10', 'sma_50', 'rsi_14', 'ema_12', 'ema_26', 'macd', 'signal_line',
+                   'atr', 'hurst', 'entropy', 'vwap')
+_STATE_COLUMNS = ('tr', 'cum_pv', 'cum_v')      # per-row state, not exposed
+_COLUMNS = FEATURE_COLUMNS + _STATE_COLUMNS
+_COL = {name: i for i, name in enumerate(_COLUMNS)}
+_RAW = {name: i for i, name in enumerate(RAW_COLUMNS)}
+
+
+def _ema_alpha(span: int) -> float:
+    return 2.0 / (span + 1)
+
+
+class FeaturePipeline:
+    """
+    Per-bar feature matrix maintained incrementally from 1-minute candles.
+    """
+
+    def __init__(self, vwap_window: int = 120, hurst_window: int = 20, max_rows: int = 5000):
+        """
+        Args:
+            vwap_window: Bars in the rolling VWAP.
+            hurst_window: Bars per Hurst / entropy window.
+            max_rows: Rows kept; the oldest are dropped beyond this.
+        """
+        self.vwap_window = vwap_window
+        self.hurst_window = hurst_window
+        self.max_rows = max(max_rows, vwap_window + 1)
+        self.rows_computed = 0              # rows computed so far (for diagnostics)
+        self._raw = np.empty((0, len(RAW_COLUMNS)))
+        self._feat = np.empty((0, len(_COLUMNS)))
+        self._valid = np.empty(0, dtype=bool)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    # ── Input ──────────────────────────────────────────────────────────────
+
+    def update(self, candles: np.ndarray) -> int:
+        """Add fetched candles (``timestamp, open, high, low, close, volume`` rows, oldest first).
+
+        Returns:
+            Number of rows computed (0 if the candles were rejected).
+        """
+        candles = np.asarray(candles, dtype=np.float64).reshape(-1, len(RAW_COLUMNS))
+        if not len(candles):
+            return 0
+        ts = candles[:, 0]
+        if not (ts[0] > 0 and np.all(np.diff(ts) > 0)):
+            # A failed fetch returns zeros; rebuilding from it would wipe the history
+            logger.warning("Rejected %d candles with zero or non-increasing timestamps", len(candles))
+            return 0
+        with self._lock:
+            start = self._overlap(candles)
+            if start is None:
+                self._bootstrap(candles)
+                return len(candles)
+            if start < len(candles):
+                if np.array_equal(self._raw[-1], candles[start]):
+                    start += 1                  # newest stored bar unchanged
+                else:
+                    self._truncate(len(self._raw) - 1)
+            for row in candles[start:]:
+                self._append(row)
+            self._trim()
+            return len(candles) - start
+
+    def _overlap(self, candles: np.ndarray) -> Optional[int]:
+        """Index of the fetched copy of the newest stored bar, or None if a batch rebuild is needed."""
+        if not len(self._raw) or candles[0, 0] < self._raw[0, 0]:
+            return None
+        last_ts = self._raw[-1, 0]
+        start = int(np.searchsorted(candles[:, 0], last_ts))
+        if start == len(candles):
+            return start                        # nothing newer than what is stored
+        # The stored bars must continue into the fetched ones without a gap
+        return start if candles[start, 0] == last_ts else None
+
+    # ── Batch (bootstrap) ──────────────────────────────────────────────────
+
+    def _bootstrap(self, candles: np.ndarray):
+        candles = candles[-self.max_rows:]
+        n = len(candles)
+        _, _, high, low, close, volume = candles.T
+        feat = np.full((n, len(_COLUMNS)), np.nan)
+
+        for period, col in ((10, 'sma_10'), (50, 'sma_50')):
+            if n >= period:
+                feat[period - 1:, _COL[col]] = sliding_window_view(close, period).mean(axis=1)
+
+        delta = np.diff(close, prepend=close[0])
+        if n >= 14:
+            gain = sliding_window_view(np.maximum(delta, 0.0), 14).mean(axis=1)
+            loss = sliding_window_view(np.maximum(-delta, 0.0), 14).mean(axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                feat[13:, _COL['rsi_14']] = 100 - 100 / (1 + gain / loss)
+
+        ema_12, ema_26, signal = np.empty(n), np.empty(n), np.empty(n)
+        a12, a26, a9 = _ema_alpha(12), _ema_alpha(26), _ema_alpha(9)
+        e12 = e26 = close[0]
+        s = 0.0
+        for i, x in enumerate(close):
+            if i:
+                e12 = a12 * x + (1 - a12) * e12
+                e26 = a26 * x + (1 - a26) * e26
+                s = a9 * (e12 - e26) + (1 - a9) * s
+            ema_12[i], ema_26[i], signal[i] = e12, e26, s
+        feat[:, _COL['ema_12']] = ema_12
+        feat[:, _COL['ema_26']] = ema_26
+        feat[:, _COL['macd']] = ema_12 - ema_26
+        feat[:, _COL['signal_line']] = signal
+
+        prev_close = np.concatenate(([np.nan], close[:-1]))
+        tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        feat[:, _COL['tr']] = tr
+        if n >= 14:
+            feat[13:, _COL['atr']] = sliding_window_view(tr, 14).mean(axis=1)
+
+        feat[:, _COL['hurst']] = rolling_hurst(close, self.hurst_window)
+        feat[:, _COL['entropy']] = rolling_entropy(close, self.hurst_window)
+
+        cum_pv = np.cumsum(volume * (high + low + close) / 3)
+        cum_v = np.cumsum(volume)
+        feat[:, _COL['cum_pv']] = cum_pv
+        feat[:, _COL['cum_v']] = cum_v
+        w = self.vwap_window
+        with np.errstate(divide='ignore', invalid='ignore'):
+            feat[:, _COL['vwap']] = (cum_pv - np.concatenate((np.zeros(min(w, n)), cum_pv[:-w])))\
+                / (cum_v - np.concatenate((np.zeros(min(w, n)), cum_v[:-w])))
+
+        self._raw = candles.copy()
+        self._feat = feat
+        self._valid = ~np.isnan(feat[:, :len(FEATURE_COLUMNS)]).any(axis=1)
+        self.rows_computed += n
+        logger.debug("Feature pipeline rebuilt from %d candles", n)
+
+    # ── Incremental rows ───────────────────────────────────────────────────
+
+    def _append(self, candle: np.ndarray):
+        self._raw = np.vstack((self._raw, candle))
+        i = len(self._raw) - 1
+        self._feat = np.vstack((self._feat, self._row(i)))
+        self._valid = np.append(self._valid, not np.isnan(self._feat[i, :len(FEATURE_COLUMNS)]).any())
+        self.rows_computed += 1
+
+    def _row(self, i: int) -> np.ndarray:
+        """Features of row *i* from the raw tail and row ``i - 1``'s state."""
+        raw = self._raw
+        _, _, high, low, close, volume = raw[i]
+        out = np.full(len(_COLUMNS), np.nan)
+        prev = self._feat[i - 1] if i > 0 else None
+
+        for period, col in ((10, 'sma_10'), (50, 'sma_50')):
+            if i >= period - 1:
+                out[_COL[col]] = raw[i - period + 1:i + 1, _RAW['close']].mean()
+
+        if i >= 13:
+            closes = raw[max(i - 14, 0):i + 1, _RAW['close']]
+            delta = np.diff(closes, prepend=closes[0]) if i == 13 else np.diff(closes)
+            gain, loss = np.maximum(delta, 0.0).mean(), np.maximum(-delta, 0.0).mean()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                out[_COL['rsi_14']] = 100 - 100 / (1 + gain / loss)
+
+        if prev is None:
+            e12 = e26 = close
+            signal = 0.0
+        else:
+            e12 = _ema_alpha(12) * close + (1 - _ema_alpha(12)) * prev[_COL['ema_12']]
+            e26 = _ema_alpha(26) * close + (1 - _ema_alpha(26)) * prev[_COL['ema_26']]
+            signal = _ema_alpha(9) * (e12 - e26) + (1 - _ema_alpha(9)) * prev[_COL['signal_line']]
+        out[_COL['ema_12']], out[_COL['ema_26']] = e12, e26
+        out[_COL['macd']], out[_COL['signal_line']] = e12 - e26, signal
+
+        tr = high - low
+        if i > 0:
+            prev_close = raw[i - 1, _RAW['close']]
+            tr = max(tr, abs(high - prev_close), abs(low - prev_close))
+        out[_COL['tr']] = tr
+        if i >= 13:
+            out[_COL['atr']] = np.append(self._feat[i - 13:i, _COL['tr']], tr).mean()
+
+        w = self.hurst_window
+        if i >= w - 1:
+            window = raw[i - w + 1:i + 1, _RAW['close']][None, :]
+            out[_COL['hurst']] = hurst_windows(window)[0]
+            out[_COL['entropy']] = entropy_windows(window)[0]
+
+        pv = volume * (high + low + close) / 3
+        out[_COL['cum_pv']] = pv if prev is None else prev[_COL['cum_pv']] + pv
+        out[_COL['cum_v']] = volume if prev is None else prev[_COL['cum_v']] + volume
+        j = i - self.vwap_window
+        base_pv = self._feat[j, _COL['cum_pv']] if j >= 0 else 0.0
+        base_v = self._feat[j, _COL['cum_v']] if j >= 0 else 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[_COL['vwap']] = (out[_COL['cum_pv']] - base_pv) / (out[_COL['cum_v']] - base_v)
+        return out
+
+    def _truncate(self, n: int):
+        self._raw, self._feat, self._valid = self._raw[:n], self._feat[:n], self._valid[:n]
+
+    def _trim(self):
+        # max_rows > vwap_window, so the rolling VWAP base row is always kept
+        excess = len(self._raw) - self.max_rows
+        if excess > 0:
+            self._raw, self._feat, self._valid = self._raw[excess:], self._feat[excess:], self._valid[excess:]
+
+    # ── Readers ────────────────────────────────────────────────────────────
+
+    def latest(self, columns: Sequence[str], rows: int = 1) -> np.ndarray:
+        """The last *rows* complete rows of *columns* (raw or feature names), oldest first."""
+        with self._lock:
+            idx = np.flatnonzero(self._valid)[-rows:]
+            return np.column_stack([self._column(name)[idx] for name in columns])
+
+    def valid_rows(self) -> int:
+        """Number of complete (NaN-free) rows."""
+        with self._lock:
+            return int(self._valid.sum())
+
+    def frame(self) -> pd.DataFrame:
+        """Complete rows as a DataFrame indexed by candle time (for training)."""
+        with self._lock:
+            data = {name: self._column(name)[self._valid] for name in RAW_COLUMNS[1:] + FEATURE_COLUMNS}
+            index = pd.to_datetime(self._raw[self._valid, 0], unit='ms')
+        df = pd.DataFrame(data, index=index)
+        df.index.name = 'timestamp'
+        return df
+
+    def _column(self, name: str) -> np.ndarray:
+        if name in _RAW:
+            return self._raw[:, _RAW[name]]
+        return self._feat[:, _COL[name]]
@@ -25,6 +25,8 @@ from xgboost import XGBClassifier
 from lightgbm import LGBMClassifier
 from sklearn.model_selection import TimeSeriesSplit
 from bybit_client import BybitClient
+from analysis.microstructure import MicrostructureFeatures, book_arrays, compute_features
+from strategies.feature_pipeline import FeaturePipeline
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -45,6 +47,10 @@ class Config:
     MODEL_SAVE_FORMAT = "transformer_model_{timestamp}.h5"
     SCALER_SAVE_FORMAT = "scaler_{timestamp}.pkl"
     ENSEMBLE_MODEL_PATH = MODEL_SAVE_DIR / "ensemble_models.pkl"
+    FEATURE_HISTORY_BARS = 5000  # 1m feature rows kept by the pipeline
+
+ENSEMBLE_FEATURES = ['sma_10', 'sma_50', 'rsi_14', 'macd', 'hurst', 'entropy', 'vwap', 'atr']
+TRANSFORMER_FEATURES = ENSEMBLE_FEATURES + ['close', 'volume']
 
 class AdvancedTradingStrategy:
     def __init__(
@@ -60,10 +66,13 @@ class AdvancedTradingStrategy:
         stop_loss_factor: float = 0.015,
         take_profit_factor: float = 0.03,
         sequence_length: int = 60,
-        ensemble_confidence_threshold: float = 0.65
+        ensemble_confidence_threshold: float = 0.65,
+        features: Optional[MicrostructureFeatures] = None
     ):
         self.client = client
         self.symbol = symbol
+        # Shared book features (recomputed once per book update, not per call)
+        self.features = features or MicrostructureFeatures(symbol, imbalance_levels=(N,))
         self.N = N
         self.threshold = initial_threshold
         self.interval = interval
@@ -83,6 +92,9 @@ class AdvancedTradingStrategy:
         
         self.transformer_model = None
         self.scaler = RobustScaler()
+        # Feature rows keyed by candle time; each signal computes only new / changed bars
+        self.feature_pipeline = FeaturePipeline(vwap_window=lookback_period + sequence_length,
+                                                max_rows=Config.FEATURE_HISTORY_BARS)
         self.last_trained = None
         self.ensemble_models = {
             'gb': GradientBoostingClassifier(n_estimators=200, random_state=42),
@@ -118,14 +130,15 @@ class AdvancedTradingStrategy:
     def get_current_price(self) -> Optional[float]:
         return self._safe_api_call(self.client.get_current_price, self.symbol)
 
-    def compute_imbalance(self, orderbook: Dict) -> float:
+    def compute_imbalance(self, orderbook: Optional[Dict] = None) -> float:
+        """Top-N imbalance of the current book, or of *orderbook* if one is given."""
         try:
-            bids = [(float(p), float(s)) for p, s in orderbook['bids']][:self.N]
-            asks = [(float(p), float(s)) for p, s in orderbook['asks']][:self.N]
-            bid_volume = sum(s for _, s in bids)
-            ask_volume = sum(s for _, s in asks)
-            total_volume = bid_volume + ask_volume
-            return (bid_volume - ask_volume) / total_volume if total_volume > 0 else 0
+            if orderbook is None and self.N in self.features.imbalance_levels:
+                features = self.features.get(self.client)
+            else:
+                features = compute_features(*book_arrays(orderbook or self.client.get_order_book(self.symbol)),
+                                            imbalance_levels=(self.N,))
+            return features[f'imbalance_{self.N}'] if features else 0.0
         except Exception as e:
             logger.error(f"Order book imbalance error: {str(e)}")
             return 0.0
@@ -144,48 +157,9 @@ class AdvancedTradingStrategy:
         return momentum / len(hist_data)
 
     def _feature_engineering(self, hist_data: np.ndarray) -> pd.DataFrame:
-        df = pd.DataFrame(hist_data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df.set_index('timestamp', inplace=True)
-
-        # Technical Indicators
-        df['sma_10'] = df['close'].rolling(window=10).mean()
-        df['sma_50'] = df['close'].rolling(window=50).mean()
-        delta = df['close'].diff()
-        gain = delta.where(delta > 0, 0).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['rsi_14'] = 100 - (100 / (1 + rs))
-        df['ema_12'] = df['close'].ewm(span=12, adjust=False).mean()
-        df['ema_26'] = df['close'].ewm(span=26, adjust=False).mean()
-        df['macd'] = df['ema_12'] - df['ema_26']
-        df['signal_line'] = df['macd'].ewm(span=9, adjust=False).mean()
-        
-        # Fix ATR calculation
-        df['close_prev'] = df['close'].shift(1)
-        df['tr1'] = df['high'] - df['low']
-        df['tr2'] = (df['high'] - df['close_prev']).abs()
-        df['tr3'] = (df['low'] - df['close_prev']).abs()
-        df['tr'] = df[['tr1', 'tr2', 'tr3']].max(axis=1)
-        df['atr'] = df['tr'].rolling(window=14).mean()
-        df.drop(['close_prev', 'tr1', 'tr2', 'tr3', 'tr'], axis=1, inplace=True)
-
-        # Advanced Features
-        df['hurst'] = df['close'].rolling(20).apply(self._compute_hurst, raw=True)
-        df['entropy'] = df['close'].rolling(20).apply(self._shannon_entropy, raw=True)
-        df['vwap'] = (df['volume'] * (df['high'] + df['low'] + df['close']) / 3).cumsum() / df['volume'].cumsum()
-
-        df.dropna(inplace=True)
-        return df
-
-    def _compute_hurst(self, series):
-        lags = range(2, 20)
-        tau = [np.std(np.subtract(series[lag:], series[:-lag])) for lag in lags]
-        return np.polyfit(np.log(lags), np.log(tau), 1)[0]
-
-    def _shannon_entropy(self, series):
-        p = np.histogram(series, bins=20, density=True)[0]
-        return -np.sum(p * np.log2(p + 1e-10))
+        """Feature frame for training, from the same pipeline the live signals read."""
+        self.feature_pipeline.update(hist_data)
+        return self.feature_pipeline.frame()
 
     def _build_transformer_model(self) -> Model:
         inputs = Input(shape=(self.sequence_length, 10))  # 10 features
@@ -200,8 +174,7 @@ class AdvancedTradingStrategy:
         return model
 
     def _train_ensemble_models(self, df: pd.DataFrame):
-        features = ['sma_10', 'sma_50', 'rsi_14', 'macd', 'hurst', 'entropy', 'vwap', 'atr']
-        X = self.scaler.fit_transform(df[features])
+        X = self.scaler.fit_transform(df[ENSEMBLE_FEATURES])
         df['target'] = (df['close'].shift(-1) > df['close']).astype(int)
         X = X[:-1]
         y = df['target'][:-1]
@@ -216,25 +189,22 @@ class AdvancedTradingStrategy:
         logger.info("Ensemble models trained and saved")
 
     def _train_transformer_model(self, df: pd.DataFrame):
-        features = ['sma_10', 'sma_50', 'rsi_14', 'macd', 'hurst', 'entropy', 'vwap', 'atr', 'close', 'volume']
-        X = self.scaler.fit_transform(df[features])
+        X = self.scaler.fit_transform(df[TRANSFORMER_FEATURES])
         X_seq = np.array([X[i:i+self.sequence_length] for i in range(len(X) - self.sequence_length)])
         y = (df['close'].shift(-1) > df['close']).astype(int)[self.sequence_length:].values
         self.transformer_model.fit(X_seq, y, epochs=15, batch_size=32, verbose=0)
         logger.info("Transformer model trained")
 
-    def _predict_ensemble(self, df: pd.DataFrame) -> float:
-        features = ['sma_10', 'sma_50', 'rsi_14', 'macd', 'hurst', 'entropy', 'vwap', 'atr']
-        X = self.scaler.transform(df[features].iloc[-1:].values)
+    def _predict_ensemble(self) -> float:
+        X = self.scaler.transform(self.feature_pipeline.latest(ENSEMBLE_FEATURES, 1))
         probs = [model.predict_proba(X)[:, 1][0] for model in self.ensemble_models.values()]
         avg_prob = np.mean(probs)
         return 1.0 if avg_prob > self.ensemble_confidence_threshold else -1.0 if avg_prob < (1 - self.ensemble_confidence_threshold) else 0.0
 
-    def _predict_transformer(self, df: pd.DataFrame) -> float:
+    def _predict_transformer(self) -> float:
         if not self.transformer_model:
             return 0.0
-        features = ['sma_10', 'sma_50', 'rsi_14', 'macd', 'hurst', 'entropy', 'vwap', 'atr', 'close', 'volume']
-        X = self.scaler.transform(df[features].tail(self.sequence_length))
+        X = self.scaler.transform(self.feature_pipeline.latest(TRANSFORMER_FEATURES, self.sequence_length))
         X_seq = X.reshape(1, self.sequence_length, -1)
         return self.transformer_model.predict(X_seq, verbose=0)[0][0]
 
@@ -297,12 +267,12 @@ class AdvancedTradingStrategy:
             return 0.0
 
         self._retrain_model_if_needed()
-        df = self._feature_engineering(hist_data)
-        if len(df) < self.sequence_length:
+        self.feature_pipeline.update(hist_data)
+        if self.feature_pipeline.valid_rows() < self.sequence_length:
             return 0.0
 
-        transformer_signal = self._predict_transformer(df)
-        ensemble_signal = self._predict_ensemble(df)
+        transformer_signal = self._predict_transformer()
+        ensemble_signal = self._predict_ensemble()
         momentum = self.calculate_momentum(hist_data_multi)
         volatility = self.calculate_volatility(hist_data)
 
@@ -0,0 +1,64 @@
+"""IncrementalIndicators must match assess_market over the trailing window."""
+
+import numpy as np
+import pytest
+
+from ai.indicator_engine import IncrementalIndicators
+from ai.self_learning import HedgeFundStrategy
+
+WINDOW = 100
+FIELDS = ('rsi', 'atr', 'atr_pct', 'ema_short', 'ema_long', 'volume_ratio')
+
+
+def _candles(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.random(n) * 0.002)
+    low = np.minimum(open_, close) * (1 - rng.random(n) * 0.002)
+    volume = rng.random(n) * 100 + 1
+    return np.column_stack([np.arange(n) * 3_600_000.0, open_, high, low, close, volume])
+
+
+def _baseline(strategy: HedgeFundStrategy, ohlcv: np.ndarray, end: int):
+    w = ohlcv[max(0, end - WINDOW + 1):end + 1]
+    return strategy.assess_market(w[:, 4], w[:, 2], w[:, 3], w[:, 5])
+
+
+def _assert_matches(state, ref):
+    for field in FIELDS:
+        assert getattr(state, field) == pytest.approx(getattr(ref, field), rel=1e-9), field
+    assert state.trend_slope == pytest.approx(ref.trend_slope, rel=1e-6, abs=1e-12)
+    assert state.regime == ref.regime
+
+
+def test_matches_windowed_assess_market_on_long_stream():
+    strategy = HedgeFundStrategy()
+    engine = IncrementalIndicators(strategy, window=WINDOW)
+    ohlcv = _candles(2500)
+    for i, candle in enumerate(ohlcv):
+        state = engine.update(candle)
+        _assert_matches(state, _baseline(strategy, ohlcv, i))
+    assert engine.window_bars == WINDOW
+
+
+@pytest.mark.parametrize('bar', [999, 1999])
+def test_rsi_does_not_drift_with_stream_length(bar):
+    strategy = HedgeFundStrategy()
+    engine = IncrementalIndicators(strategy, window=WINDOW)
+    ohlcv = _candles(bar + 1, seed=1)
+    engine.seed(ohlcv)
+    assert engine.state.rsi == pytest.approx(_baseline(strategy, ohlcv, bar).rsi, rel=1e-9)
+
+
+def test_forming_candle_replacement_after_window_is_full():
+    strategy = HedgeFundStrategy()
+    engine = IncrementalIndicators(strategy, window=WINDOW)
+    ohlcv = _candles(300, seed=2)
+    engine.seed(ohlcv[:-1])
+    forming = ohlcv[-1].copy()
+    forming[4] *= 1.01
+    forming[2] = max(forming[2], forming[4])
+    engine.update(forming)
+    state = engine.update(ohlcv[-1])
+    _assert_matches(state, _baseline(strategy, ohlcv, len(ohlcv) - 1))